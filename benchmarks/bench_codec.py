@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# Decode/encode timings of the JSON codecs on recorded GraphQL responses.
+#
+#     python benchmarks/bench_codec.py
+#     python benchmarks/bench_codec.py --scale 20 --repeat 200
+#
+# Payloads in benchmarks/payloads are anonymised get_pods/get_myself/get_gpu_types
+# responses. --scale multiplies the list in each one to mimic a bigger account.
+import argparse
+import copy
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import runpod
+import runpod_models
+
+PAYLOAD_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'payloads')
+
+# payload name -> (path to the list to scale, model, typed helper)
+PAYLOADS = {
+    'pods': (('myself', 'pods'), runpod_models.Pod, runpod_models.pods_from_response),
+    'myself': (('myself', 'podTemplates'), runpod_models.Template, runpod_models.templates_from_response),
+    'gpu_types': (('gpuTypes',), runpod_models.GpuType, runpod_models.gpu_types_from_response),
+}
+
+
+class _Response(object):
+    # Just enough of httpx.Response for the *_from_response helpers
+    status_code = 200
+
+    def __init__(self, content):
+        self.content = content
+
+
+def load_payload(name, scale):
+    with open(os.path.join(PAYLOAD_DIR, f'{name}.json'), 'rb') as f:
+        data = json.load(f)
+
+    path = PAYLOADS[name][0]
+    parent = data['data']
+    for key in path[:-1]:
+        parent = parent[key]
+    parent[path[-1]] = [copy.deepcopy(item) for _ in range(scale) for item in parent[path[-1]]]
+    return data
+
+
+def best_of(func, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1e6
+
+
+def models_from_dicts(codec, content, path, model):
+    value = codec.loads(content)['data']
+    for key in path:
+        value = value[key]
+    return model.from_list(value)
+
+
+def run(names, scale, repeat):
+    print(f'{"payload":<10} {"size":>9}  {"codec":<8} {"loads us":>10} {"dumps us":>10} {"models us":>10}')
+
+    for name in names:
+        data = load_payload(name, scale)
+        content = json.dumps(data).encode()
+        path, model, from_response = PAYLOADS[name]
+
+        for codec_name in runpod.CODECS:
+            codec = runpod.get_codec(codec_name)
+            loads_us = best_of(lambda: codec.loads(content), repeat)
+            dumps_us = best_of(lambda: codec.dumps(data), repeat)
+            models_us = best_of(lambda: models_from_dicts(codec, content, path, model), repeat)
+            print(f'{name:<10} {len(content):>9}  {codec_name:<8} {loads_us:>10.1f} {dumps_us:>10.1f} {models_us:>10.1f}')
+
+        if runpod.msgspec is not None:
+            # Bytes straight into typed structs, no intermediate dicts
+            response = _Response(content)
+            typed_us = best_of(lambda: from_response(response), repeat)
+            print(f'{name:<10} {len(content):>9}  {"structs":<8} {"-":>10} {"-":>10} {typed_us:>10.1f}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the JSON codecs on recorded payloads')
+    parser.add_argument('--payload', '-payload', '--p', '-p', choices=sorted(PAYLOADS), action='append', help='payload to run (repeatable, default all)')
+    parser.add_argument('--scale', '-scale', '--s', '-s', type=int, default=1, help='multiply the payload list this many times')
+    parser.add_argument('--repeat', '-repeat', '--r', '-r', type=int, default=50, help='runs per measurement, the best is reported')
+    args = parser.parse_args()
+
+    run(args.payload or sorted(PAYLOADS), args.scale, args.repeat)
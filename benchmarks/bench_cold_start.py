@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+# Cold start of the command line, each run is a fresh interpreter.
+#
+#     python benchmarks/bench_cold_start.py
+#     python benchmarks/bench_cold_start.py --runs 30
+#
+# "python -c pass" is the floor every command pays; the rest is our own import
+# and dispatch cost. --help and argument errors should stay close to the floor.
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CASES = [
+    ('interpreter', ['-c', 'pass']),
+    ('import httpx', ['-c', 'import httpx']),
+    ('import runpod', ['-c', 'import runpod']),
+    ('runpod_cli --help', ['-m', 'runpod_cli', '--help']),
+    ('runpod_cli get-pods --help', ['-m', 'runpod_cli', 'get-pods', '--help']),
+    ('runpod_cli stop-pod (bad args)', ['-m', 'runpod_cli', 'stop-pod']),
+    ('get_pods.py --help', ['get_pods.py', '--help']),
+    ('create_pod.py --help', ['create_pod.py', '--help']),
+]
+
+
+def time_case(argv, runs):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable] + argv, cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the command line cold start')
+    parser.add_argument('--runs', '-runs', '--r', '-r', type=int, default=15, help='runs per case (default: 15)')
+    args = parser.parse_args()
+
+    print(f'{"case":<34} {"min ms":>8} {"median ms":>10} {"max ms":>8}')
+    for name, argv in CASES:
+        samples = time_case(argv, args.runs)
+        print(f'{name:<34} {min(samples):>8.1f} {statistics.median(samples):>10.1f} {max(samples):>8.1f}')
@@ -1,8 +1,8 @@
 #!/usr/bin/env python3
 import sys
-import json
-import time
 import runpod
+import runpod_cli
+from runpod import CAPACITY, pretty, response_json
 
 NAME = 'stable-diffusion-webui 2.1.0'
 IMAGE_NAME = 'ashleykza/stable-diffusion-webui:2.1.0'
@@ -17,58 +17,65 @@ PORTS = '22/tcp,3000/http,3010/http,3020/http,6006/http,8000/http,8888/http'
 # PORTS = '22/tcp,8888/http,3000/http,5000/http,5005/http'
 
 
-def create_pod():
-    pod_config = f"""
-        countryCode: "{COUNTRY_CODE}",
-        minDownload: {MIN_DOWNLOAD},
-        gpuCount: 1,
-        volumeInGb: {PERSISTENT_DISK_SIZE_GB},
-        containerDiskInGb: {OS_DISK_SIZE_GB},
-        gpuTypeId: "{GPU_TYPE_ID}",
-        cloudType: {CLOUD_TYPE},
-        supportPublicIp: true,
-        name: "{NAME}",
-        dockerArgs: "",
-        ports: "{PORTS}",
-        volumeMountPath: "/workspace",
-        imageName: "{IMAGE_NAME}",
-        startJupyter: true,
-        startSsh: true,
-        env: [
-            {{
-                key: "JUPYTER_PASSWORD",
-                value: "Jup1t3R!"
-            }},
-            {{
-                key: "ENABLE_TENSORBOARD",
-                value: "1"
-            }}
+def create_pod(api):
+    pod_config = {
+        'countryCode': COUNTRY_CODE,
+        'minDownload': MIN_DOWNLOAD,
+        'gpuCount': 1,
+        'volumeInGb': PERSISTENT_DISK_SIZE_GB,
+        'containerDiskInGb': OS_DISK_SIZE_GB,
+        'gpuTypeId': GPU_TYPE_ID,
+        'cloudType': CLOUD_TYPE,
+        'supportPublicIp': True,
+        'name': NAME,
+        'dockerArgs': '',
+        'ports': PORTS,
+        'volumeMountPath': '/workspace',
+        'imageName': IMAGE_NAME,
+        'startJupyter': True,
+        'startSsh': True,
+        'env': [
+            {
+                'key': 'JUPYTER_PASSWORD',
+                'value': 'Jup1t3R!'
+            },
+            {
+                'key': 'ENABLE_TENSORBOARD',
+                'value': '1'
+            }
         ]
-    """
+    }
 
-    response = runpod.create_on_demand_pod(pod_config)
-    resp_json = response.json()
+    response = api.create_on_demand_pod(pod_config)
+    resp_json = response_json(response)
 
     if response.status_code == 200:
         if 'errors' in resp_json:
-
             for error in resp_json['errors']:
-                if error['message'] == 'There are no longer any instances available with the requested specifications. Please refresh and try again.':
-                    print('No resources currently available, sleeping for 5 seconds')
-                    time.sleep(5)
-                    create_pod()
-                elif error['message'] == 'There are no longer any instances available with enough disk space.':
-                    print(error)
-                    print('No instances with enough disk space available, sleeping for 5 seconds')
-                    time.sleep(5)
-                    create_pod()
-                else:
-                    print('ERROR: ' + error['message'])
+                print('ERROR: ' + error['message'])
         else:
-            print(json.dumps(resp_json, indent=4, default=str))
+            print(pretty(resp_json))
             sys.exit()
 
 
+def print_retry(error_class, attempt, delay):
+    reason = 'No resources currently available' if error_class == CAPACITY else f'Request failed ({error_class})'
+    print(f'{reason}, retrying in {delay:.0f} seconds')
+
+
+def add_arguments(parser):
+    pass
+
+
+def main(args):
+    # No instances / not enough disk space are retried with backoff by the API
+    with runpod.API(
+        retry_on=runpod.RETRY_ALL,
+        retry_policies={runpod.CAPACITY: runpod.RetryPolicy(base_delay=5, factor=1.5, max_delay=30, max_elapsed=None)},
+        on_retry=print_retry
+    ) as api:
+        create_pod(api)
+
+
 if __name__ == '__main__':
-    runpod = runpod.API()
-    create_pod()
+    runpod_cli.alias('create-on-demand-pod')
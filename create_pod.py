@@ -1,10 +1,13 @@
 #!/usr/bin/env python3
 import runpod
-import json
-import argparse
-from get_price import get_price
+import runpod_cli
+import sys
 import time
+from get_price import get_price
 import datetime
+import gpu_catalog
+import gpu_selector
+from runpod import pretty, response_json
 
 gpu_type_map = {
     '3090': 'NVIDIA GeForce RTX 3090',
@@ -13,94 +16,154 @@ gpu_type_map = {
     'a5000': 'NVIDIA RTX A5000'
 }
 
-parser = argparse.ArgumentParser()
-parser.add_argument('-n', '--name', default='waterbears')
-parser.add_argument('-i','--image_name', default='runpod/stable-diffusion:web-ui-10.2.1')
-parser.add_argument('-g','--gpu_type_id', default='3090')
-parser.add_argument('-ct','--cloud_type',default='ALL')
-parser.add_argument('-s','--spot', action='store_true', default=False)
-parser.add_argument('-od','--os_disk_size_gb', type=int, default=20)
-parser.add_argument('-pd','--persistent_disk_size_gb', type=int, default=50)
-parser.add_argument('-bp','--bid_price', type=float, default=0.19)
-parser.add_argument('-cc','--country_code',default='SK,SE,BE,BG,CA,CZ,FR,NL')
-parser.add_argument('-md','--min_download', type=int, default=600)
-parser.add_argument('-p','--ports', default='8888/http,7860/http,7862/http,7863/http,7864/http,7865/http,6006/http,4444/http,22/tcp')
-parser.add_argument('-e','--user_envs', default="RUNPOD_STOP_AUTO=1")
-
-args = parser.parse_args()
-
-current_time = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-args.name = f'{args.name} {current_time}'
-
-# Replace the short GPU type id with the full name
-args.gpu_type_id = gpu_type_map.get(args.gpu_type_id.lower(), args.gpu_type_id)
-
-# Get the minimum bid price for the GPU type
-secure_price, community_price, lowest_price = get_price(args.gpu_type_id)
-
-if args.spot:
-    if lowest_price is not None:
-        args.bid_price = lowest_price
-    else:
-        print("No suitable server pod found for spot instance.")
-        exit()
-else:
-    if args.cloud_type == 'ALL':
-        if secure_price is not None and community_price is not None:
-            args.cloud_type = 'SECURE' if secure_price < community_price else 'COMMUNITY'
-            args.bid_price = secure_price if secure_price < community_price else community_price
-        elif secure_price is not None:
-            args.cloud_type = 'SECURE'
-            args.bid_price = secure_price
-        elif community_price is not None:
-            args.cloud_type = 'COMMUNITY'
-            args.bid_price = community_price
+
+def add_arguments(parser):
+    parser.add_argument('-n', '--name', default='waterbears')
+    parser.add_argument('-i','--image_name', default='runpod/stable-diffusion:web-ui-10.2.1')
+    parser.add_argument('-g','--gpu_type_id', default='3090', help='GPU type id or short name, "auto" picks the best throughput per dollar')
+    parser.add_argument('-ct','--cloud_type',default='ALL')
+    parser.add_argument('-s','--spot', action='store_true', default=False)
+    parser.add_argument('-od','--os_disk_size_gb', type=int, default=20)
+    parser.add_argument('-pd','--persistent_disk_size_gb', type=int, default=50)
+    parser.add_argument('-bp','--bid_price', type=float, default=0.19)
+    parser.add_argument('-cc','--country_code',default='SK,SE,BE,BG,CA,CZ,FR,NL')
+    parser.add_argument('-md','--min_download', type=int, default=600)
+    parser.add_argument('-p','--ports', default='8888/http,7860/http,7862/http,7863/http,7864/http,7865/http,6006/http,4444/http,22/tcp')
+    parser.add_argument('-e','--user_envs', default="RUNPOD_STOP_AUTO=1")
+    parser.add_argument('-rt','--retry_timeout', type=float, default=0, help='seconds to keep retrying while no resources are available')
+    parser.add_argument('-N','--count', type=int, default=1, help='number of identical pods to create, named <name>-01, <name>-02, ...')
+    parser.add_argument('-mf','--max_in_flight', type=int, default=5, help='with --count, pods being created at once')
+    parser.add_argument('-k','--top_k', type=int, default=3, help='with -g auto, GPU types to fall back through in order')
+    parser.add_argument('-mm','--min_memory', type=int, default=0, help='with -g auto, minimum GPU memory in GB')
+    parser.add_argument('-mp','--max_price', type=float, help='with -g auto, maximum price in $/hr per GPU')
+    parser.add_argument('-tf','--throughput_file', help='with -g auto, JSON map of GPU type id to relative throughput')
+    parser.add_argument('-dl','--deadline', type=float, default=600, help='with --count or place-pod, seconds after which pods still waiting for a GPU are given up')
+
+
+def print_retry(error_class, attempt, delay):
+    reason = 'No resources currently available' if error_class == runpod.CAPACITY else f'Request failed ({error_class})'
+    print(f'{reason}, retrying in {delay:.0f} seconds', file=sys.stderr)
+
+
+def get_api(args, cancel_event=None, on_retry=print_retry):
+    # Capacity errors are retried with backoff for up to --retry_timeout seconds
+    return runpod.API(
+        retry_on=runpod.RETRY_ALL if args.retry_timeout > 0 else runpod.DEFAULT_RETRY_ON,
+        retry_policies={runpod.CAPACITY: runpod.RetryPolicy(base_delay=5, factor=1.5, max_delay=30, max_elapsed=args.retry_timeout)},
+        cancel_event=cancel_event,
+        on_retry=on_retry
+    )
+
+
+def prepare(args, api):
+    # Fills in the name, GPU id, price and cloud type. Returns an error message when nothing fits.
+    current_time = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    args.name = f'{args.name} {current_time}'
+    args.gpu_choices = None
+
+    if args.gpu_type_id.lower() == 'auto':
+        return select_gpu_choices(args, api)
+
+    # Replace the short GPU type id with the full name
+    args.gpu_type_id = gpu_type_map.get(args.gpu_type_id.lower(), args.gpu_type_id)
+
+    # Get the minimum bid price for the GPU type
+    secure_price, community_price, lowest_price = get_price(args.gpu_type_id, api)
+
+    if args.spot:
+        if lowest_price is not None:
+            args.bid_price = lowest_price
         else:
-            print("No suitable server pod found.")
-            exit()
+            return "No suitable server pod found for spot instance."
     else:
-        if args.cloud_type == 'SECURE':
-            if secure_price is not None:
+        if args.cloud_type == 'ALL':
+            if secure_price is not None and community_price is not None:
+                args.cloud_type = 'SECURE' if secure_price < community_price else 'COMMUNITY'
+                args.bid_price = secure_price if secure_price < community_price else community_price
+            elif secure_price is not None:
+                args.cloud_type = 'SECURE'
                 args.bid_price = secure_price
-            else:
-                print("No suitable server pod found for SECURE cloud type.")
-                exit()
-        else:  # args.cloud_type == 'COMMUNITY'
-            if community_price is not None:
+            elif community_price is not None:
+                args.cloud_type = 'COMMUNITY'
                 args.bid_price = community_price
             else:
-                print("No suitable server pod found for COMMUNITY cloud type.")
-                exit()
-
-# Convert the user envs to a dict
-user_envs_list = args.user_envs.split(',')
-USER_ENVS = dict(item.split('=') for item in user_envs_list if '=' in item)
-envs_str = ',\n'.join([f'{{key: "{k}", value: "{v}"}}' for k, v in USER_ENVS.items()])
-
-def create_spot_pod():
-    pod_config = f"""
-        countryCode: "",
-        minDownload: {args.min_download},
-        bidPerGpu: {args.bid_price},
-        gpuCount: 1,
-        volumeInGb: {args.persistent_disk_size_gb},
-        containerDiskInGb: {args.os_disk_size_gb},
-        gpuTypeId: "{args.gpu_type_id}",
-        cloudType: {args.cloud_type},
-        supportPublicIp: true,
-        name: "{args.name}",
-        dockerArgs: "",
-        ports: "{args.ports}",
-        volumeMountPath: "/workspace",
-        imageName: "{args.image_name}",
-        startJupyter: true,
-        startSsh: true,
-        env: [
-            {envs_str}
-        ]
-    """
-    response = runpod.API().create_spot_pod(pod_config)
-    resp_json = response.json()
+                return "No suitable server pod found."
+        else:
+            if args.cloud_type == 'SECURE':
+                if secure_price is not None:
+                    args.bid_price = secure_price
+                else:
+                    return "No suitable server pod found for SECURE cloud type."
+            else:  # args.cloud_type == 'COMMUNITY'
+                if community_price is not None:
+                    args.bid_price = community_price
+                else:
+                    return "No suitable server pod found for COMMUNITY cloud type."
+    return None
+
+
+def select_gpu_choices(args, api):
+    # -g auto: the top_k GPU types by throughput per dollar, tried in order
+    try:
+        choices = gpu_selector.select_gpus(
+            args.top_k, args.throughput_file, api,
+            fresh=True,
+            min_memory=args.min_memory,
+            max_price=args.max_price,
+            cloud_type=args.cloud_type,
+            spot=args.spot
+        )
+    except (gpu_catalog.CatalogError, OSError, ValueError) as e:
+        return f'Unable to rank the GPU types: {e}'
+
+    if not choices:
+        return "No GPU type matches the constraints."
+    args.gpu_choices = choices
+    use_gpu_choice(args, choices[0])
+    return None
+
+
+def use_gpu_choice(args, choice):
+    args.gpu_type_id = choice['gpu'].id
+    args.bid_price = choice['price']
+    if not args.spot:
+        args.cloud_type = choice['cloud_type']
+
+
+def get_env(user_envs):
+    # Convert the user envs to the GraphQL env list
+    user_envs_list = user_envs.split(',')
+    USER_ENVS = dict(item.split('=') for item in user_envs_list if '=' in item)
+    return [{'key': k, 'value': v} for k, v in USER_ENVS.items()]
+
+
+def get_pod_config(args):
+    pod_config = {
+        'countryCode': '' if args.spot else args.country_code,
+        'minDownload': args.min_download,
+        'gpuCount': 1,
+        'volumeInGb': args.persistent_disk_size_gb,
+        'containerDiskInGb': args.os_disk_size_gb,
+        'gpuTypeId': args.gpu_type_id,
+        'cloudType': args.cloud_type,
+        'supportPublicIp': True,
+        'name': args.name,
+        'dockerArgs': '',
+        'ports': args.ports,
+        'volumeMountPath': '/workspace',
+        'imageName': args.image_name,
+        'startJupyter': True,
+        'startSsh': True,
+        'env': get_env(args.user_envs)
+    }
+    if args.spot:
+        pod_config['bidPerGpu'] = args.bid_price
+    return pod_config
+
+
+def create_spot_pod(api, pod_config):
+    response = api.create_spot_pod(pod_config)
+    resp_json = response_json(response)
     
     if response.status_code == 200:
         if 'errors' in resp_json:
@@ -108,71 +171,82 @@ def create_spot_pod():
             for error in resp_json['errors']:
                 print(error['message'])
         else:
-            print(json.dumps(resp_json, indent=4, default=str))
+            print(pretty(resp_json))
+            return True
     else:
         print(response.status_code)
-        print(json.dumps(resp_json, indent=4, default=str))
-
-    # # print current price
-    # secure_price, community_price, lowest_price = get_price(args.gpu_type_id)
-    # print(f"Current price: {lowest_price}")
-
-    # print(f"spot={args.spot}, cloud_type={args.cloud_type}")
-    # print(pod_config)
-
-def create_on_demand_pod():
-    pod_config = f"""
-        countryCode: "{args.country_code}",
-        minDownload: {args.min_download},
-        gpuCount: 1,
-        volumeInGb: {args.persistent_disk_size_gb},
-        containerDiskInGb: {args.os_disk_size_gb},
-        gpuTypeId: "{args.gpu_type_id}",
-        cloudType: {args.cloud_type},
-        supportPublicIp: true,
-        name: "{args.name}",
-        dockerArgs: "",
-        ports: "{args.ports}",
-        volumeMountPath: "/workspace",
-        imageName: "{args.image_name}",
-        startJupyter: true,
-        startSsh: true,
-        env: [
-            {envs_str}
-        ]
-    """
-    response = runpod.API().create_on_demand_pod(pod_config)
-    resp_json = response.json()
+        print(pretty(resp_json))
+    return False
+
+
+def create_on_demand_pod(api, pod_config):
+    response = api.create_on_demand_pod(pod_config)
+    resp_json = response_json(response)
 
     if response.status_code == 200:
         if 'errors' in resp_json:
 
             for error in resp_json['errors']:
                 if error['message'] == 'There are no longer any instances available with the requested specifications. Please refresh and try again.':
-                    print('No resources currently available. Please try again later.')
+                    print('No resources currently available. Please try again later, or pass --retry_timeout.')
                 elif error['message'] == 'There are no longer any instances available with enough disk space.':
                     print(error)
                     print('No instances with enough disk space available. Please try again later.')
                 else:
                     print('ERROR: ' + error['message'])
         else:
-            print(json.dumps(resp_json, indent=4, default=str))
-            exit()
-    
-    # # print current price
-    # secure_price, community_price, lowest_price = get_price(args.gpu_type_id)
-    # if args.cloud_type == 'SECURE':
-    #     print(f"Current price: {secure_price}")
-    # else:
-    #     print(f"Current price: {community_price}")
+            print(pretty(resp_json))
+            return True
+    return False
 
-    # print(f"spot={args.spot}, cloud_type={args.cloud_type}")
-    # print(pod_config)
 
-if __name__ == '__main__':
-    if args.spot:
-        create_spot_pod()
+def print_pod_result(result):
+    if result['error'] is None:
+        print(f"{result['name']}: {result['pod']['id']} ({result['seconds']:.1f} s)", flush=True)
     else:
-        create_on_demand_pod()
+        print(f"{result['name']}: ERROR: {result['error']}", flush=True)
+
+
+def create_pods(args):
+    # Every slot retries capacity errors on its own until the deadline
+    start = time.perf_counter()
+    results = runpod.create_pods(
+        get_pod_config(args), args.count,
+        spot=args.spot,
+        max_in_flight=max(1, args.max_in_flight),
+        deadline=args.deadline,
+        on_result=print_pod_result,
+        on_retry=print_retry
+    )
+
+    created = [result for result in results if result['error'] is None]
+    print(f'{len(created)} of {args.count} pods created in {time.perf_counter() - start:.1f} s')
+    return 0 if len(created) == args.count else 1
+
+
+def main(args):
+    # One API instance for the whole run so every call shares a connection
+    with get_api(args) as api:
+        error = prepare(args, api)
+        if error is not None:
+            print(error)
+            return
+
+        if args.count > 1:
+            return create_pods(args)
+
+        # With -g auto every chosen GPU type is tried in turn until a pod is created
+        for choice in args.gpu_choices or [None]:
+            if choice is not None:
+                use_gpu_choice(args, choice)
+                print(f'Trying {args.gpu_type_id} ({args.cloud_type}, {args.bid_price} $/hr)', file=sys.stderr)
+            if args.spot:
+                created = create_spot_pod(api, get_pod_config(args))
+            else:
+                created = create_on_demand_pod(api, get_pod_config(args))
+            if created:
+                return
 
-    
\ No newline at end of file
+
+if __name__ == '__main__':
+    runpod_cli.alias('create-pod')
@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
-import runpod
-import json
+import runpod_cli
+import runpod_daemon
+from runpod import pretty, response_json
 
 NAME = 'stable-diffusion-webui 2.1.0'
 IMAGE_NAME = 'ashleykza/stable-diffusion-webui:2.1.0'
@@ -14,48 +15,55 @@ PORTS = '22/tcp,3000/http,3010/http,3020/http,6006/http,8000/http,8888/http'
 # PORTS = '22/tcp,8888/http,3000/http,5000/http,5005/http'
 
 
-if __name__ == '__main__':
-    runpod = runpod.API()
-
-    pod_config = f"""
-        countryCode: "{COUNTRY_CODE}",
-        minDownload: {MIN_DOWNLOAD},
-        bidPerGpu: {BID_PRICE},
-        gpuCount: 1,
-        volumeInGb: {PERSISTENT_DISK_SIZE_GB},
-        containerDiskInGb: {OS_DISK_SIZE_GB},
-        gpuTypeId: "{GPU_TYPE_ID}",
-        cloudType: SECURE,
-        supportPublicIp: true,
-        name: "{NAME}",
-        dockerArgs: "",
-        ports: "{PORTS}",
-        volumeMountPath: "/workspace",
-        imageName: "{IMAGE_NAME}",
-        startJupyter: true,
-        startSsh: true,
-        env: [
-            {{
-                key: "JUPYTER_PASSWORD",
-                value: "Jup1t3R!"
-            }},
-            {{
-                key: "ENABLE_TENSORBOARD",
-                value: "1"
-            }}
+def add_arguments(parser):
+    pass
+
+
+def main(args):
+    pod_config = {
+        'countryCode': COUNTRY_CODE,
+        'minDownload': MIN_DOWNLOAD,
+        'bidPerGpu': BID_PRICE,
+        'gpuCount': 1,
+        'volumeInGb': PERSISTENT_DISK_SIZE_GB,
+        'containerDiskInGb': OS_DISK_SIZE_GB,
+        'gpuTypeId': GPU_TYPE_ID,
+        'cloudType': 'SECURE',
+        'supportPublicIp': True,
+        'name': NAME,
+        'dockerArgs': '',
+        'ports': PORTS,
+        'volumeMountPath': '/workspace',
+        'imageName': IMAGE_NAME,
+        'startJupyter': True,
+        'startSsh': True,
+        'env': [
+            {
+                'key': 'JUPYTER_PASSWORD',
+                'value': 'Jup1t3R!'
+            },
+            {
+                'key': 'ENABLE_TENSORBOARD',
+                'value': '1'
+            }
         ]
-    """
+    }
 
-    response = runpod.create_spot_pod(pod_config)
-    resp_json = response.json()
+    with runpod_daemon.get_api() as api:
+        response = api.create_spot_pod(pod_config)
+        resp_json = response_json(response)
 
-    if response.status_code == 200:
-        if 'errors' in resp_json:
-            print('ERROR:')
-            for error in resp_json['errors']:
-                print(error['message'])
+        if response.status_code == 200:
+            if 'errors' in resp_json:
+                print('ERROR:')
+                for error in resp_json['errors']:
+                    print(error['message'])
+            else:
+                print(pretty(resp_json))
         else:
-            print(json.dumps(resp_json, indent=4, default=str))
-    else:
-        print(response.status_code)
-        print(json.dumps(resp_json, indent=4, default=str))
+            print(response.status_code)
+            print(pretty(resp_json))
+
+
+if __name__ == '__main__':
+    runpod_cli.alias('create-spot-pod')
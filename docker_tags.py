@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+# Docker Hub tag index. Every page of a repo's tags is fetched (the pages after
+# the first one concurrently over one pooled connection) and kept in
+# RUNPOD_CACHE_DIR with the ETag/Last-Modified of each page. Within
+# RUNPOD_TAGS_TTL seconds the cached index is used as is; after that the first
+# page is revalidated and, since tags are listed newest first, a 304 there
+# means nothing was pushed. The last page is revalidated as well, it shifts
+# when a tag is deleted. The sorted tag list and the latest tag per prefix are
+# computed once per fetch and stored with the pages.
+#
+#     python -m runpod_cli get-image-tags runpod/pytorch --latest
+#     python -m runpod_cli get-image-tags runpod/pytorch --search cuda12
+import bisect
+import math
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import runpod
+import runpod_cli
+
+REGISTRY_URL = 'https://registry.hub.docker.com/v2/repositories'
+# Largest page Docker Hub serves
+PAGE_SIZE = 100
+# Pages fetched at once
+MAX_WORKERS = 8
+# Seconds a fetched index is used without asking Docker Hub
+DEFAULT_TTL = float(os.getenv('RUNPOD_TAGS_TTL', 3600))
+
+
+class TagIndexError(Exception):
+    pass
+
+
+def tag_version(name):
+    # The x.y.z after the last '-' as a tuple of ints, None for other tags
+    try:
+        return tuple(map(int, name.rsplit('-', 1)[-1].split('.')))
+    except ValueError:
+        return None
+
+
+def latest_per_prefix(names):
+    # Newest version of every '<prefix>-<x.y.z>' tag, sorted
+    latest = {}
+    for name in names:
+        version = tag_version(name)
+        if version is None:
+            continue
+        prefix = name.rsplit('-', 1)[0]
+        if prefix not in latest or version > latest[prefix][0]:
+            latest[prefix] = (version, name)
+    return sorted(name for _, name in latest.values())
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    # One pooled client for every repo and page, httpx is only imported when tags are fetched
+    global _client
+    with _client_lock:
+        if _client is None:
+            import httpx
+            _client = httpx.Client(
+                timeout=30,
+                follow_redirects=True,
+                limits=httpx.Limits(max_connections=MAX_WORKERS, max_keepalive_connections=MAX_WORKERS)
+            )
+    return _client
+
+
+def page_url(repo, page):
+    return f'{REGISTRY_URL}/{repo}/tags?page_size={PAGE_SIZE}&page={page}'
+
+
+def fetch_page(url, cached=None):
+    # (page, changed), a cached page is revalidated and returned as is on a 304
+    headers = {}
+    if cached is not None:
+        if cached.get('etag'):
+            headers['If-None-Match'] = cached['etag']
+        if cached.get('lastModified'):
+            headers['If-Modified-Since'] = cached['lastModified']
+
+    response = get_client().get(url, headers=headers)
+    if response.status_code == 304 and cached is not None:
+        return cached, False
+    if response.status_code != 200:
+        raise TagIndexError(f'{url}: HTTP {response.status_code}')
+
+    data = runpod.response_json(response)
+    return {
+        'etag': response.headers.get('etag'),
+        'lastModified': response.headers.get('last-modified'),
+        'count': data.get('count'),
+        'next': data.get('next'),
+        'names': [tag['name'] for tag in data.get('results', [])],
+    }, True
+
+
+def fetch_pages(repo, cached_pages):
+    first_url = page_url(repo, 1)
+    first, changed = fetch_page(first_url, cached_pages.get(first_url))
+    if not changed:
+        # Tags are listed by last update, so an unchanged first page means nothing was
+        # pushed. A deletion further down shifts the last page, revalidate that one too.
+        last_url = list(cached_pages)[-1]
+        if last_url == first_url or not fetch_page(last_url, cached_pages[last_url])[1]:
+            return cached_pages
+        # The page count may have changed as well, start over from a full first page
+        first, _ = fetch_page(first_url)
+
+    # The count on the first page gives every other page, fetch them all at once
+    pages = {first_url: first}
+    urls = [page_url(repo, page) for page in range(2, math.ceil((first['count'] or 0) / PAGE_SIZE) + 1)]
+    if urls:
+        with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(urls))) as executor:
+            results = executor.map(lambda url: fetch_page(url, cached_pages.get(url)), urls)
+            for url, (page, _) in zip(urls, results):
+                pages[url] = page
+
+    # Without a count, or when tags were pushed while paging, follow the next links
+    last = pages[urls[-1] if urls else first_url]
+    while last['next'] and last['next'] not in pages:
+        url = last['next']
+        last, _ = fetch_page(url)
+        pages[url] = last
+    return pages
+
+
+class TagIndex(object):
+    def __init__(self, repo, ttl=DEFAULT_TTL, cache_file=None):
+        self.repo = repo
+        self.ttl = ttl
+        self.cache_file = cache_file or runpod.cache_path(f"docker_tags_{repo.replace('/', '_')}.json")
+        self._lock = threading.Lock()
+        self.pages = {}
+        # Sorted tag names, their lower case form for search and the latest tag per prefix
+        self.names = []
+        self.lower_names = []
+        self.latest = []
+        self.fetched_at = 0
+        self._load()
+
+    def is_fresh(self):
+        return bool(self.pages) and time.time() - self.fetched_at <= self.ttl
+
+    def get(self):
+        if not self.is_fresh():
+            self.refresh()
+        return self
+
+    def refresh(self):
+        # One fetch per repo at a time, a second caller gets the result of the first
+        with self._lock:
+            if self.is_fresh():
+                return self
+            pages = fetch_pages(self.repo, self.pages)
+            if pages is self.pages:
+                self.fetched_at = time.time()
+            else:
+                names = sorted({name for page in pages.values() for name in page['names']})
+                self._set(pages, names, latest_per_prefix(names), time.time())
+            self._save()
+        return self
+
+    def with_prefix(self, prefix):
+        start = bisect.bisect_left(self.names, prefix)
+        end = start
+        while end < len(self.names) and self.names[end].startswith(prefix):
+            end += 1
+        return self.names[start:end]
+
+    def search(self, text):
+        text = text.lower()
+        return [name for name, lower in zip(self.names, self.lower_names) if text in lower]
+
+    def _set(self, pages, names, latest, fetched_at):
+        self.pages = pages
+        self.names = names
+        self.lower_names = [name.lower() for name in names]
+        self.latest = latest
+        self.fetched_at = fetched_at
+
+    def _load(self):
+        try:
+            with open(self.cache_file, 'rb') as f:
+                data = runpod.loads(f.read())
+            self._set(data['pages'], data['names'], data['latest'], data['fetchedAt'])
+        except (FileNotFoundError, ValueError, KeyError):
+            pass
+
+    def _save(self):
+        runpod.write_atomic(self.cache_file, runpod.dumps({
+            'fetchedAt': self.fetched_at,
+            'names': self.names,
+            'latest': self.latest,
+            'pages': self.pages,
+        }))
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+# Process wide index per repo, fetched or revalidated when older than the TTL
+def get_index(repo):
+    with _indexes_lock:
+        index = _indexes.get(repo)
+        if index is None:
+            index = _indexes[repo] = TagIndex(repo)
+    return index.get()
+
+
+def add_arguments(parser):
+    parser.add_argument(
+        'repo',
+        type=str,
+        help='Docker Hub repository, e.g. runpod/pytorch'
+    )
+
+    parser.add_argument(
+        '--latest', '-latest', '--l', '-l',
+        action='store_true',
+        help='only the latest tag of each prefix'
+    )
+
+    parser.add_argument(
+        '--prefix', '-prefix', '--p', '-p',
+        type=str,
+        help='only tags starting with this'
+    )
+
+    parser.add_argument(
+        '--search', '-search', '--s', '-s',
+        type=str,
+        help='only tags containing this (case insensitive)'
+    )
+
+    parser.add_argument(
+        '--refresh', '-refresh', '--r', '-r',
+        action='store_true',
+        help='revalidate the cached tags even when they are within RUNPOD_TAGS_TTL'
+    )
+
+
+def main(args):
+    try:
+        index = get_index(args.repo)
+        if args.refresh:
+            index.fetched_at = 0
+            index.refresh()
+    except Exception as e:
+        print('ERROR:')
+        print(e)
+        return 1
+
+    if args.latest:
+        names = index.latest
+    elif args.search is not None:
+        names = index.search(args.search)
+    else:
+        names = index.with_prefix(args.prefix or '')
+    if args.prefix is not None:
+        names = [name for name in names if name.startswith(args.prefix)]
+    if args.latest and args.search is not None:
+        names = [name for name in names if args.search.lower() in name.lower()]
+
+    for name in names:
+        print(f'{args.repo}:{name}')
+
+
+if __name__ == '__main__':
+    runpod_cli.alias('get-image-tags')
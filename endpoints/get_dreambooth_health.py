@@ -1,14 +1,13 @@
 #!/usr/bin/env python3
 import runpod
-import json
 
 
 if __name__ == '__main__':
     endpoints = runpod.Endpoints()
     response = endpoints.get_dreambooth_health()
-    resp_json = response.json()
+    resp_json = runpod.response_json(response)
 
     if response.status_code == 401:
         print('ERROR 401: Unauthorized')
     elif response.status_code == 200:
-        print(json.dumps(resp_json, indent=4, default=str))
+        print(runpod.pretty(resp_json))
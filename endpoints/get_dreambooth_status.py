@@ -1,7 +1,6 @@
 #!/usr/bin/env python3
 import argparse
 import runpod
-import json
 
 
 def get_args():
@@ -30,7 +29,7 @@ if __name__ == '__main__':
     elif response.status_code == 404:
         print(f'ERROR 404: request with job_id {job_id} does not exist')
     else:
-        resp_json = response.json()
+        resp_json = runpod.response_json(response)
 
         # if response.status_code == 200:
-        print(json.dumps(resp_json, indent=4, default=str))
+        print(runpod.pretty(resp_json))
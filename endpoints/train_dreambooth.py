@@ -1,6 +1,5 @@
 #!/usr/bin/env python3
 import runpod
-import json
 
 CONCEPT_NAME = 'OHWXman'
 
@@ -56,7 +55,7 @@ if __name__ == '__main__':
         }
     })
 
-    resp_json = response.json()
+    resp_json = runpod.response_json(response)
 
     if response.status_code == 401:
         print('401: Unauthorized')
@@ -69,4 +68,4 @@ if __name__ == '__main__':
         # else:
         #     pass
 
-        print(json.dumps(resp_json, indent=4, default=str))
+        print(runpod.pretty(resp_json))
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+# Stop, terminate or resume every pod matching a selector, concurrently:
+#
+#     python -m runpod_cli fleet terminate --name "sd-*" --concurrency 20
+#     python -m runpod_cli fleet stop --all
+#     python -m runpod_cli fleet resume --pod_id dg31b9aqtupn2z,x1y2z3
+#
+# A line is printed for each pod as soon as its call finishes, then a summary
+# with the wall clock time, the latency of the calls and the ids that failed,
+# ready to be passed back in with --pod_id. Calls still share the host wide
+# rate limit (RUNPOD_RATE_LIMIT), so that caps the throughput too.
+import asyncio
+import fnmatch
+import statistics
+import time
+
+import runpod
+import runpod_cli
+import runpod_daemon
+from runpod_models import ResponseError, pods_from_response, response_data
+
+ACTIONS = {'stop': 'stopped', 'terminate': 'terminated', 'resume': 'resumed'}
+# Pods an action applies to when no --status is given
+DEFAULT_STATUS = {'stop': 'RUNNING', 'resume': 'EXITED', 'terminate': None}
+
+
+def add_arguments(parser):
+    parser.add_argument(
+        'action',
+        choices=list(ACTIONS),
+        help='what to do with the selected pods'
+    )
+
+    parser.add_argument(
+        '--pod_id', '-pod_id', '--pod', '-pod', '--p', '-p',
+        type=str,
+        help='comma separated pod ids'
+    )
+
+    parser.add_argument(
+        '--name', '-name', '--n', '-n',
+        type=str,
+        help='pod name pattern, e.g. "sd-*"'
+    )
+
+    parser.add_argument(
+        '--image_name', '-image_name', '--image', '-image', '--i', '-i',
+        type=str,
+        help='image name pattern, e.g. "runpod/pytorch:*"'
+    )
+
+    parser.add_argument(
+        '--status', '-status', '--s', '-s',
+        type=str,
+        help='only pods in this status (default: RUNNING for stop, EXITED for resume, any for terminate)'
+    )
+
+    parser.add_argument(
+        '--all', '-all',
+        action='store_true',
+        help='select every pod, required when no other selector is given'
+    )
+
+    parser.add_argument(
+        '--concurrency', '-concurrency', '--c', '-c',
+        type=int,
+        default=10,
+        help='calls in flight at once (default: 10)'
+    )
+
+    parser.add_argument(
+        '--bid_price', '-bid_price', '--bid', '-bid', '--b', '-b',
+        type=float,
+        help='bid price to resume spot pods with (default: their current price)'
+    )
+
+    parser.add_argument(
+        '--dry_run', '-dry_run',
+        action='store_true',
+        help='only list the selected pods'
+    )
+
+
+def select_pods(pods, pod_ids=None, name=None, image_name=None, status=None):
+    selected = []
+    for pod in pods:
+        if pod_ids and pod.id not in pod_ids:
+            continue
+        if name and not fnmatch.fnmatchcase(pod.name or '', name):
+            continue
+        if image_name and not fnmatch.fnmatchcase(pod.image_name or '', image_name):
+            continue
+        if status and pod.desired_status != status:
+            continue
+        selected.append(pod)
+    return selected
+
+
+def pod_call(api, action, pod, bid_price=None):
+    if action == 'stop':
+        return api.stop_pod(pod.id)
+    if action == 'terminate':
+        return api.terminate_pod(pod.id)
+    if pod.is_spot:
+        return api.start_spot_pod(pod.id, bid_price or pod.cost_per_hr or pod.lowest_bid_price_to_resume)
+    return api.start_on_demand_pod(pod.id)
+
+
+async def run_fleet(action, pods, concurrency=10, bid_price=None, on_result=None):
+    # [(pod, error message or None, seconds)] in the order the calls finished.
+    # on_result(pod, error, seconds) is called as each one finishes.
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(api, pod):
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                response_data(await pod_call(api, action, pod, bid_price))
+                error = None
+            except Exception as e:
+                # One failed pod must not stop the others
+                error = str(e) or type(e).__name__
+            return pod, error, time.perf_counter() - start
+
+    results = []
+    async with runpod.AsyncAPI(max_connections=concurrency) as api:
+        for future in asyncio.as_completed([run(api, pod) for pod in pods]):
+            result = await future
+            results.append(result)
+            if on_result is not None:
+                on_result(*result)
+    return results
+
+
+def print_result(pod, error, seconds):
+    state = 'ok' if error is None else 'FAILED'
+    line = f'{pod.id:<16} {(pod.name or "")[:40]:<40} {state:<6} {seconds * 1000:7.0f} ms'
+    print(line if error is None else f'{line}  {error}', flush=True)
+
+
+def print_summary(action, results, wall_clock):
+    failed = [pod.id for pod, error, _ in results if error is not None]
+    latencies = sorted(seconds * 1000 for _, _, seconds in results)
+
+    print()
+    print(f'{len(results) - len(failed)} of {len(results)} pods {ACTIONS[action]} in {wall_clock:.2f} s')
+    if latencies:
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        print(
+            f'latency: min {latencies[0]:.0f} ms, median {statistics.median(latencies):.0f} ms, '
+            f'p95 {p95:.0f} ms, max {latencies[-1]:.0f} ms'
+        )
+    if failed:
+        print(f'ERROR: {len(failed)} failed, retry with:')
+        print(f'  python -m runpod_cli fleet {action} --pod_id {",".join(failed)}')
+
+
+def main(args):
+    pod_ids = [pod_id.strip() for pod_id in args.pod_id.split(',') if pod_id.strip()] if args.pod_id else None
+    if not (pod_ids or args.name or args.image_name or args.status or args.all):
+        print('ERROR: select pods with --pod_id, --name, --image_name or --status, or pass --all')
+        return 2
+
+    try:
+        with runpod_daemon.get_api() as api:
+            pods = pods_from_response(api.get_pods('status'))
+    except ResponseError as e:
+        print('ERROR:')
+        print(e)
+        return 1
+
+    status = args.status or DEFAULT_STATUS[args.action]
+    selected = select_pods(pods, pod_ids, args.name, args.image_name, status)
+    if not selected:
+        print('No pods selected')
+        return 0
+
+    if args.dry_run:
+        for pod in selected:
+            print(f'{pod.id:<16} {(pod.name or "")[:40]:<40} {pod.desired_status}')
+        print(f'{len(selected)} pods would be {ACTIONS[args.action]}')
+        return 0
+
+    print(f'{args.action} {len(selected)} pods, {args.concurrency} at a time', flush=True)
+    start = time.perf_counter()
+    results = asyncio.run(run_fleet(args.action, selected, max(1, args.concurrency), args.bid_price, print_result))
+    print_summary(args.action, results, time.perf_counter() - start)
+    return 1 if any(error is not None for _, error, _ in results) else 0
+
+
+if __name__ == '__main__':
+    runpod_cli.alias('fleet')
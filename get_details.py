@@ -1,17 +1,26 @@
 #!/usr/bin/env python3
-import runpod
-import json
+import runpod_cli
+import runpod_daemon
+from runpod import pretty, response_json
 
 
-if __name__ == '__main__':
-    runpod = runpod.API()
-    response = runpod.get_myself()
-    resp_json = response.json()
+def add_arguments(parser):
+    pass
+
+
+def main(args):
+    with runpod_daemon.get_api() as api:
+        response = api.get_myself()
+        resp_json = response_json(response)
 
-    if response.status_code == 200:
-        myself = resp_json['data']['myself']
-        print(json.dumps(myself, indent=4, default=str))
-    else:
-        print('ERROR:')
-        print('Status code: ' + str(response.status_code))
-        print(json.dumps(resp_json, indent=4, default=str))
+        if response.status_code == 200:
+            myself = resp_json['data']['myself']
+            print(pretty(myself))
+        else:
+            print('ERROR:')
+            print('Status code: ' + str(response.status_code))
+            print(pretty(resp_json))
+
+
+if __name__ == '__main__':
+    runpod_cli.alias('get-details')
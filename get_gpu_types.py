@@ -1,62 +1,59 @@
 #!/usr/bin/env python3
-import json
-import runpod
+import copy
+import gpu_catalog
+import runpod_cli
+
 
 def get_gpu_types():
-    api = runpod.API()
-    response = api.get_gpu_types()
-    resp_json = response.json()
-
-    if response.status_code == 200 and 'errors' not in resp_json:
-        gpu_types = resp_json['data']['gpuTypes']
-        sorted_gpu_types = sorted(gpu_types, key=lambda x: x["memoryInGb"])
-        return sorted_gpu_types
-    else:
+    # Copies, callers are free to modify the returned dicts
+    try:
+        gpu_types = gpu_catalog.get_catalog().get_gpu_types()
+    except gpu_catalog.CatalogError:
         return []
+    return sorted(copy.deepcopy(gpu_types), key=lambda x: x["memoryInGb"])
 
-if __name__ == '__main__':
-    runpod = runpod.API()
-    response = runpod.get_gpu_types()
-    resp_json = response.json()
 
-    if response.status_code == 200:
-        if 'errors' in resp_json:
-            print('ERROR:')
-            for error in resp_json['errors']:
-                print(error['message'])
-        else:
-            gpu_types = resp_json['data']['gpuTypes']
-            sorted_gpu_types = sorted(gpu_types, key=lambda x: x["memoryInGb"])
+def add_arguments(parser):
+    pass
 
-            #print(json.dumps(sorted_gpu_types, indent=4, default=str))
 
-            # Define the column widths
-            widths = [33, 22, 8, 9, 9, 11, 9]
+def main(args):
+    try:
+        sorted_gpu_types = sorted(copy.deepcopy(gpu_catalog.get_catalog().get_gpu_types()), key=lambda x: x["memoryInGb"])
+    except gpu_catalog.CatalogError as e:
+        print('ERROR:')
+        print(e)
+    else:
+        #print(json.dumps(sorted_gpu_types, indent=4, default=str))
 
-            print('ID                               Name                  GPU     GPU Max  Secure   Community  Spot')
-            print('-------------------------------  --------------------  ------  -------  -------  ---------  ------')
+        # Define the column widths
+        widths = [33, 22, 8, 9, 9, 11, 9]
 
-            for pod in sorted_gpu_types:
-                memory = f"{pod['memoryInGb']} GB"
-                row = f"{pod['id']:<{widths[0]}}"
-                row += f"{pod['displayName']:<{widths[1]}}"
-                row += f"{memory:<{widths[2]}}"
-                row += f"{pod['maxGpuCount']:<{widths[3]}}"
+        print('ID                               Name                  GPU     GPU Max  Secure   Community  Spot')
+        print('-------------------------------  --------------------  ------  -------  -------  ---------  ------')
 
-                if not pod['secureCloud']:
-                    pod['securePrice'] = '-'
+        for pod in sorted_gpu_types:
+            memory = f"{pod['memoryInGb']} GB"
+            row = f"{pod['id']:<{widths[0]}}"
+            row += f"{pod['displayName']:<{widths[1]}}"
+            row += f"{memory:<{widths[2]}}"
+            row += f"{pod['maxGpuCount']:<{widths[3]}}"
 
-                if not pod['communityCloud']:
-                    pod['communityPrice'] = '-'
+            if not pod['secureCloud']:
+                pod['securePrice'] = '-'
 
-                row += f"{pod['securePrice']:<{widths[4]}}"
-                row += f"{pod['communityPrice']:<{widths[5]}}"
+            if not pod['communityCloud']:
+                pod['communityPrice'] = '-'
 
-                if pod['lowestPrice']['minimumBidPrice'] is None:
-                    pod['lowestPrice']['minimumBidPrice'] = '-'
+            row += f"{pod['securePrice']:<{widths[4]}}"
+            row += f"{pod['communityPrice']:<{widths[5]}}"
 
-                row += f"{pod['lowestPrice']['minimumBidPrice']:<{widths[6]}}"
-                print(row)
-    else:
-        print(response.status_code)
-        print(json.dumps(resp_json, indent=4, default=str))
+            if pod['lowestPrice']['minimumBidPrice'] is None:
+                pod['lowestPrice']['minimumBidPrice'] = '-'
+
+            row += f"{pod['lowestPrice']['minimumBidPrice']:<{widths[6]}}"
+            print(row)
+
+
+if __name__ == '__main__':
+    runpod_cli.alias('get-gpu-types')
@@ -1,14 +1,10 @@
 #!/usr/bin/env python3
-import argparse
-import json
-import runpod
+import runpod_cli
+import runpod_daemon
+from runpod import pretty, response_json
 
 
-def get_args():
-    parser = argparse.ArgumentParser(
-        description='Get information about a RunPod pod',
-    )
-
+def add_arguments(parser):
     parser.add_argument(
         '--pod_id', '-pod_id', '--pod', '-pod', '--p', '-p',
         type=str,
@@ -16,20 +12,21 @@ def get_args():
         help='pod id (eg. dg31b9aqtupn2z)'
     )
 
-    return parser.parse_args()
 
-
-if __name__ == '__main__':
-    args = get_args()
+def main(args):
     pod_id = args.pod_id
-    runpod = runpod.API()
-    response = runpod.get_pod(pod_id)
-    resp_json = response.json()
+    with runpod_daemon.get_api() as api:
+        response = api.get_pod(pod_id)
+        resp_json = response_json(response)
 
-    if response.status_code == 200:
-        if 'errors' in resp_json:
-            print('ERROR:')
-            for error in resp_json['errors']:
-                print(error['message'])
-        else:
-            print(json.dumps(resp_json, indent=4, default=str))
+        if response.status_code == 200:
+            if 'errors' in resp_json:
+                print('ERROR:')
+                for error in resp_json['errors']:
+                    print(error['message'])
+            else:
+                print(pretty(resp_json))
+
+
+if __name__ == '__main__':
+    runpod_cli.alias('get-pod')
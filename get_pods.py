@@ -1,23 +1,39 @@
 #!/usr/bin/env python3
 import runpod
-import json
+import runpod_cli
+import runpod_daemon
+from runpod import pretty, response_json
 
 
-if __name__ == '__main__':
-    runpod = runpod.API()
-    response = runpod.get_pods()
-    resp_json = response.json()
+def add_arguments(parser):
+    parser.add_argument(
+        '--fields', '-fields', '--f', '-f',
+        type=str,
+        default='full',
+        choices=list(runpod.POD_FIELD_PRESETS),
+        help='field preset to fetch (default: full)'
+    )
+
+
+def main(args):
+    with runpod_daemon.get_api() as api:
+        response = api.get_pods(args.fields)
+        resp_json = response_json(response)
 
-    if response.status_code == 200:
-        if 'errors' in resp_json:
-            print('ERROR:')
-            for error in resp_json['errors']:
-                print(error['message'])
-        elif 'data' in resp_json and 'myself' in resp_json['data'] and resp_json['data']['myself'] is not None:
-            print(json.dumps(resp_json['data']['myself']['pods'], indent=4, default=str))
+        if response.status_code == 200:
+            if 'errors' in resp_json:
+                print('ERROR:')
+                for error in resp_json['errors']:
+                    print(error['message'])
+            elif 'data' in resp_json and 'myself' in resp_json['data'] and resp_json['data']['myself'] is not None:
+                print(pretty(resp_json['data']['myself']['pods']))
+            else:
+                print('ERROR: Unable to get a list of pods')
+                print(pretty(resp_json))
         else:
-            print('ERROR: Unable to get a list of pods')
-            print(json.dumps(resp_json, indent=4, default=str))
-    else:
-        print(response.status_code)
-        print(json.dumps(resp_json, indent=4, default=str))
+            print(response.status_code)
+            print(pretty(resp_json))
+
+
+if __name__ == '__main__':
+    runpod_cli.alias('get-pods')
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+import os
+import threading
+import time
+
+import runpod
+
+# Seconds a fetched catalog is served as fresh
+DEFAULT_TTL = float(os.getenv('RUNPOD_CATALOG_TTL', 300))
+# Seconds past the TTL a stale catalog is still served while it is refreshed in the background
+DEFAULT_MAX_STALE = float(os.getenv('RUNPOD_CATALOG_MAX_STALE', 3600))
+CACHE_FILE = 'gpu_types.json'
+
+
+class CatalogError(Exception):
+    pass
+
+
+class GpuCatalog(object):
+    def __init__(self, api=None, ttl=DEFAULT_TTL, max_stale=DEFAULT_MAX_STALE, cache_file=None):
+        self.api = api
+        # An API created here is closed again by close()
+        self._owns_api = False
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self.cache_file = cache_file or runpod.cache_path(CACHE_FILE)
+        self._lock = threading.Lock()
+        # One fetch at a time, callers that waited for it get its result
+        self._refresh_lock = threading.Lock()
+        self._refreshing = False
+        self._gpu_types = None
+        self._index = {}
+        self._fetched_at = 0
+        self._load()
+
+    # The returned list and dicts are shared, treat them as read-only.
+    # Display paths may be served a stale copy, pass fresh=True when the prices feed a launch.
+    # An API passed in is only used for this call, the catalog never keeps it.
+    def get_gpu_types(self, api=None, fresh=False):
+        age = time.time() - self._fetched_at
+
+        if self._gpu_types is None or age > self.ttl + self.max_stale or (fresh and age > self.ttl):
+            self.refresh(api)
+        elif age > self.ttl:
+            self._refresh_in_background()
+
+        return self._gpu_types
+
+    # Last known catalog without any network call, [] when there is none yet
+    def get_cached_gpu_types(self):
+        return self._gpu_types or []
+
+    @property
+    def fetched_at(self):
+        return self._fetched_at
+
+    def is_fresh(self):
+        return self._gpu_types is not None and time.time() - self._fetched_at <= self.ttl
+
+    def get(self, gpu_id, api=None, fresh=False):
+        self.get_gpu_types(api, fresh)
+        return self._index.get(gpu_id)
+
+    def refresh(self, api=None):
+        fetched_at = self._fetched_at
+        with self._refresh_lock:
+            if self._gpu_types is not None and self._fetched_at != fetched_at:
+                return self._gpu_types
+            return self._fetch(api or self.get_api())
+
+    def _fetch(self, api):
+        response = api.get_gpu_types()
+
+        try:
+            resp_json = runpod.response_json(response)
+        except ValueError:
+            resp_json = {}
+
+        if response.status_code != 200 or 'errors' in resp_json or 'data' not in resp_json:
+            messages = [error['message'] for error in resp_json.get('errors', [])]
+            raise CatalogError('\n'.join(messages) or f'HTTP {response.status_code}')
+
+        # A daemon serves its own copy and says when it was fetched
+        self._set(resp_json['data']['gpuTypes'], resp_json.get('fetchedAt') or time.time())
+        self._save()
+        return self._gpu_types
+
+    def get_api(self):
+        with self._lock:
+            if self.api is None:
+                import runpod_daemon
+                self.api = runpod_daemon.get_api()
+                self._owns_api = True
+            return self.api
+
+    def close(self):
+        with self._lock:
+            api, owns_api = self.api, self._owns_api
+            if owns_api:
+                self.api = None
+                self._owns_api = False
+        if owns_api:
+            api.close()
+
+    # Invalidation hook: the next lookup fetches the catalog again
+    def invalidate(self):
+        with self._lock:
+            self._gpu_types = None
+            self._index = {}
+            self._fetched_at = 0
+        try:
+            os.remove(self.cache_file)
+        except FileNotFoundError:
+            pass
+        self.close()
+
+    def _refresh_in_background(self):
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        def run():
+            try:
+                self.refresh()
+            except Exception as e:
+                # Keep serving the stale copy, the next lookup tries again
+                print(f"Error refreshing GPU catalog: {e}")
+            finally:
+                self._refreshing = False
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def _set(self, gpu_types, fetched_at):
+        index = {gpu['id']: gpu for gpu in gpu_types}
+        with self._lock:
+            self._gpu_types = gpu_types
+            self._index = index
+            self._fetched_at = fetched_at
+
+    def _load(self):
+        try:
+            with open(self.cache_file, 'rb') as f:
+                data = runpod.loads(f.read())
+            self._set(data['gpuTypes'], data['fetchedAt'])
+        except (FileNotFoundError, ValueError, KeyError):
+            pass
+
+    def _save(self):
+        runpod.write_atomic(self.cache_file, runpod.dumps({'fetchedAt': self._fetched_at, 'gpuTypes': self._gpu_types}))
+
+
+_catalog = None
+
+
+# Process wide catalog shared by get_price, get_gpu_types and the GUI. It creates
+# and owns its API, callers that have their own pass it to each lookup instead.
+def get_catalog():
+    global _catalog
+    if _catalog is None:
+        _catalog = GpuCatalog()
+    return _catalog
+
+
+def invalidate():
+    get_catalog().invalidate()
+
+
+if __name__ == '__main__':
+    invalidate()
+    print(f"GPU catalog cache cleared: {get_catalog().cache_file}")
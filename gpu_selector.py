@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# Ranks every GPU type in the catalog by throughput per dollar:
+#
+#     python -m runpod_cli select-gpu --min_memory 24 --max_price 0.8
+#     python create_pod.py -g auto --min_memory 24 --top_k 3
+#
+# Throughput comes from gpu_throughput.json (or RUNPOD_THROUGHPUT_FILE), a map of
+# GPU type id (or display name) to a relative number; put your own measured it/s
+# there. GPU types missing from it are not ranked.
+import os
+
+import gpu_catalog
+import runpod
+import runpod_cli
+from runpod_models import GpuType
+
+current_path = os.path.dirname(os.path.abspath(__file__))
+THROUGHPUT_FILE = os.getenv('RUNPOD_THROUGHPUT_FILE') or os.path.join(current_path, 'gpu_throughput.json')
+
+
+def load_throughput(path=None):
+    # Keys starting with '_' are notes
+    with open(path or THROUGHPUT_FILE, 'rb') as f:
+        table = runpod.loads(f.read())
+    return {key: float(value) for key, value in table.items() if not key.startswith('_')}
+
+
+def gpu_price(gpu, cloud_type='ALL', spot=False):
+    # (cloud type, $/hr per GPU) to rent it with, None when it isn't offered that way
+    if spot:
+        offered = (
+            (cloud_type in ('ALL', 'SECURE') and gpu.secure_cloud) or
+            (cloud_type in ('ALL', 'COMMUNITY') and gpu.community_cloud)
+        )
+        return (cloud_type, gpu.minimum_bid_price) if offered and gpu.minimum_bid_price else None
+
+    offers = []
+    if cloud_type in ('ALL', 'SECURE') and gpu.available_secure_price:
+        offers.append((gpu.available_secure_price, 'SECURE'))
+    if cloud_type in ('ALL', 'COMMUNITY') and gpu.available_community_price:
+        offers.append((gpu.available_community_price, 'COMMUNITY'))
+    if not offers:
+        return None
+    price, cloud_type = min(offers)
+    return cloud_type, price
+
+
+def rank_gpus(gpu_types, throughput, min_memory=0, max_price=None, cloud_type='ALL', spot=False):
+    # [{'gpu': GpuType, 'cloud_type': ..., 'price': ..., 'throughput': ..., 'score': ...}], best first
+    choices = []
+    for gpu in gpu_types:
+        value = throughput.get(gpu.id, throughput.get(gpu.display_name))
+        if value is None or (gpu.memory_in_gb or 0) < min_memory:
+            continue
+        offer = gpu_price(gpu, cloud_type, spot)
+        if offer is None or (max_price is not None and offer[1] > max_price):
+            continue
+        choices.append({
+            'gpu': gpu,
+            'cloud_type': offer[0],
+            'price': offer[1],
+            'throughput': value,
+            'score': value / offer[1],
+        })
+    # Cheaper first on equal scores
+    choices.sort(key=lambda choice: (-choice['score'], choice['price']))
+    return choices
+
+
+# Pass fresh=True when the choice is launched, the listing may rank a stale catalog
+def select_gpus(top_k=3, throughput_file=None, api=None, fresh=False, **constraints):
+    gpu_types = GpuType.from_list(gpu_catalog.get_catalog().get_gpu_types(api, fresh))
+    return rank_gpus(gpu_types, load_throughput(throughput_file), **constraints)[:top_k]
+
+
+def add_arguments(parser):
+    parser.add_argument(
+        '--min_memory', '-min_memory', '--mm', '-mm',
+        type=int,
+        default=0,
+        help='minimum GPU memory in GB'
+    )
+
+    parser.add_argument(
+        '--max_price', '-max_price', '--mp', '-mp',
+        type=float,
+        help='maximum price in $/hr per GPU'
+    )
+
+    parser.add_argument(
+        '--cloud_type', '-cloud_type', '--ct', '-ct',
+        choices=['ALL', 'SECURE', 'COMMUNITY'],
+        default='ALL',
+        help='cloud to price on demand GPUs on (default: ALL, the cheaper one)'
+    )
+
+    parser.add_argument(
+        '--spot', '-spot', '--s', '-s',
+        action='store_true',
+        help='rank by the spot bid price'
+    )
+
+    parser.add_argument(
+        '--top_k', '-top_k', '--k', '-k',
+        type=int,
+        default=10,
+        help='number of GPU types to list (default: 10)'
+    )
+
+    parser.add_argument(
+        '--throughput_file', '-throughput_file', '--tf', '-tf',
+        type=str,
+        help=f'JSON map of GPU type id to relative throughput (default: {THROUGHPUT_FILE})'
+    )
+
+
+def main(args):
+    try:
+        choices = select_gpus(
+            args.top_k, args.throughput_file,
+            min_memory=args.min_memory,
+            max_price=args.max_price,
+            cloud_type=args.cloud_type,
+            spot=args.spot
+        )
+    except (gpu_catalog.CatalogError, OSError, ValueError) as e:
+        print('ERROR:')
+        print(e)
+        return 1
+
+    if not choices:
+        print('No GPU type matches the constraints')
+        return 1
+
+    print('#   ID                               Memory  Cloud      $/hr    Throughput  Per $')
+    print('--  -------------------------------  ------  ---------  ------  ----------  ------')
+    for rank, choice in enumerate(choices, 1):
+        memory = f"{choice['gpu'].memory_in_gb} GB"
+        print(
+            f"{rank:<4}{choice['gpu'].id:<33}{memory:<8}{choice['cloud_type']:<11}"
+            f"{choice['price']:<8.3f}{choice['throughput']:<12.1f}{choice['score']:.1f}"
+        )
+
+
+if __name__ == '__main__':
+    runpod_cli.alias('select-gpu')
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+# Hedged pod placement. Candidates are placements in order of preference, each
+# a cloud type, a set of countries and a minimum download speed:
+#
+#     python -m runpod_cli place-pod -g 4090 --cloud_types SECURE,COMMUNITY \
+#         --country_sets "SE,NL;CA;" --min_downloads 600,200
+#
+# The first candidate is tried right away and every `stagger` seconds (or as
+# soon as a candidate fails for good) the next one joins in. Each candidate
+# retries capacity errors on its own. The first pod created wins, the other
+# candidates stop at their next retry, and a pod that was already being created
+# when the race was won is terminated as soon as it comes back.
+import asyncio
+import sys
+import time
+
+import create_pod
+import gpu_catalog
+import runpod
+import runpod_cli
+from runpod import CAPACITY, classify_exception, classify_response, pretty, response_json
+from runpod_models import GpuType, ResponseError, response_data
+
+
+# GpuType flag saying whether the GPU is offered on a cloud
+CLOUD_FLAGS = {'SECURE': 'secure_cloud', 'COMMUNITY': 'community_cloud'}
+
+
+def is_offered(gpu, cloud_type):
+    return cloud_type not in CLOUD_FLAGS or bool(getattr(gpu, CLOUD_FLAGS[cloud_type]))
+
+
+def get_candidates(cloud_types, country_sets, min_downloads):
+    # Every country set and download floor of the first cloud type come first
+    return [
+        {'cloudType': cloud_type, 'countryCode': country_code, 'minDownload': min_download}
+        for cloud_type in cloud_types
+        for country_code in country_sets
+        for min_download in min_downloads
+    ]
+
+
+def with_gpu_choices(candidates, choices, spot=False, keep_cloud_type=False):
+    # Candidates for each GPU type picked by gpu_selector, best GPU first. With
+    # keep_cloud_type the candidates on the GPU's cheaper cloud go first and those
+    # on a cloud that doesn't offer the GPU are left out.
+    expanded = []
+    for choice in choices:
+        if keep_cloud_type:
+            candidates = sorted(candidates, key=lambda candidate: candidate['cloudType'] != choice['cloud_type'])
+        for candidate in candidates:
+            if keep_cloud_type and not is_offered(choice['gpu'], candidate['cloudType']):
+                continue
+            candidate = dict(candidate, gpuTypeId=choice['gpu'].id)
+            if spot:
+                candidate['bidPerGpu'] = choice['price']
+            elif not keep_cloud_type:
+                candidate['cloudType'] = choice['cloud_type']
+            expanded.append(candidate)
+    return expanded
+
+
+def describe(candidate):
+    placement = f"{candidate['cloudType']}/{candidate['countryCode'] or 'any country'}/{candidate['minDownload']} Mbps"
+    return f"{candidate['gpuTypeId']} {placement}" if 'gpuTypeId' in candidate else placement
+
+
+# Returns {'pod': pod dict or None, 'candidate': the winning candidate, 'seconds': to the winner,
+# 'terminated': ids of extra winners, 'errors': {candidate index: message}}.
+# on_event(event, index, candidate, detail) reports 'start', 'retry', 'failed', 'won' and 'extra'.
+async def place_pod_async(pod_config, candidates, spot=False, stagger=2.0, deadline=600, on_event=None, **api_options):
+    start = time.monotonic()
+    stop_at = start + deadline
+    key = 'podRentInterruptable' if spot else 'podFindAndDeployOnDemand'
+    won = asyncio.Event()
+    # Set when an attempt ends, so the next candidate does not wait for its turn
+    advance = asyncio.Event()
+    result = {'pod': None, 'candidate': None, 'seconds': None, 'terminated': [], 'errors': {}}
+
+    def event(name, index, detail=None):
+        if on_event is not None:
+            on_event(name, index, candidates[index], detail)
+
+    async def create(api, config):
+        # (pod or None, error class, message)
+        try:
+            response = await (api.create_spot_pod(config) if spot else api.create_on_demand_pod(config))
+        except runpod.httpx.HTTPError as e:
+            return None, classify_exception(e, True), str(e) or type(e).__name__
+        try:
+            resp_json = response_json(response)
+        except ValueError:
+            resp_json = {}
+        pod = (resp_json.get('data') or {}).get(key)
+        if response.status_code == 200 and pod and not resp_json.get('errors'):
+            return pod, None, None
+        messages = [error.get('message', '') for error in resp_json.get('errors') or []]
+        return None, classify_response(response, True), '\n'.join(messages) or f'HTTP {response.status_code}'
+
+    async def attempt(api, index):
+        config = dict(pod_config, **candidates[index])
+        policy = api.retry_policies[CAPACITY]
+        retries = 0
+        event('start', index)
+
+        while True:
+            pod, error_class, message = await create(api, config)
+            if pod is not None:
+                if won.is_set():
+                    # Lost the race while the request was in flight
+                    event('extra', index, pod['id'])
+                    try:
+                        response_data(await api.terminate_pod(pod['id']))
+                        result['terminated'].append(pod['id'])
+                    except (ResponseError, runpod.httpx.HTTPError) as e:
+                        result['errors'][index] = f"Extra pod {pod['id']} could not be terminated: {e}"
+                else:
+                    won.set()
+                    result.update(pod=pod, candidate=candidates[index], seconds=time.monotonic() - start)
+                    event('won', index, pod)
+                break
+
+            if won.is_set():
+                break
+            delay = policy.delay(retries)
+            if error_class != CAPACITY or time.monotonic() + delay > stop_at:
+                result['errors'][index] = message
+                event('failed', index, message)
+                break
+
+            event('retry', index, delay)
+            try:
+                # Woken early when another candidate wins
+                await asyncio.wait_for(won.wait(), delay)
+                break
+            except asyncio.TimeoutError:
+                retries += 1
+        advance.set()
+
+    # The API's own retries stop at the deadline as well
+    async with runpod.AsyncAPI(deadline=stop_at, **api_options) as api:
+        tasks = []
+        for index in range(len(candidates)):
+            if won.is_set() or time.monotonic() >= stop_at:
+                break
+            advance.clear()
+            tasks.append(asyncio.ensure_future(attempt(api, index)))
+            if index + 1 < len(candidates):
+                try:
+                    await asyncio.wait_for(advance.wait(), stagger)
+                except asyncio.TimeoutError:
+                    pass
+        await asyncio.gather(*tasks)
+    return result
+
+
+# Blocking place_pod_async for scripts and worker threads
+def place_pod(pod_config, candidates, **options):
+    return asyncio.run(place_pod_async(pod_config, candidates, **options))
+
+
+def add_arguments(parser):
+    create_pod.add_arguments(parser)
+    parser.add_argument('-cts', '--cloud_types', help='comma separated cloud types to try in order (default: --cloud_type, both clouds, cheaper first, for ALL)')
+    parser.add_argument('-ccs', '--country_sets', help='country sets to try in order, separated by ";", an empty set means any country (default: --country_code)')
+    parser.add_argument('-mds', '--min_downloads', help='comma separated minimum download speeds to try in order (default: --min_download)')
+    parser.add_argument('-st', '--stagger', type=float, default=2.0, help='seconds before the next candidate joins in (default: 2)')
+
+
+def print_event(event, index, candidate, detail):
+    # Progress goes to stderr, stdout only gets the pod
+    if event == 'start':
+        print(f'[{index + 1}] trying {describe(candidate)}', file=sys.stderr, flush=True)
+    elif event == 'retry':
+        print(f'[{index + 1}] no resources on {describe(candidate)}, retrying in {detail:.0f} seconds', file=sys.stderr, flush=True)
+    elif event == 'failed':
+        print(f'[{index + 1}] gave up on {describe(candidate)}: {detail}', file=sys.stderr, flush=True)
+    elif event == 'won':
+        print(f"[{index + 1}] pod {detail['id']} created on {describe(candidate)}", file=sys.stderr, flush=True)
+    elif event == 'extra':
+        print(f'[{index + 1}] terminating extra pod {detail}', file=sys.stderr, flush=True)
+
+
+def main(args):
+    cloud_type = args.cloud_type
+    with create_pod.get_api(args) as api:
+        error = create_pod.prepare(args, api)
+    if error is not None:
+        print(error)
+        return 1
+
+    if args.cloud_types:
+        cloud_types = args.cloud_types.split(',')
+    elif cloud_type == 'ALL' and not args.spot:
+        # prepare() picked the cheaper cloud for ALL, the other one is tried as well when it
+        # offers the GPU type. With -g auto with_gpu_choices checks each chosen type.
+        cloud_types = [args.cloud_type] + [other for other in CLOUD_FLAGS if other != args.cloud_type]
+        if not args.gpu_choices:
+            gpu = GpuType.from_dict(gpu_catalog.get_catalog().get(args.gpu_type_id) or {})
+            cloud_types = [cloud_type for cloud_type in cloud_types if is_offered(gpu, cloud_type)]
+    else:
+        cloud_types = [args.cloud_type]
+    country_sets = args.country_sets.split(';') if args.country_sets is not None else [args.country_code]
+    min_downloads = [int(value) for value in args.min_downloads.split(',')] if args.min_downloads else [args.min_download]
+    candidates = get_candidates(cloud_types, country_sets, min_downloads)
+    if args.gpu_choices:
+        candidates = with_gpu_choices(candidates, args.gpu_choices, args.spot, keep_cloud_type=len(cloud_types) > 1)
+
+    result = place_pod(
+        create_pod.get_pod_config(args), candidates,
+        spot=args.spot,
+        stagger=args.stagger,
+        deadline=args.deadline,
+        on_event=print_event
+    )
+
+    if result['pod'] is None:
+        print('ERROR: No candidate had resources available')
+        for index, message in sorted(result['errors'].items()):
+            print(f'{describe(candidates[index])}: {message}')
+        return 1
+
+    for index, message in sorted(result['errors'].items()):
+        if message.startswith('Extra pod'):
+            print(f'ERROR: {message}', file=sys.stderr)
+    print(pretty(result['pod']))
+    print(f"Placed on {describe(result['candidate'])} in {result['seconds']:.1f} s", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    runpod_cli.alias('place-pod')
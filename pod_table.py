@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+# Model/view pod list for the GUI. The table only creates what is on screen, so
+# it stays responsive with thousands of pods, and a refresh only emits
+# dataChanged for the cells that actually changed.
+from PyQt5.QtCore import Qt, QAbstractTableModel, QEvent, QModelIndex, QRect, QSortFilterProxyModel, pyqtSignal
+from PyQt5.QtGui import QColor
+from PyQt5.QtWidgets import QApplication, QStyle, QStyledItemDelegate, QStyleOptionButton
+
+# Raw values for sorting, the pod model object and whether an action is running on the row
+SORT_ROLE = Qt.UserRole
+POD_ROLE = Qt.UserRole + 1
+PENDING_ROLE = Qt.UserRole + 2
+
+STATUS_COLORS = {
+    'RUNNING': QColor('#8fe4bd'),
+    'EXITED': QColor('#c9d0ed'),
+}
+
+# The fields the GUI asks get_pods for: the status preset plus GPU utilisation
+POD_TABLE_FIELDS = [
+    'id', 'name', 'imageName', 'desiredStatus', 'podType', 'costPerHr', 'lowestBidPriceToResume',
+    {'runtime': ['uptimeInSeconds', {'gpus': ['id', 'gpuUtilPercent']}]},
+]
+
+
+def uptime(pod):
+    runtime = pod.runtime
+    return runtime.uptime_in_seconds if runtime is not None and runtime.uptime_in_seconds is not None else 0
+
+
+def gpu_util(pod):
+    # Average over the pod's GPUs, -1 while it has no runtime
+    gpus = pod.runtime.gpus if pod.runtime is not None else None
+    values = [gpu.gpu_util_percent for gpu in gpus or [] if gpu.gpu_util_percent is not None]
+    return sum(values) / len(values) if values else -1
+
+
+def format_uptime(seconds):
+    if not seconds:
+        return '-'
+    hours, rest = divmod(int(seconds), 3600)
+    return f'{hours}h {rest // 60:02d}m'
+
+
+# (header, sort value, display text)
+COLUMNS = [
+    ('名称', lambda pod: pod.name or '', None),
+    ('ID', lambda pod: pod.id, None),
+    ('状态', lambda pod: pod.desired_status or '', None),
+    ('类型', lambda pod: pod.pod_type or '', None),
+    ('价格/小时', lambda pod: pod.cost_per_hr or 0, None),
+    ('运行时间', uptime, format_uptime),
+    ('GPU 使用率', gpu_util, lambda value: '-' if value < 0 else f'{value:.0f}%'),
+    ('镜像', lambda pod: pod.image_name or '', None),
+    ('操作', lambda pod: '', None),
+]
+STATUS_COLUMN = 2
+ACTION_COLUMN = len(COLUMNS) - 1
+
+
+class PodTableModel(QAbstractTableModel):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.pods = []
+        # Per row tuple of the sort values, used to find the cells that changed
+        self.values = []
+        self.rows = {}
+        self.pending = set()
+        self.pods_hash = None
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.pods)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return COLUMNS[section][0]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        pod = self.pods[index.row()]
+        column = index.column()
+
+        if role == Qt.DisplayRole:
+            value = self.values[index.row()][column]
+            display = COLUMNS[column][2]
+            return display(value) if display is not None else str(value)
+        if role == SORT_ROLE:
+            return self.values[index.row()][column]
+        if role == Qt.BackgroundRole:
+            return STATUS_COLORS.get(pod.desired_status)
+        if role == POD_ROLE:
+            return pod
+        if role == PENDING_ROLE:
+            return pod.id in self.pending
+        return None
+
+    def pod_values(self, pod):
+        return tuple(sort_value(pod) for _, sort_value, _ in COLUMNS)
+
+    def set_pods(self, pods):
+        # Nothing to do when the list is unchanged
+        values = [self.pod_values(pod) for pod in pods]
+        pods_hash = hash(tuple(values))
+        if pods_hash == self.pods_hash:
+            return
+        self.pods_hash = pods_hash
+        new = {pod.id: (pod, pod_values) for pod, pod_values in zip(pods, values)}
+
+        # Remove rows that are gone, bottom up in contiguous blocks
+        gone = [row for row, pod in enumerate(self.pods) if pod.id not in new]
+        while gone:
+            last = gone.pop()
+            first = last
+            while gone and gone[-1] == first - 1:
+                first = gone.pop()
+            self.beginRemoveRows(QModelIndex(), first, last)
+            del self.pods[first:last + 1]
+            del self.values[first:last + 1]
+            self.endRemoveRows()
+
+        # Update rows in place, only signalling the cells that changed
+        for row, pod in enumerate(self.pods):
+            self.update_row(row, *new.pop(pod.id))
+        self.rows = {pod.id: row for row, pod in enumerate(self.pods)}
+
+        if new:
+            first = len(self.pods)
+            self.beginInsertRows(QModelIndex(), first, first + len(new) - 1)
+            for pod, pod_values in new.values():
+                self.rows[pod.id] = len(self.pods)
+                self.pods.append(pod)
+                self.values.append(pod_values)
+            self.endInsertRows()
+
+    def update_row(self, row, pod, pod_values):
+        old_values = self.values[row]
+        status_changed = pod.desired_status != self.pods[row].desired_status
+        self.pods[row] = pod
+        self.values[row] = pod_values
+
+        if status_changed:
+            # The background colour of the whole row changes with the status
+            self.dataChanged.emit(self.index(row, 0), self.index(row, ACTION_COLUMN))
+            return
+        changed = [column for column, (old, value) in enumerate(zip(old_values, pod_values)) if old != value]
+        if changed:
+            self.dataChanged.emit(self.index(row, changed[0]), self.index(row, changed[-1]))
+
+    def add_pod(self, pod):
+        # A pod created from the GUI, shown right away without waiting for a refresh
+        self.pods_hash = None
+        row = self.rows.get(pod.id)
+        if row is not None:
+            self.update_row(row, pod, self.pod_values(pod))
+            return
+        row = len(self.pods)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self.rows[pod.id] = row
+        self.pods.append(pod)
+        self.values.append(self.pod_values(pod))
+        self.endInsertRows()
+
+    def set_status(self, pod_id, status):
+        # Set after a start/stop succeeded, the next refresh confirms it
+        row = self.rows.get(pod_id)
+        if row is None:
+            return
+        self.pods_hash = None
+        self.pending.discard(pod_id)
+        pod = self.pods[row]
+        pod.desired_status = status
+        self.update_row(row, pod, self.pod_values(pod))
+        # update_row compares against the already changed pod, repaint the row explicitly
+        self.dataChanged.emit(self.index(row, 0), self.index(row, ACTION_COLUMN))
+
+    def set_pending(self, pod_id, pending):
+        if pending:
+            self.pending.add(pod_id)
+        else:
+            self.pending.discard(pod_id)
+        row = self.rows.get(pod_id)
+        if row is not None:
+            index = self.index(row, ACTION_COLUMN)
+            self.dataChanged.emit(index, index, [PENDING_ROLE])
+
+
+class PodFilterProxyModel(QSortFilterProxyModel):
+    # Sorts on the raw values and filters on any column containing the text
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setSortRole(SORT_ROLE)
+        self.setFilterCaseSensitivity(Qt.CaseInsensitive)
+        self.setFilterKeyColumn(-1)
+        self.setDynamicSortFilter(True)
+
+
+class PodActionDelegate(QStyledItemDelegate):
+    # Paints start/stop and terminate buttons in the action column and turns
+    # clicks on them into actionTriggered('start' | 'stop' | 'terminate', pod)
+    actionTriggered = pyqtSignal(str, object)
+
+    def button_rects(self, rect):
+        margin = 3
+        width = (rect.width() - margin * 3) // 2
+        height = rect.height() - margin * 2
+        first = QRect(rect.left() + margin, rect.top() + margin, width, height)
+        second = QRect(first.right() + margin + 1, rect.top() + margin, width, height)
+        return first, second
+
+    def buttons(self, pod):
+        # (action, label) for each button, None where the status has no action
+        toggle = {'RUNNING': ('stop', '停止'), 'EXITED': ('start', '开始')}.get(pod.desired_status)
+        return toggle, ('terminate', '删除')
+
+    def paint(self, painter, option, index):
+        pod = index.data(POD_ROLE)
+        pending = index.data(PENDING_ROLE)
+        style = option.widget.style() if option.widget is not None else QApplication.style()
+
+        for rect, button in zip(self.button_rects(option.rect), self.buttons(pod)):
+            if button is None:
+                continue
+            button_option = QStyleOptionButton()
+            button_option.rect = rect
+            button_option.text = button[1]
+            button_option.state = QStyle.State_Raised | (QStyle.State_None if pending else QStyle.State_Enabled)
+            style.drawControl(QStyle.CE_PushButton, button_option, painter, option.widget)
+
+    def editorEvent(self, event, model, option, index):
+        if event.type() != QEvent.MouseButtonRelease or index.data(PENDING_ROLE):
+            return False
+
+        pod = index.data(POD_ROLE)
+        for rect, button in zip(self.button_rects(option.rect), self.buttons(pod)):
+            if button is not None and rect.contains(event.pos()):
+                self.actionTriggered.emit(button[0], pod)
+                return True
+        return False
@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+# GPU price history. `record` samples the catalog every --interval seconds and
+# appends one fixed width row per GPU type to a columnar store, `stats` reads it
+# back:
+#
+#     python -m runpod_cli price-recorder record --interval 300
+#     python -m runpod_cli price-recorder stats --gpu_type_id 4090 --days 30 --price bid
+#
+# The store is a directory (default price_history in RUNPOD_CACHE_DIR) with one
+# little endian file per column: time, gpu, secure, community, bid and flags,
+# 23 bytes a row. The time column is written last, so its length is the number
+# of complete rows. gpu_<n>.rows holds the row numbers of GPU n in time order;
+# together with the sorted time column a time range of one GPU is found with two
+# binary searches. Columns are memory-mapped, so queries only touch the pages of
+# the rows they return and come back as NumPy arrays.
+import os
+import time
+
+import numpy as np
+
+import gpu_catalog
+import runpod
+import runpod_cli
+
+COLUMNS = {
+    'time': np.dtype('<f8'),
+    'gpu': np.dtype('<u2'),
+    'secure': np.dtype('<f4'),
+    'community': np.dtype('<f4'),
+    'bid': np.dtype('<f4'),
+    'flags': np.dtype('u1'),
+}
+ROWS_DTYPE = np.dtype('<i8')
+
+# Availability flags, one per price column
+SECURE = 1
+COMMUNITY = 2
+BID = 4
+PRICE_FLAGS = {'secure': SECURE, 'community': COMMUNITY, 'bid': BID}
+
+
+def default_path():
+    return os.getenv('RUNPOD_PRICE_HISTORY') or runpod.cache_path('price_history')
+
+
+def gpu_row(gpu):
+    # (secure, community, bid, flags) of a catalog entry, NaN where there is no price
+    bid = (gpu.get('lowestPrice') or {}).get('minimumBidPrice')
+    flags = (SECURE if gpu.get('secureCloud') else 0) | (COMMUNITY if gpu.get('communityCloud') else 0) | (BID if bid else 0)
+    prices = [gpu.get('securePrice'), gpu.get('communityPrice'), bid]
+    return [np.nan if price is None else price for price in prices] + [flags]
+
+
+class PriceHistory(object):
+    def __init__(self, path=None):
+        self.path = path or default_path()
+        os.makedirs(self.path, exist_ok=True)
+        self.gpu_ids = []
+        self._gpu_index = {}
+        self._maps = {}
+        self._mapped_rows = 0
+        self._recovered = False
+        self._load_gpu_ids()
+
+    def __len__(self):
+        return os.path.getsize(self._file('time')) // COLUMNS['time'].itemsize if os.path.exists(self._file('time')) else 0
+
+    def record(self, gpu_types, timestamp=None):
+        # Appends one row per GPU type, returns the number of rows written
+        if not gpu_types:
+            return 0
+        with open(os.path.join(self.path, 'lock'), 'a+b') as lock:
+            runpod.lock_file(lock)
+            try:
+                self._load_gpu_ids()
+                if not self._recovered:
+                    self._recover()
+                    self._recovered = True
+                return self._append(gpu_types, timestamp)
+            finally:
+                runpod.unlock_file(lock)
+
+    def column(self, name):
+        # Memory-mapped column, remapped when rows were added since the last call
+        rows = len(self)
+        if rows != self._mapped_rows:
+            self._maps = {}
+            self._mapped_rows = rows
+        if name not in self._maps:
+            if rows == 0:
+                self._maps[name] = np.empty(0, COLUMNS[name])
+            else:
+                self._maps[name] = np.memmap(self._file(name), COLUMNS[name], 'r', shape=(rows,))
+        return self._maps[name]
+
+    def rows(self, gpu_id, start=None, end=None):
+        # Row numbers of a GPU type with start <= time <= end, in time order
+        self._load_gpu_ids()
+        index = self._gpu_index.get(gpu_id)
+        path = self._rows_file(index) if index is not None else None
+        if path is None or not os.path.getsize(path):
+            return np.empty(0, ROWS_DTYPE)
+
+        times = self.column('time')
+        first = 0 if start is None else np.searchsorted(times, start, 'left')
+        last = len(times) if end is None else np.searchsorted(times, end, 'right')
+        gpu_rows = np.memmap(path, ROWS_DTYPE, 'r', shape=(os.path.getsize(path) // ROWS_DTYPE.itemsize,))
+        return np.array(gpu_rows[np.searchsorted(gpu_rows, first):np.searchsorted(gpu_rows, last)])
+
+    def samples(self, gpu_id, start=None, end=None, available=True):
+        # {column: array} for a GPU type, prices are NaN where it wasn't offered when available is set
+        rows = self.rows(gpu_id, start, end)
+        result = {name: self.column(name)[rows] for name in COLUMNS if name != 'gpu'}
+        if available:
+            for name, flag in PRICE_FLAGS.items():
+                result[name][(result['flags'] & flag) == 0] = np.nan
+        return result
+
+    def prices(self, gpu_id, price='bid', start=None, end=None):
+        # (times, prices) with the samples that had no price left out
+        data = self.samples(gpu_id, start, end)
+        valid = ~np.isnan(data[price])
+        return data['time'][valid], data[price][valid]
+
+    def percentile(self, gpu_id, q, price='bid', start=None, end=None):
+        _, values = self.prices(gpu_id, price, start, end)
+        return np.percentile(values, q) if values.size else None
+
+    def minimum(self, gpu_id, price='bid', start=None, end=None):
+        _, values = self.prices(gpu_id, price, start, end)
+        return values.min() if values.size else None
+
+    def rolling_mean(self, gpu_id, window, price='bid', start=None, end=None):
+        # (times, mean of the prices in the `window` seconds up to each time)
+        times, values = self.prices(gpu_id, price, start, end)
+        sums = np.concatenate(([0], np.cumsum(values, dtype=np.float64)))
+        first = np.searchsorted(times, times - window, 'right')
+        counts = np.arange(1, len(times) + 1) - first
+        return times, (sums[1:] - sums[first]) / counts
+
+    def _append(self, gpu_types, timestamp):
+        first_row = len(self)
+        times = self.column('time')
+        # Times only go forward, the range scans rely on it
+        timestamp = time.time() if timestamp is None else timestamp
+        if len(times):
+            timestamp = max(timestamp, float(times[-1]))
+
+        new_ids = [gpu['id'] for gpu in gpu_types if gpu['id'] not in self._gpu_index]
+        if new_ids:
+            self._save_gpu_ids(self.gpu_ids + list(dict.fromkeys(new_ids)))
+
+        gpus = np.array([self._gpu_index[gpu['id']] for gpu in gpu_types], COLUMNS['gpu'])
+        values = np.array([gpu_row(gpu) for gpu in gpu_types], np.float64)
+        data = {
+            'gpu': gpus,
+            'secure': values[:, 0],
+            'community': values[:, 1],
+            'bid': values[:, 2],
+            'flags': values[:, 3],
+            'time': np.full(len(gpu_types), timestamp),
+        }
+        # The time column commits the rows, so it goes last
+        for name in ('gpu', 'secure', 'community', 'bid', 'flags', 'time'):
+            with open(self._file(name), 'ab') as f:
+                f.write(data[name].astype(COLUMNS[name]).tobytes())
+        for offset, index in enumerate(gpus.tolist()):
+            with open(self._rows_file(index), 'ab') as f:
+                f.write(np.array([first_row + offset], ROWS_DTYPE).tobytes())
+        return len(gpu_types)
+
+    def _recover(self):
+        # Drops what an interrupted append left behind and indexes committed rows it missed
+        rows = len(self)
+        for name, dtype in COLUMNS.items():
+            path = self._file(name)
+            if os.path.exists(path) and os.path.getsize(path) > rows * dtype.itemsize:
+                os.truncate(path, rows * dtype.itemsize)
+
+        last_rows = {}
+        for index in range(len(self.gpu_ids)):
+            path = self._rows_file(index)
+            size = os.path.getsize(path) if os.path.exists(path) else 0
+            if size % ROWS_DTYPE.itemsize:
+                size -= size % ROWS_DTYPE.itemsize
+                os.truncate(path, size)
+            last_rows[index] = int(np.fromfile(path, ROWS_DTYPE, offset=size - ROWS_DTYPE.itemsize)[0]) if size else -1
+
+        first = min(last_rows.values(), default=-1) + 1
+        if first >= rows:
+            return
+        gpus = self.column('gpu')
+        for row in range(first, rows):
+            index = int(gpus[row])
+            if row > last_rows.get(index, -1):
+                with open(self._rows_file(index), 'ab') as f:
+                    f.write(np.array([row], ROWS_DTYPE).tobytes())
+                last_rows[index] = row
+
+    def _file(self, name):
+        return os.path.join(self.path, name)
+
+    def _rows_file(self, index):
+        return os.path.join(self.path, f'gpu_{index}.rows')
+
+    def _load_gpu_ids(self):
+        try:
+            with open(os.path.join(self.path, 'gpus.json'), 'rb') as f:
+                gpu_ids = runpod.loads(f.read())
+        except (FileNotFoundError, ValueError):
+            gpu_ids = []
+        if len(gpu_ids) != len(self.gpu_ids):
+            self.gpu_ids = gpu_ids
+            self._gpu_index = {gpu_id: index for index, gpu_id in enumerate(gpu_ids)}
+
+    def _save_gpu_ids(self, gpu_ids):
+        # Written before any row refers to the new ids
+        runpod.write_atomic(os.path.join(self.path, 'gpus.json'), runpod.dumps(gpu_ids))
+        self.gpu_ids = gpu_ids
+        self._gpu_index = {gpu_id: index for index, gpu_id in enumerate(gpu_ids)}
+
+
+def add_arguments(parser):
+    parser.add_argument(
+        'action',
+        choices=['record', 'stats'],
+        help='record samples the catalog on a schedule, stats summarises the recorded prices'
+    )
+
+    parser.add_argument(
+        '--store', '-store',
+        type=str,
+        help='price history directory (default: RUNPOD_PRICE_HISTORY, or price_history in RUNPOD_CACHE_DIR)'
+    )
+
+    parser.add_argument(
+        '--interval', '-interval', '--i', '-i',
+        type=float,
+        default=300,
+        help='record: seconds between samples (default: 300)'
+    )
+
+    parser.add_argument(
+        '--count', '-count', '--c', '-c',
+        type=int,
+        default=0,
+        help='record: stop after this many samples (default: run until interrupted)'
+    )
+
+    parser.add_argument(
+        '--gpu_type_id', '-gpu_type_id', '--gpu', '-gpu', '--g', '-g',
+        type=str,
+        help='stats: comma separated GPU type ids or parts of them, e.g. 4090,A5000 (default: all)'
+    )
+
+    parser.add_argument(
+        '--price', '-price', '--p', '-p',
+        choices=list(PRICE_FLAGS),
+        default='bid',
+        help='stats: price to summarise (default: bid)'
+    )
+
+    parser.add_argument(
+        '--days', '-days', '--d', '-d',
+        type=float,
+        default=30,
+        help='stats: days of history to use (default: 30)'
+    )
+
+    parser.add_argument(
+        '--window', '-window', '--w', '-w',
+        type=float,
+        default=24,
+        help='stats: hours in the rolling mean (default: 24)'
+    )
+
+
+def record(history, interval, count):
+    # One in-process API, and with it one warm connection, for every sample. Not the
+    # daemon: it would hand out its cached catalog instead of fetching a new one.
+    catalog = gpu_catalog.get_catalog()
+    recorded = 0
+    last_fetched_at = None
+    next_sample = time.monotonic()
+    with runpod.API() as api:
+        while True:
+            try:
+                # Always fetched, the shared catalog cache gets the new copy as well
+                gpu_types = catalog.refresh(api)
+                if catalog.fetched_at == last_fetched_at:
+                    print(f"{time.strftime('%Y-%m-%d %H:%M:%S')} catalog unchanged since the last sample, skipped", flush=True)
+                else:
+                    # Stamped with the time the prices were fetched, not when they were written
+                    rows = history.record(gpu_types, catalog.fetched_at)
+                    last_fetched_at = catalog.fetched_at
+                    print(f"{time.strftime('%Y-%m-%d %H:%M:%S')} recorded {rows} GPU types, {len(history)} rows in total", flush=True)
+            except Exception as e:
+                # A failed sample is skipped, the next one is taken on schedule
+                print('ERROR:')
+                print(e, flush=True)
+            recorded += 1
+            if count and recorded >= count:
+                return
+            next_sample += interval
+            time.sleep(max(0, next_sample - time.monotonic()))
+
+
+def format_price(value):
+    return '-' if value is None else f'{value:.3f}'
+
+
+def print_stats(history, gpu_ids, price, days, window):
+    end = time.time()
+    start = end - days * 86400
+    print(f'{price} price over the last {days:g} days, rolling mean over {window:g} hours')
+    print('ID                               Samples  Min     P10     P50     P90     Latest  Mean')
+    print('-------------------------------  -------  ------  ------  ------  ------  ------  ------')
+    for gpu_id in gpu_ids:
+        # The window before the range is read too, so the first means are complete
+        times, means = history.rolling_mean(gpu_id, window * 3600, price, start - window * 3600, end)
+        in_range = times >= start
+        _, values = history.prices(gpu_id, price, start, end)
+        if not values.size:
+            continue
+        p10, p50, p90 = np.percentile(values, [10, 50, 90])
+        print(
+            f'{gpu_id:<33}{values.size:<9}{format_price(values.min()):<8}{format_price(p10):<8}'
+            f'{format_price(p50):<8}{format_price(p90):<8}{format_price(values[-1]):<8}'
+            f'{format_price(means[in_range][-1])}'
+        )
+
+
+def main(args):
+    history = PriceHistory(args.store)
+
+    if args.action == 'record':
+        try:
+            record(history, args.interval, args.count)
+        except KeyboardInterrupt:
+            pass
+        return 0
+
+    if not len(history):
+        print(f'No prices recorded in {history.path} yet, run price-recorder record first')
+        return 1
+    gpu_ids = history.gpu_ids
+    if args.gpu_type_id:
+        patterns = [pattern.strip().lower() for pattern in args.gpu_type_id.split(',') if pattern.strip()]
+        gpu_ids = [gpu_id for gpu_id in gpu_ids if any(pattern in gpu_id.lower() for pattern in patterns)]
+    if not gpu_ids:
+        print(f'ERROR: No recorded GPU type matches {args.gpu_type_id}')
+        return 1
+    print_stats(history, gpu_ids, args.price, args.days, args.window)
+    return 0
+
+
+if __name__ == '__main__':
+    runpod_cli.alias('price-recorder')
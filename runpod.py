@@ -1,636 +1,1605 @@
+import functools
+import hashlib
+import importlib
+import importlib.util
 import json
-import httpx
 import os
+import random
+import struct
+import tempfile
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# Optional faster JSON codecs, see get_codec
+try:
+    import orjson
+except ImportError:
+    orjson = None
 # from dotenv import dotenv_values
 
 
-class API(object):
+class _LazyModule(object):
+    # Imported on first attribute access. httpx and asyncio make up most of the
+    # import time of this module, commands that never touch the network (--help,
+    # argument errors) don't pay for them.
+    def __init__(self, name):
+        self.name = name
+        self.module = None
+        self.import_seconds = None
+
+    def __getattr__(self, attr):
+        if self.module is None:
+            start = time.perf_counter()
+            self.module = importlib.import_module(self.name)
+            self.import_seconds = time.perf_counter() - start
+        return getattr(self.module, attr)
+
+
+httpx = _LazyModule('httpx')
+asyncio = _LazyModule('asyncio')
+# Only needed for typed decoding or when picked as the codec
+msgspec = _LazyModule('msgspec') if importlib.util.find_spec('msgspec') else None
+
+GRAPHQL_URL = 'https://api.runpod.io/graphql'
+ENDPOINTS_URL = 'https://api.runpod.ai/v2'
+
+# Local caches (GPU catalog, ...) live here so they survive process restarts
+CACHE_DIR = os.getenv('RUNPOD_CACHE_DIR') or os.path.join(os.path.expanduser('~'), '.cache', 'runpod-api')
+
+# Connection pool defaults shared by API and Endpoints. Connections are kept
+# alive between calls so only the first request pays for DNS, TCP and TLS.
+DEFAULT_TIMEOUT = 30.0
+DEFAULT_MAX_CONNECTIONS = 20
+DEFAULT_MAX_KEEPALIVE_CONNECTIONS = 10
+DEFAULT_KEEPALIVE_EXPIRY = 60.0
+
+
+class Codec(object):
+    def __init__(self, name, dumps, loads):
+        self.name = name
+        # dumps(obj) -> bytes, loads(bytes or str) -> obj
+        self.dumps = dumps
+        self.loads = loads
+
+
+def _json_codec():
+    return Codec(
+        'json',
+        lambda obj: json.dumps(obj, separators=(',', ':'), default=str).encode('utf-8'),
+        json.loads
+    )
+
+
+def _orjson_codec():
+    return Codec(
+        'orjson',
+        lambda obj: orjson.dumps(obj, default=str),
+        orjson.loads
+    )
+
+
+def _msgspec_codec():
+    encoder = msgspec.json.Encoder(enc_hook=str)
+    decoder = msgspec.json.Decoder()
+    return Codec(
+        'msgspec',
+        encoder.encode,
+        decoder.decode
+    )
+
+
+CODECS = {'json': _json_codec}
+if orjson is not None:
+    CODECS['orjson'] = _orjson_codec
+if msgspec is not None:
+    CODECS['msgspec'] = _msgspec_codec
+
+
+def get_codec(name=None):
+    # RUNPOD_JSON_CODEC picks one explicitly, otherwise the fastest installed
+    name = name or os.getenv('RUNPOD_JSON_CODEC')
+    if not name:
+        name = 'orjson' if orjson is not None else 'msgspec' if msgspec is not None else 'json'
+    if name not in CODECS:
+        raise ValueError(f'JSON codec {name!r} is not available, expected one of {", ".join(CODECS)}')
+    return CODECS[name]()
+
+
+codec = get_codec()
+
+
+def set_codec(name):
+    global codec
+    codec = get_codec(name)
+    return codec
+
+
+def dumps(obj):
+    return codec.dumps(obj)
+
+
+def loads(data):
+    return codec.loads(data)
+
+
+# Only formats CLI output, so always the stdlib layout whatever the codec
+def pretty(obj):
+    return json.dumps(obj, indent=4, default=str)
+
+
+# Use instead of response.json(), which always goes through the stdlib decoder
+def response_json(response):
+    return codec.loads(response.content)
+
+
+# Operations per aliased GraphQL document in the batch methods
+DEFAULT_BATCH_SIZE = 25
+
+# Field selections. Methods that take `fields` accept a preset name from the
+# matching *_FIELD_PRESETS dict or an explicit field tree, e.g.
+#     api.get_pods(fields='minimal')
+#     api.get_pods(fields=['id', 'desiredStatus', {'runtime': ['uptimeInSeconds']}])
+POD_FIELDS = """
+    id
+    machineId
+    name
+    imageName
+    templateId
+    desiredStatus
+    costPerHr
+    costMultiplier
+    lowestBidPriceToResume
+    containerDiskInGb
+    volumeInGb
+    memoryInGb
+    vcpuCount
+    podType
+    ports
+    version
+    volumeEncrypted
+    volumeMountPath
+    runtime {
+      uptimeInSeconds
+      ports {
+        ip
+        isIpPublic
+        privatePort
+        publicPort
+        type
+      }
+      gpus {
+        id
+        gpuUtilPercent
+        memoryUtilPercent
+      }
+      container {
+        cpuPercent
+        memoryPercent
+      }
+    }
+"""
+
+POD_FIELD_PRESETS = {
+    'minimal': 'id desiredStatus costPerHr',
+    'status': """
+        id
+        name
+        imageName
+        desiredStatus
+        podType
+        costPerHr
+        lowestBidPriceToResume
+        runtime {
+          uptimeInSeconds
+        }
+    """,
+    'telemetry': """
+        id
+        desiredStatus
+        costPerHr
+        runtime {
+          uptimeInSeconds
+          gpus {
+            id
+            gpuUtilPercent
+            memoryUtilPercent
+          }
+          container {
+            cpuPercent
+            memoryPercent
+          }
+        }
+        latestTelemetry {
+          cpuUtilization
+          memoryUtilization
+          averageGpuMetrics {
+            percentUtilization
+            temperatureCelcius
+            memoryUtilization
+            powerWatts
+          }
+        }
+    """,
+    'details': POD_FIELDS,
+    'full': POD_FIELDS + """
+        machine {
+          podHostId
+        }
+        latestTelemetry {
+          cpuUtilization
+          memoryUtilization
+          averageGpuMetrics {
+            percentUtilization
+            temperatureCelcius
+            memoryUtilization
+            powerWatts
+          }
+        }
+    """,
+}
+
+GPU_TYPE_FIELD_PRESETS = {
+    'minimal': 'id displayName memoryInGb',
+    'price': """
+        id
+        secureCloud
+        communityCloud
+        securePrice
+        communityPrice
+        lowestPrice(input: { gpuCount: 1 }) {
+          minimumBidPrice
+        }
+    """,
+    'full': """
+        maxGpuCount
+        id
+        displayName
+        manufacturer
+        memoryInGb
+        cudaCores
+        secureCloud
+        communityCloud
+        securePrice
+        communityPrice
+        lowestPrice(input: { gpuCount: 1 }) {
+            minimumBidPrice
+        }
+    """,
+}
+
+MYSELF_FIELD_PRESETS = {
+    'minimal': 'id email',
+    'balance': """
+        id
+        clientBalance
+        currentSpendPerHr
+        spendLimit
+        underBalance
+        minBalance
+    """,
+    'pods': """
+        id
+        pods {
+          id
+          name
+          desiredStatus
+          costPerHr
+        }
+    """,
+    'endpoints': """
+        id
+        endpoints {
+          id
+          name
+          templateId
+          gpuIds
+          workersMin
+          workersMax
+          workersStandby
+        }
+    """,
+    'full': """
+        id
+        authId
+        email
+        notifyPodsStale
+        notifyPodsGeneral
+        notifyLowBalance
+        creditAlertThreshold
+        notifyOther
+        currentSpendPerHr
+        machineQuota
+        referralEarned
+        signedTermsOfService
+        spendLimit
+        templateEarned
+        multiFactorEnabled
+        clientBalance
+        hostBalance
+        underBalance
+        minBalance
+        apiKeys {
+            id
+            permissions
+            createdAt
+        }
+        pubKey
+        information {
+            firstName
+            lastName
+            addressLine1
+            addressLine2
+            countryCode
+            companyName
+            companyIdentification
+            taxIdentification
+        }
+        serverlessDiscount {
+            id
+            userId
+            type
+            discountFactor
+            expirationDate
+        }
+        spendDetails {
+            localStoragePerHour
+            networkStoragePerHour
+            gpuComputePerHour
+        }
+        creditCodes {
+            id
+            issuerId
+            createdAt
+            redeemedAt
+            amount
+        }
+        referral {
+            code
+            currentMonth {
+                totalReferrals
+                totalSpend
+            }
+        }
+        podTemplates {
+            id
+            name
+            imageName
+            isPublic
+            isRunpod
+            isServerless
+            ports
+            runtimeInMin
+            startJupyter
+            startScript
+            startSsh
+            volumeInGb
+            volumeMountPath
+            advancedStart
+            containerDiskInGb
+            containerRegistryAuthId
+            dockerArgs
+            earned
+            env {
+                key
+                value
+            }
+        }
+        pods {
+            name
+            id
+            desiredStatus
+            costPerHr
+            containerDiskInGb
+            volumeInGb
+            memoryInGb
+            vcpuCount
+            runtime {
+                uptimeInSeconds
+            }
+            machine {
+                podHostId
+            }
+        }
+        maxServerlessConcurrency
+        endpoints {
+            gpuIds
+            id
+            idleTimeout
+            name
+            networkVolumeId
+            locations
+            scalerType
+            scalerValue
+            template {
+                name
+                imageName
+            }
+            templateId
+            type
+            userId
+            version
+            workersMax
+            workersMin
+            workersStandby
+        }
+        networkVolumes {
+            id
+            name
+            size
+            dataCenterId
+        }
+        savingsPlans {
+            startTime
+            endTime
+            podId
+            gpuTypeId
+            pod {
+                name
+                id
+                desiredStatus
+                costPerHr
+                containerDiskInGb
+                volumeInGb
+                memoryInGb
+                vcpuCount
+            }
+            savingsPlanType
+            costPerHr
+            upfrontCost
+            planLength
+        }
+    """,
+}
+
+
+def render_selection(tree):
+    # ['id', {'runtime': ['uptimeInSeconds']}] -> 'id runtime { uptimeInSeconds }'
+    if isinstance(tree, dict):
+        tree = [tree]
+    parts = []
+    for item in tree:
+        if isinstance(item, dict):
+            for name, subtree in item.items():
+                parts.append(f'{name} {{ {render_selection(subtree)} }}' if subtree else name)
+        else:
+            parts.append(item)
+    return ' '.join(parts)
+
+
+def select_fields(fields, presets):
+    if isinstance(fields, str):
+        try:
+            return presets[fields]
+        except KeyError:
+            raise ValueError(f'Unknown field preset {fields!r}, expected one of {", ".join(presets)}')
+    return render_selection(fields)
+
+
+BID_PRICE_FIELDS = """
+    id
+    displayName
+    memoryInGb
+    secureCloud
+    communityCloud
+    lowestPrice(input: { gpuCount: 1 }) {
+      minimumBidPrice
+      uninterruptablePrice
+    }
+"""
+
+CREATED_POD_FIELDS = """
+    containerDiskInGb
+    apiKey
+    costPerHr
+    desiredStatus
+    dockerArgs
+    dockerId
+    gpuCount
+    id
+    imageName
+    machineId
+    memoryInGb
+    name
+    podType
+    ports
+    templateId
+    uptimeSeconds
+    vcpuCount
+    version
+    volumeEncrypted
+    volumeInGb
+    volumeKey
+    volumeMountPath
+    runtime {
+        uptimeInSeconds
+        ports {
+            ip
+            isIpPublic
+            privatePort
+            publicPort
+            type
+        }
+        gpus {
+            id
+            gpuUtilPercent
+            memoryUtilPercent
+        }
+        container {
+            cpuPercent
+            memoryPercent
+        }
+    }
+    machine {
+        podHostId
+    }
+"""
+
+RESUMED_POD_FIELDS = """
+    id
+    costPerHr
+    desiredStatus
+    lastStatusChange
+    imageName
+    env
+    machineId
+    machine {
+        podHostId
+    }
+"""
+
+ENDPOINT_WORKERS_FIELDS = """
+    id
+    templateId
+    workersMin
+    workersMax
+"""
+
+# GraphQL documents. Values travel in `variables` and __FIELDS__ is replaced
+# with the selected fields when a document is compiled (see compile_document).
+GPU_TYPES_QUERY = """
+    query GpuTypes {
+        gpuTypes {
+            __FIELDS__
+        }
+    }
+"""
+
+BID_PRICE_QUERY = """
+    query GpuTypes($gpuId: String!) {
+        gpuTypes(input: { id: $gpuId }) {
+            __FIELDS__
+        }
+    }
+"""
+
+POD_QUERY = """
+    query Pod($podId: String!) {
+        pod(input: { podId: $podId }) {
+            __FIELDS__
+        }
+    }
+"""
+
+PODS_QUERY = """
+    query Pods {
+        myself {
+            pods {
+                __FIELDS__
+            }
+        }
+    }
+"""
+
+MYSELF_QUERY = """
+    query myself {
+        myself {
+            __FIELDS__
+        }
+    }
+"""
+
+# https://docs.runpod.io/docs/start-pod#start-on-demand-pod
+START_ON_DEMAND_POD_MUTATION = """
+    mutation StartOnDemandPod($podId: String!, $gpuCount: Int!) {
+        podResume(input: { podId: $podId, gpuCount: $gpuCount }) {
+            __FIELDS__
+        }
+    }
+"""
+
+# https://docs.runpod.io/docs/start-pod#start-spot-pod
+START_SPOT_POD_MUTATION = """
+    mutation StartSpotPod($podId: String!, $bidPerGpu: Float!, $gpuCount: Int!) {
+        podBidResume(input: { podId: $podId, bidPerGpu: $bidPerGpu, gpuCount: $gpuCount }) {
+            __FIELDS__
+        }
+    }
+"""
+
+STOP_POD_MUTATION = """
+    mutation StopPod($podId: String!) {
+        podStop(input: { podId: $podId }) {
+            id
+            desiredStatus
+        }
+    }
+"""
+
+TERMINATE_POD_MUTATION = """
+    mutation TerminatePod($podId: String!) {
+        podTerminate(input: { podId: $podId })
+    }
+"""
+
+CREATE_ON_DEMAND_POD_MUTATION = """
+    mutation CreateOnDemandPod($input: PodFindAndDeployOnDemandInput!) {
+        podFindAndDeployOnDemand(input: $input) {
+            __FIELDS__
+        }
+    }
+"""
+
+CREATE_SPOT_POD_MUTATION = """
+    mutation CreateSpotPod($input: PodRentInterruptableInput!) {
+        podRentInterruptable(input: $input) {
+            __FIELDS__
+        }
+    }
+"""
+
+SAVE_TEMPLATE_MUTATION = """
+    mutation SaveTemplate($input: SaveTemplateInput!) {
+        saveTemplate(input: $input) {
+            advancedStart
+            containerDiskInGb
+            dockerArgs
+            env {
+                key
+                value
+            }
+            id
+            imageName
+            name
+            ports
+            readme
+            startJupyter
+            startScript
+            startSsh
+            volumeInGb
+            volumeMountPath
+        }
+    }
+"""
+
+UPDATE_MIN_WORKERS_MUTATION = """
+    mutation UpdateMinWorkers($endpointId: String!, $workerCount: Int!) {
+        updateEndpointWorkersMin(input: { endpointId: $endpointId, workerCount: $workerCount }) {
+            __FIELDS__
+        }
+    }
+"""
+
+UPDATE_MAX_WORKERS_MUTATION = """
+    mutation UpdateMaxWorkers($endpointId: String!, $workerCount: Int!) {
+        updateEndpointWorkersMax(input: { endpointId: $endpointId, workerCount: $workerCount }) {
+            __FIELDS__
+        }
+    }
+"""
+
+UPDATE_ENDPOINT_TEMPLATE_MUTATION = """
+    mutation UpdateEndpointTemplate($endpointId: String!, $templateId: String!) {
+        updateEndpointTemplate(input: { endpointId: $endpointId, templateId: $templateId }) {
+            __FIELDS__
+        }
+    }
+"""
+
+# (operation type, field template, result unwrapper) for the batch methods.
+# Every copy of the template gets its own alias and __ID__ is replaced with
+# that copy's variable.
+POD_BATCH = ('query', 'pod(input: { podId: __ID__ }) { __FIELDS__ }', None)
+BID_PRICE_BATCH = (
+    'query',
+    'gpuTypes(input: { id: __ID__ }) { __FIELDS__ }',
+    lambda gpu_types: gpu_types[0] if gpu_types else None
+)
+STOP_POD_BATCH = ('mutation', 'podStop(input: { podId: __ID__ }) { id desiredStatus }', None)
+TERMINATE_POD_BATCH = ('mutation', 'podTerminate(input: { podId: __ID__ })', None)
+
+
+@functools.lru_cache(maxsize=256)
+def compile_document(document, fields=''):
+    # Built once per (document, selection); whitespace is collapsed to keep bodies small
+    return ' '.join(document.replace('__FIELDS__', fields).split())
+
+
+@functools.lru_cache(maxsize=256)
+def query_hash(query):
+    return hashlib.sha256(query.encode('utf-8')).hexdigest()
+
+
+def graphql_payload(document, variables=None, fields=''):
+    payload = {'query': compile_document(document, fields)}
+    if variables:
+        payload['variables'] = variables
+    return payload
+
+
+def _persisted_payload(payload, include_query=False):
+    # Automatic persisted queries: send the sha256 of the document and only
+    # send the full text when the server doesn't know the hash yet
+    persisted = {key: value for key, value in payload.items() if key != 'query'}
+    persisted['extensions'] = {
+        'persistedQuery': {'version': 1, 'sha256Hash': query_hash(payload['query'])}
+    }
+    if include_query:
+        persisted['query'] = payload['query']
+    return persisted
+
+
+def _persisted_query_error(response):
+    # 'PersistedQueryNotFound' / 'PersistedQueryNotSupported' or None
+    if response.status_code not in (200, 400):
+        return None
+    # Cheap byte check first so large successful bodies are only decoded once, by the caller
+    if b'PersistedQuery' not in response.content and b'PERSISTED_QUERY' not in response.content:
+        return None
+    try:
+        errors = response_json(response).get('errors') or []
+    except ValueError:
+        return None
+    for error in errors:
+        code = (error.get('extensions') or {}).get('code')
+        if error.get('message') in ('PersistedQueryNotFound', 'PersistedQueryNotSupported'):
+            return error['message']
+        if code == 'PERSISTED_QUERY_NOT_FOUND':
+            return 'PersistedQueryNotFound'
+        if code == 'PERSISTED_QUERY_NOT_SUPPORTED':
+            return 'PersistedQueryNotSupported'
+    return None
+
+
+def _is_mutation(payload):
+    return payload.get('query', '').startswith('mutation')
+
+
+def _flight_key(payload, auth_required):
+    # Documents and variables are deterministic, so equal bodies mean equal queries
+    return auth_required, dumps(payload)
+
+
+class _Flight(object):
+    __slots__ = ('done', 'response', 'error')
+
     def __init__(self):
+        self.done = threading.Event()
+        self.response = None
+        self.error = None
+
+
+def _chunks(items, size):
+    # Drop duplicate ids, keep the caller's order
+    items = list(dict.fromkeys(items))
+    for i in range(0, len(items), max(1, size)):
+        yield items[i:i + size]
+
+
+@functools.lru_cache(maxsize=64)
+def _batch_document(batch, count, fields=''):
+    operation, template, _ = batch
+    variables = ', '.join(f'$id{i}: String!' for i in range(count))
+    selections = ' '.join(
+        f'i{i}: ' + template.replace('__ID__', f'$id{i}')
+        for i in range(count)
+    )
+    return compile_document(f'{operation} ({variables}) {{ {selections} }}', fields)
+
+
+def _batch_payload(batch, ids, fields=''):
+    return {
+        'query': _batch_document(batch, len(ids), fields),
+        'variables': {f'id{i}': str(item_id) for i, item_id in enumerate(ids)}
+    }
+
+
+def _batch_results(batch, ids, response):
+    unwrap = batch[2]
+    results = {item_id: {'data': None, 'errors': []} for item_id in ids}
+
+    try:
+        resp_json = response_json(response)
+    except ValueError:
+        resp_json = {}
+
+    if response.status_code != 200 and not resp_json.get('errors'):
+        resp_json['errors'] = [{'message': f'HTTP {response.status_code}'}]
+
+    aliases = {f'i{i}': item_id for i, item_id in enumerate(ids)}
+    for error in resp_json.get('errors') or []:
+        path = error.get('path') or []
+        if path and path[0] in aliases:
+            results[aliases[path[0]]]['errors'].append(error['message'])
+        else:
+            # Document level errors (validation, auth, HTTP) apply to the whole chunk
+            for result in results.values():
+                result['errors'].append(error['message'])
+
+    data = resp_json.get('data') or {}
+    for alias, item_id in aliases.items():
+        value = data.get(alias)
+        results[item_id]['data'] = unwrap(value) if unwrap and value is not None else value
+
+    return results
+
+
+# Error classes used by the retry engine
+CAPACITY = 'capacity'
+RATE_LIMIT = 'rate_limit'
+TRANSIENT = 'transient'
+FATAL = 'fatal'
+
+# GraphQL error messages that mean "no GPUs right now", retrying later may succeed
+CAPACITY_MESSAGES = (
+    'There are no longer any instances available',
+    'There are not enough free GPUs',
+    'does not have enough GPUs',
+    'No instances with enough',
+)
+RATE_LIMIT_MESSAGES = (
+    'rate limit',
+    'too many requests',
+)
+
+
+class RetryPolicy(object):
+    def __init__(self, base_delay=1.0, factor=2.0, max_delay=30.0, max_elapsed=120.0, jitter=0.5):
+        self.base_delay = base_delay
+        self.factor = factor
+        self.max_delay = max_delay
+        # Give up once this many seconds have passed since the first attempt (None = never)
+        self.max_elapsed = max_elapsed
+        # Fraction of each delay that is randomised so concurrent clients spread out
+        self.jitter = jitter
+
+    def delay(self, attempt):
+        delay = min(self.max_delay, self.base_delay * self.factor ** attempt)
+        return delay * (1 - self.jitter * random.random())
+
+
+DEFAULT_RETRY_POLICIES = {
+    CAPACITY: RetryPolicy(base_delay=5.0, factor=1.5, max_delay=60.0, max_elapsed=600.0),
+    RATE_LIMIT: RetryPolicy(base_delay=1.0, factor=2.0, max_delay=30.0, max_elapsed=120.0),
+    TRANSIENT: RetryPolicy(base_delay=0.5, factor=2.0, max_delay=10.0, max_elapsed=60.0),
+}
+
+# Capacity retries can take minutes, so only callers that launch pods opt in
+DEFAULT_RETRY_ON = (RATE_LIMIT, TRANSIENT)
+RETRY_ALL = (CAPACITY, RATE_LIMIT, TRANSIENT)
+
+
+def classify_response(response, mutation=False):
+    # None for success, otherwise one of the error classes
+    if response.status_code == 429:
+        return RATE_LIMIT
+    if response.status_code >= 500:
+        # A mutation may have run before a 500/502/504, only 503 is known to be safe
+        return TRANSIENT if not mutation or response.status_code == 503 else FATAL
+
+    if b'"errors"' not in response.content:
+        return None if response.status_code == 200 else FATAL
+    try:
+        body = response_json(response)
+        errors = body.get('errors') or []
+    except (ValueError, AttributeError):
+        return FATAL if response.status_code != 200 else None
+
+    if not errors:
+        return None if response.status_code == 200 else FATAL
+
+    data = body.get('data')
+    if mutation and isinstance(data, dict) and len(data) > 1:
+        # An aliased batch mutation where some aliases ran, resending it would run them again
+        failed = {error['path'][0] for error in errors if error.get('path')}
+        if set(data) - failed:
+            return FATAL
+
+    messages = [str(error.get('message', '')) for error in errors]
+    if any(text in message for message in messages for text in CAPACITY_MESSAGES):
+        return CAPACITY
+    if any(text in message.lower() for message in messages for text in RATE_LIMIT_MESSAGES):
+        return RATE_LIMIT
+    return FATAL
+
+
+def classify_exception(exc, mutation=False):
+    # Connection failures never reached the server and are always safe to retry
+    if isinstance(exc, (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)):
+        return TRANSIENT
+    if isinstance(exc, (httpx.TimeoutException, httpx.NetworkError, httpx.RemoteProtocolError)):
+        return FATAL if mutation else TRANSIENT
+    return FATAL
+
+
+def _retry_after(response):
+    try:
+        return float(response.headers.get('Retry-After', 0))
+    except (TypeError, ValueError, AttributeError):
+        return 0
+
+
+def cache_path(name):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    return os.path.join(CACHE_DIR, name)
+
+
+# Writes bytes to a unique temp file next to path, then renames it into place,
+# so readers in any process or thread never see a partial file
+def write_atomic(path, data):
+    fd, tmp_file = tempfile.mkstemp(prefix=f'{os.path.basename(path)}.', suffix='.tmp', dir=os.path.dirname(path) or '.')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_file, path)
+    except BaseException:
+        try:
+            os.remove(tmp_file)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+# Requests per second (and burst size) shared by every process on this host
+# that talks to the GraphQL API. RUNPOD_RATE_LIMIT=0 turns the limiter off.
+DEFAULT_RATE_LIMIT = float(os.getenv('RUNPOD_RATE_LIMIT', 5))
+DEFAULT_RATE_BURST = float(os.getenv('RUNPOD_RATE_BURST', 10))
+RATE_LIMIT_FILE = 'rate_limit.bin'
+
+
+class RateLimiter(object):
+    # Token bucket whose state (tokens, updated at) lives in a small file that is
+    # locked while it is read and written, so all processes share one budget
+    _state = struct.Struct('<dd')
+
+    def __init__(self, rate=DEFAULT_RATE_LIMIT, burst=DEFAULT_RATE_BURST, state_file=None):
+        self.rate = rate
+        self.burst = burst
+        self.state_file = state_file or cache_path(RATE_LIMIT_FILE)
+        self._lock = threading.Lock()
+        self._file = None
+        self.acquired = 0
+        self.throttled = 0
+        self.wait_seconds = 0.0
+        self.max_wait = 0.0
+
+    def acquire(self):
+        waited = 0.0
+        while True:
+            delay = self._take()
+            if not delay:
+                return self._record(waited)
+            time.sleep(delay)
+            waited += delay
+
+    async def acquire_async(self):
+        waited = 0.0
+        while True:
+            delay = self._take()
+            if not delay:
+                return self._record(waited)
+            await asyncio.sleep(delay)
+            waited += delay
+
+    # Wait-time metrics, a high throttled/acquired ratio means we are rate-bound
+    def stats(self):
+        with self._lock:
+            return {
+                'acquired': self.acquired,
+                'throttled': self.throttled,
+                'wait_seconds': self.wait_seconds,
+                'max_wait': self.max_wait,
+                'avg_wait': self.wait_seconds / self.acquired if self.acquired else 0.0,
+            }
+
+    def _record(self, waited):
+        with self._lock:
+            self.acquired += 1
+            if waited:
+                self.throttled += 1
+                self.wait_seconds += waited
+                self.max_wait = max(self.max_wait, waited)
+        return waited
+
+    def _take(self):
+        # Take a token and return 0, or return the seconds until one is available
+        with self._lock:
+            if self._file is None:
+                self._file = open(self.state_file, 'a+b')
+            f = self._file
+            lock_file(f)
+            try:
+                f.seek(0)
+                data = f.read(self._state.size)
+                now = time.time()
+                if len(data) == self._state.size:
+                    tokens, updated = self._state.unpack(data)
+                    tokens = min(self.burst, tokens + max(0.0, now - updated) * self.rate)
+                else:
+                    tokens = self.burst
+
+                delay = 0.0
+                if tokens >= 1:
+                    tokens -= 1
+                else:
+                    delay = (1 - tokens) / self.rate
+
+                f.seek(0)
+                f.truncate()
+                f.write(self._state.pack(tokens, now))
+                f.flush()
+                return delay
+            finally:
+                unlock_file(f)
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+# Exclusive lock on an open file across processes, blocks until it is free
+def lock_file(f):
+    if fcntl:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+    else:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+
+
+def unlock_file(f):
+    if fcntl:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+    else:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+_rate_limiter = None
+
+
+# Process wide limiter used by every API instance unless one is passed in
+def get_rate_limiter():
+    global _rate_limiter
+    if _rate_limiter is None and DEFAULT_RATE_LIMIT > 0:
+        _rate_limiter = RateLimiter()
+    return _rate_limiter
+
+
+def get_api_key():
+    # First, try to get the API key from the environment variables
+    api_key = os.getenv('RUNPOD_API_KEY')
+    if not api_key:
+        # If the API key is not in the environment variables, try to get it from the file
+        try:
+            with open('api_key.json', 'r') as f:
+                data = json.load(f)
+                api_key = data.get('RUNPOD_API_KEY')
+        except FileNotFoundError:
+            pass
+    return api_key
+
+
+class _PooledClient(object):
+    # Attribute of httpx, looked up when the client is created
+    client_class = 'Client'
+
+    def __init__(self, timeout=DEFAULT_TIMEOUT, max_connections=DEFAULT_MAX_CONNECTIONS,
+                 max_keepalive_connections=DEFAULT_MAX_KEEPALIVE_CONNECTIONS,
+                 keepalive_expiry=DEFAULT_KEEPALIVE_EXPIRY, http2=False, headers=None):
+        self.timeout = timeout
+        # Turned into httpx.Limits with the client, building an API doesn't import httpx
+        self.limits = dict(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry
+        )
+        # HTTP/2 needs the optional h2 package (pip install httpx[http2])
+        self.http2 = http2
+        self.headers = headers
+        self._client = None
+
+    @property
+    def client(self):
+        # Created on first use so building an API object stays cheap
+        if self._client is None:
+            self._client = getattr(httpx, self.client_class)(
+                timeout=self.timeout,
+                limits=httpx.Limits(**self.limits),
+                http2=self.http2,
+                headers=self.headers
+            )
+        return self._client
+
+    def close(self):
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class _AsyncPooledClient(_PooledClient):
+    client_class = 'AsyncClient'
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def close(self):
+        raise TypeError('use "await aclose()" or "async with" to close an async client')
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.aclose()
+
+
+async def gather_bounded(aws, limit=10, return_exceptions=False):
+    # Run awaitables concurrently with at most `limit` in flight, results in input order
+    semaphore = asyncio.Semaphore(limit)
+
+    async def run(aw):
+        async with semaphore:
+            return await aw
+
+    return await asyncio.gather(*(run(aw) for aw in aws), return_exceptions=return_exceptions)
+
+
+class API(_PooledClient):
+    def __init__(self, persisted_queries=False, retry_on=DEFAULT_RETRY_ON, retry_policies=None,
+                 cancel_event=None, on_retry=None, rate_limiter=None, deadline=None, **client_options):
         # env = dotenv_values('.env')
         # self.API_KEY = env['RUNPOD_API_KEY']
+        super().__init__(**client_options)
         self.API_KEY = self.get_api_key()
+        self.batch_size = DEFAULT_BATCH_SIZE
+        # Send sha256 hashes of the documents instead of their text (APQ)
+        self.persisted_queries = persisted_queries
+        # Error classes that are retried and the backoff policy for each
+        self.retry_on = tuple(retry_on or ())
+        self.retry_policies = dict(DEFAULT_RETRY_POLICIES, **(retry_policies or {}))
+        # Setting this threading.Event stops any pending retries
+        self.cancel_event = cancel_event or threading.Event()
+        # Called as on_retry(error_class, attempt, delay) before each wait
+        self.on_retry = on_retry
+        # time.monotonic() value after which no retry is started
+        self.deadline = deadline
+        # Shared host wide budget, pass rate_limiter=False to turn it off
+        self.rate_limiter = get_rate_limiter() if rate_limiter is None else rate_limiter or None
+        # Identical read-only queries in flight share one request (single-flight)
+        self._flights = {}
+        self._flights_lock = threading.Lock()
 
     def get_api_key(self):
-        # First, try to get the API key from the environment variables
-        api_key = os.getenv('RUNPOD_API_KEY')
-        if not api_key:
-            # If the API key is not in the environment variables, try to get it from the file
-            try:
-                with open('api_key.json', 'r') as f:
-                    data = json.load(f)
-                    api_key = data.get('RUNPOD_API_KEY')
-            except FileNotFoundError:
-                pass
-        return api_key
+        return get_api_key()
+
+    def _query_params(self, auth_required):
+        return {'api_key': self.API_KEY} if auth_required else None
 
     def _run_query(self, payload, auth_required=False):
-        url = 'https://api.runpod.io/graphql'
+        if _is_mutation(payload):
+            return self._run_with_retries(payload, auth_required)
 
-        if auth_required:
-            url += f'?api_key={self.API_KEY}'
+        key = _flight_key(payload, auth_required)
+        with self._flights_lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
 
-        response = httpx.post(
-            url,
-            json=payload
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.response
+
+        try:
+            flight.response = self._run_with_retries(payload, auth_required)
+            return flight.response
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._flights_lock:
+                del self._flights[key]
+            flight.done.set()
+
+    def _run_with_retries(self, payload, auth_required):
+        mutation = _is_mutation(payload)
+        started = time.monotonic()
+        attempt = 0
+
+        while True:
+            try:
+                response = self._send_query(payload, auth_required)
+                error_class, error = classify_response(response, mutation), None
+            except httpx.HTTPError as e:
+                response, error_class, error = None, classify_exception(e, mutation), e
+
+            delay = self._retry_delay(error_class, attempt, started, response)
+            if delay is None:
+                if error is not None:
+                    raise error
+                return response
+
+            if self.on_retry:
+                self.on_retry(error_class, attempt + 1, delay)
+            if self.cancel_event.wait(delay):
+                if error is not None:
+                    raise error
+                return response
+            attempt += 1
+
+    def _retry_delay(self, error_class, attempt, started, response):
+        # Seconds to wait before the next attempt, None to stop here
+        if error_class is None or error_class not in self.retry_on or self.cancel_event.is_set():
+            return None
+
+        policy = self.retry_policies[error_class]
+        delay = policy.delay(attempt)
+        if error_class == RATE_LIMIT and response is not None:
+            delay = max(delay, _retry_after(response))
+
+        if policy.max_elapsed is not None and time.monotonic() - started + delay > policy.max_elapsed:
+            return None
+        if self.deadline is not None and time.monotonic() + delay > self.deadline:
+            return None
+        return delay
+
+    def _send_query(self, payload, auth_required):
+        if self.persisted_queries:
+            response = self._post(_persisted_payload(payload), auth_required)
+            error = _persisted_query_error(response)
+            if error is None:
+                return response
+            if error == 'PersistedQueryNotSupported':
+                self.persisted_queries = False
+            else:
+                payload = _persisted_payload(payload, include_query=True)
+
+        return self._post(payload, auth_required)
+
+    def _post(self, payload, auth_required):
+        if self.rate_limiter:
+            self.rate_limiter.acquire()
+
+        response = self.client.post(
+            GRAPHQL_URL,
+            params=self._query_params(auth_required),
+            content=dumps(payload),
+            headers={'Content-Type': 'application/json'}
         )
 
         return response
 
     # https://docs.runpod.io/docs/get-gpu-types
-    def get_gpu_types(self):
-        return self._run_query({
-            "query": """
-                query GpuTypes {
-                    gpuTypes {
-                        maxGpuCount
-                        id
-                        displayName
-                        manufacturer
-                        memoryInGb
-                        cudaCores
-                        secureCloud
-                        communityCloud
-                        securePrice
-                        communityPrice
-                        lowestPrice(input: { gpuCount: 1 }) {
-                            minimumBidPrice
-                        }
-                    }
-                }
-            """
-        }, False)
+    def get_gpu_types(self, fields='full'):
+        return self._run_query(graphql_payload(
+            GPU_TYPES_QUERY,
+            fields=select_fields(fields, GPU_TYPE_FIELD_PRESETS)
+        ), False)
 
     def get_bid_price(self, gpu_id):
-        return self._run_query({
-            "query": """
-                query GpuTypes {{
-                  gpuTypes(input: {{ id: "{gpu_id}" }}) {{
-                    id
-                    displayName
-                    memoryInGb
-                    secureCloud
-                    communityCloud
-                    lowestPrice(input: {{ gpuCount: 1 }}) {{
-                      minimumBidPrice
-                      uninterruptablePrice
-                    }}
-                  }}
-                }}
-            """.format(gpu_id=gpu_id)
-        }, False)
+        return self._run_query(graphql_payload(
+            BID_PRICE_QUERY,
+            {'gpuId': gpu_id},
+            fields=BID_PRICE_FIELDS
+        ), False)
 
     # https://docs.runpod.io/docs/get-pod#get-pod-by-id
-    def get_pod(self, pod_id):
-        return self._run_query({
-            "query": """
-                query Pod {{
-                  pod(input: {{ podId: "{pod_id}" }}) {{
-                    id
-                    machineId
-                    name
-                    imageName
-                    templateId
-                    desiredStatus
-                    costPerHr
-                    costMultiplier
-                    lowestBidPriceToResume
-                    containerDiskInGb
-                    volumeInGb
-                    memoryInGb
-                    vcpuCount
-                    podType
-                    ports
-                    version
-                    volumeEncrypted
-                    volumeMountPath
-                    runtime {{
-                      uptimeInSeconds
-                      ports {{
-                        ip
-                        isIpPublic
-                        privatePort
-                        publicPort
-                        type
-                      }}
-                      gpus {{
-                        id
-                        gpuUtilPercent
-                        memoryUtilPercent
-                      }}
-                      container {{
-                        cpuPercent
-                        memoryPercent
-                      }}
-                    }}
-                  }}
-                }}
-            """.format(pod_id=pod_id)
-        }, True)
+    def get_pod(self, pod_id, fields='details'):
+        return self._run_query(graphql_payload(
+            POD_QUERY,
+            {'podId': pod_id},
+            fields=select_fields(fields, POD_FIELD_PRESETS)
+        ), True)
+
+    # Batch variants: N operations are sent as one aliased GraphQL document
+    # per chunk and the results are mapped back to their ids, e.g.
+    #     {'pod1': {'data': {...}, 'errors': []}, 'pod2': {'data': None, 'errors': ['...']}}
+    def get_pods_by_id(self, pod_ids, chunk_size=None, fields='details'):
+        return self._run_batch(POD_BATCH, pod_ids, chunk_size, True, select_fields(fields, POD_FIELD_PRESETS))
+
+    def get_bid_prices(self, gpu_ids, chunk_size=None):
+        return self._run_batch(BID_PRICE_BATCH, gpu_ids, chunk_size, False, BID_PRICE_FIELDS)
+
+    def stop_pods(self, pod_ids, chunk_size=None):
+        return self._run_batch(STOP_POD_BATCH, pod_ids, chunk_size, True)
+
+    def terminate_pods(self, pod_ids, chunk_size=None):
+        return self._run_batch(TERMINATE_POD_BATCH, pod_ids, chunk_size, True)
+
+    def _run_batch(self, batch, ids, chunk_size, auth_required, fields=''):
+        results = {}
+        for chunk in _chunks(ids, chunk_size or self.batch_size):
+            response = self._run_query(_batch_payload(batch, chunk, fields), auth_required)
+            results.update(_batch_results(batch, chunk, response))
+        return results
 
     # https://docs.runpod.io/docs/get-pod#get-all-pods
-    def get_pods(self):
-        return self._run_query({
-            "query": """
-                query Pods {
-                    myself {
-                        pods {
-                            id
-                            machineId
-                            name
-                            imageName
-                            templateId
-                            desiredStatus
-                            costPerHr
-                            costMultiplier
-                            lowestBidPriceToResume
-                            containerDiskInGb
-                            volumeInGb
-                            memoryInGb
-                            vcpuCount
-                            podType
-                            ports
-                            version
-                            volumeEncrypted
-                            volumeMountPath
-                            runtime {
-                                uptimeInSeconds
-                                ports {
-                                    ip
-                                    isIpPublic
-                                    privatePort
-                                    publicPort
-                                    type
-                                }
-                                gpus {
-                                    id
-                                    gpuUtilPercent
-                                    memoryUtilPercent
-                                }
-                                container {
-                                    cpuPercent
-                                    memoryPercent
-                                }
-                            }
-                            machine {
-                                podHostId
-                            }
-                            latestTelemetry {
-                                cpuUtilization
-                                memoryUtilization
-                                averageGpuMetrics {
-                                    percentUtilization
-                                    temperatureCelcius
-                                    memoryUtilization
-                                    powerWatts
-                                }
-                            }
-                        }
-                    }
-                }
-            """
-        }, True)
-
-    def get_myself(self):
-        return self._run_query({
-            "query": """
-                query myself {
-                    myself {
-                        id
-                        authId
-                        email
-                        notifyPodsStale
-                        notifyPodsGeneral
-                        notifyLowBalance
-                        creditAlertThreshold
-                        notifyOther
-                        currentSpendPerHr
-                        machineQuota
-                        referralEarned
-                        signedTermsOfService
-                        spendLimit
-                        templateEarned
-                        multiFactorEnabled
-                        clientBalance
-                        hostBalance
-                        underBalance
-                        minBalance
-                        apiKeys {
-                            id
-                            permissions
-                            createdAt
-                        }
-                        pubKey
-                        information {
-                            firstName
-                            lastName
-                            addressLine1
-                            addressLine2
-                            countryCode
-                            companyName
-                            companyIdentification
-                            taxIdentification
-                        }
-                        serverlessDiscount {
-                            id
-                            userId
-                            type
-                            discountFactor
-                            expirationDate
-                        }
-                        spendDetails {
-                            localStoragePerHour
-                            networkStoragePerHour
-                            gpuComputePerHour
-                        }
-                        creditCodes {
-                            id
-                            issuerId
-                            createdAt
-                            redeemedAt
-                            amount
-                        }
-                        referral {
-                            code
-                            currentMonth {
-                                totalReferrals
-                                totalSpend
-                            }
-                        }
-                        podTemplates {
-                            id
-                            name
-                            imageName
-                            isPublic
-                            isRunpod
-                            isServerless
-                            ports
-                            runtimeInMin
-                            startJupyter
-                            startScript
-                            startSsh
-                            volumeInGb
-                            volumeMountPath
-                            advancedStart
-                            containerDiskInGb
-                            containerRegistryAuthId
-                            dockerArgs
-                            earned
-                            env {
-                                key
-                                value
-                            }
-                        }
-                        pods {
-                            name
-                            id
-                            desiredStatus
-                            costPerHr
-                            containerDiskInGb
-                            volumeInGb
-                            memoryInGb
-                            vcpuCount
-                            runtime {
-                                uptimeInSeconds
-                            }
-                            machine {
-                                podHostId
-                            }
-                        }
-                        maxServerlessConcurrency
-                        endpoints {
-                            gpuIds
-                            id
-                            idleTimeout
-                            name
-                            networkVolumeId
-                            locations
-                            scalerType
-                            scalerValue
-                            template {
-                                name
-                                imageName
-                            }
-                            templateId
-                            type
-                            userId
-                            version
-                            workersMax
-                            workersMin
-                            workersStandby
-                        }
-                        networkVolumes {
-                            id
-                            name
-                            size
-                            dataCenterId
-                        }
-                        savingsPlans {
-                            startTime
-                            endTime
-                            podId
-                            gpuTypeId
-                            pod {
-                                name
-                                id
-                                desiredStatus
-                                costPerHr
-                                containerDiskInGb
-                                volumeInGb
-                                memoryInGb
-                                vcpuCount
-                            }
-                            savingsPlanType
-                            costPerHr
-                            upfrontCost
-                            planLength
-                        }
-                    }
-                }
-            """
-        }, True)
+    def get_pods(self, fields='full'):
+        return self._run_query(graphql_payload(
+            PODS_QUERY,
+            fields=select_fields(fields, POD_FIELD_PRESETS)
+        ), True)
+
+    def get_myself(self, fields='full'):
+        return self._run_query(graphql_payload(
+            MYSELF_QUERY,
+            fields=select_fields(fields, MYSELF_FIELD_PRESETS)
+        ), True)
 
     # https://docs.runpod.io/docs/start-pod#start-on-demand-pod
     def start_on_demand_pod(self, pod_id):
-        return self._run_query({
-            "query": """
-                mutation {{
-                    podResume(input: {{ podId: "{pod_id}", gpuCount: 1 }}) {{
-                        id
-                        costPerHr
-                        desiredStatus
-                        lastStatusChange
-                        imageName
-                        env
-                        machineId
-                        machine {{
-                            podHostId
-                        }}
-                    }}
-                }}
-            """.format(pod_id=pod_id)
-        }, True)
+        return self._run_query(graphql_payload(
+            START_ON_DEMAND_POD_MUTATION,
+            {'podId': pod_id, 'gpuCount': 1},
+            fields=RESUMED_POD_FIELDS
+        ), True)
 
     # https://docs.runpod.io/docs/start-pod#start-spot-pod
     def start_spot_pod(self, pod_id, bid_price):
-        return self._run_query({
-            "query": """
-                mutation {{
-                    podBidResume(input: {{ podId: "{pod_id}", bidPerGpu: {bid_price} gpuCount: 1 }}) {{
-                        id
-                        costPerHr
-                        desiredStatus
-                        lastStatusChange
-                        imageName
-                        env
-                        machineId
-                        machine {{
-                            podHostId
-                        }}
-                    }}
-                }}
-            """.format(pod_id=pod_id, bid_price=bid_price)
-        }, True)
+        return self._run_query(graphql_payload(
+            START_SPOT_POD_MUTATION,
+            {'podId': pod_id, 'bidPerGpu': float(bid_price), 'gpuCount': 1},
+            fields=RESUMED_POD_FIELDS
+        ), True)
 
     # https://docs.runpod.io/docs/stop-pod
     def stop_pod(self, pod_id):
-        return self._run_query({
-            "query": """
-                mutation {{
-                    podStop(input: {{ podId: "{pod_id}" }}) {{
-                        id
-                        desiredStatus
-                    }}
-                }}
-            """.format(pod_id=pod_id)
-        }, True)
+        return self._run_query(graphql_payload(
+            STOP_POD_MUTATION,
+            {'podId': pod_id}
+        ), True)
 
     def terminate_pod(self, pod_id):
-        return self._run_query({
-            "query": """
-                mutation {{
-                    podTerminate(input: {{ podId: "{pod_id}" }})
-                }}
-            """.format(pod_id=pod_id)
-        }, True)
+        return self._run_query(graphql_payload(
+            TERMINATE_POD_MUTATION,
+            {'podId': pod_id}
+        ), True)
 
     # https://docs.runpod.io/docs/create-pod
+    # pod_config is the PodFindAndDeployOnDemandInput as a dict, e.g.
+    #     {'gpuTypeId': 'NVIDIA RTX A5000', 'cloudType': 'SECURE', 'gpuCount': 1, 'env': [{'key': 'A', 'value': '1'}], ...}
     def create_on_demand_pod(self, pod_config):
-        return self._run_query({
-            "query": """
-                mutation {{
-                    podFindAndDeployOnDemand(input: {{ {pod_config} }}) {{
-                        containerDiskInGb
-                        apiKey
-                        costPerHr
-                        desiredStatus
-                        dockerArgs
-                        dockerId
-                        gpuCount
-                        id
-                        imageName
-                        machineId
-                        memoryInGb
-                        name
-                        podType
-                        ports
-                        templateId
-                        uptimeSeconds
-                        vcpuCount
-                        version
-                        volumeEncrypted
-                        volumeInGb
-                        volumeKey
-                        volumeMountPath
-                        runtime {{
-                            uptimeInSeconds
-                            ports {{
-                                ip
-                                isIpPublic
-                                privatePort
-                                publicPort
-                                type
-                            }}
-                            gpus {{
-                                id
-                                gpuUtilPercent
-                                memoryUtilPercent
-                            }}
-                            container {{
-                                cpuPercent
-                                memoryPercent
-                            }}
-                        }}
-                        machine {{
-                            podHostId
-                        }}
-                    }}
-                }}
-            """.format(pod_config=pod_config)
-        }, True)
+        return self._run_query(graphql_payload(
+            CREATE_ON_DEMAND_POD_MUTATION,
+            {'input': pod_config},
+            fields=CREATED_POD_FIELDS
+        ), True)
 
     # https://docs.runpod.io/docs/create-pod
+    # pod_config is the PodRentInterruptableInput as a dict (adds bidPerGpu)
     def create_spot_pod(self, pod_config):
-        return self._run_query({
-            "query": """
-                mutation {{
-                    podRentInterruptable(input: {{ {pod_config} }}) {{
-                        containerDiskInGb
-                        apiKey
-                        costPerHr
-                        desiredStatus
-                        dockerArgs
-                        dockerId
-                        gpuCount
-                        id
-                        imageName
-                        machineId
-                        memoryInGb
-                        name
-                        podType
-                        ports
-                        templateId
-                        uptimeSeconds
-                        vcpuCount
-                        version
-                        volumeEncrypted
-                        volumeInGb
-                        volumeKey
-                        volumeMountPath
-                        runtime {{
-                            uptimeInSeconds
-                            ports {{
-                                ip
-                                isIpPublic
-                                privatePort
-                                publicPort
-                                type
-                            }}
-                            gpus {{
-                                id
-                                gpuUtilPercent
-                                memoryUtilPercent
-                            }}
-                            container {{
-                                cpuPercent
-                                memoryPercent
-                            }}
-                        }}
-                        machine {{
-                            podHostId
-                        }}
-                    }}
-                }}
-            """.format(pod_config=pod_config)
-        }, True)
+        return self._run_query(graphql_payload(
+            CREATE_SPOT_POD_MUTATION,
+            {'input': pod_config},
+            fields=CREATED_POD_FIELDS
+        ), True)
 
+    # template is the SaveTemplateInput as a dict
     def create_template(self, template):
-        return self._run_query({
-            "query": """
-                mutation {{
-                    saveTemplate(input: {{ {template} }}) {{
-                        advancedStart
-                        containerDiskInGb
-                        dockerArgs
-                        env {{
-                            key
-                            value
-                        }}
-                        id
-                        imageName
-                        name
-                        ports
-                        readme
-                        startJupyter
-                        startScript
-                        startSsh
-                        volumeInGb
-                        volumeMountPath
-                    }}
-                }}
-            """.format(template=template)
-        }, True)
+        return self._run_query(graphql_payload(
+            SAVE_TEMPLATE_MUTATION,
+            {'input': template}
+        ), True)
 
     # https://docs.runpod.io/docs/updating-your-endpoint
     def update_min_workers(self, endpoint_id, value):
-        return self._run_query({
-            "query": """
-                mutation {{
-                    updateEndpointWorkersMin(input: {{ endpointId: "{endpoint_id}", workerCount: {value} }}) {{
-                        id
-                        templateId
-                        workersMin
-                        workersMax
-                    }}
-                }}
-            """.format(endpoint_id=endpoint_id, value=value)
-        }, True)
+        return self._run_query(graphql_payload(
+            UPDATE_MIN_WORKERS_MUTATION,
+            {'endpointId': endpoint_id, 'workerCount': int(value)},
+            fields=ENDPOINT_WORKERS_FIELDS
+        ), True)
 
     # https://docs.runpod.io/docs/updating-your-endpoint
     def update_max_workers(self, endpoint_id, value):
-        return self._run_query({
-            "query": """
-                mutation {{
-                    updateEndpointWorkersMax(input: {{ endpointId: "{endpoint_id}", workerCount: {value} }}) {{
-                        id
-                        templateId
-                        workersMin
-                        workersMax
-                    }}
-                }}
-            """.format(endpoint_id=endpoint_id, value=value)
-        }, True)
+        return self._run_query(graphql_payload(
+            UPDATE_MAX_WORKERS_MUTATION,
+            {'endpointId': endpoint_id, 'workerCount': int(value)},
+            fields=ENDPOINT_WORKERS_FIELDS
+        ), True)
 
     # https://docs.runpod.io/docs/updating-your-endpoint
     def update_endpoint_template(self, endpoint_id, template_id):
-        return self._run_query({
-            "query": """
-                mutation {{
-                    updateEndpointTemplate(input: {{ endpointId: "{endpoint_id}", templateId: "{template_id}" }}) {{
-                        id
-                        templateId
-                        workersMin
-                        workersMax
-                    }}
-                }}
-            """.format(endpoint_id=endpoint_id, template_id=template_id)
-        }, True)
-
-
-class Endpoints(object):
-    def __init__(self):
+        return self._run_query(graphql_payload(
+            UPDATE_ENDPOINT_TEMPLATE_MUTATION,
+            {'endpointId': endpoint_id, 'templateId': template_id},
+            fields=ENDPOINT_WORKERS_FIELDS
+        ), True)
+
+
+# Every API method builds its payload and hands it to _run_query, so overriding
+# _run_query with a coroutine makes each method awaitable, e.g.
+#     async with runpod.AsyncAPI() as api:
+#         responses = await runpod.gather_bounded(api.stop_pod(pod_id) for pod_id in pod_ids)
+class AsyncAPI(_AsyncPooledClient, API):
+    # Chunks of a batch are sent concurrently
+    async def _run_batch(self, batch, ids, chunk_size, auth_required, fields=''):
+        chunks = list(_chunks(ids, chunk_size or self.batch_size))
+        responses = await asyncio.gather(*(
+            self._run_query(_batch_payload(batch, chunk, fields), auth_required) for chunk in chunks
+        ))
+        results = {}
+        for chunk, response in zip(chunks, responses):
+            results.update(_batch_results(batch, chunk, response))
+        return results
+
+    async def _run_query(self, payload, auth_required=False):
+        if _is_mutation(payload):
+            return await self._run_with_retries(payload, auth_required)
+
+        key = _flight_key(payload, auth_required)
+        task = self._flights.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._run_with_retries(payload, auth_required))
+            self._flights[key] = task
+            task.add_done_callback(lambda _: self._flights.pop(key, None))
+
+        # Shielded so one caller being cancelled doesn't cancel the others
+        return await asyncio.shield(task)
+
+    async def _run_with_retries(self, payload, auth_required):
+        mutation = _is_mutation(payload)
+        started = time.monotonic()
+        attempt = 0
+
+        while True:
+            try:
+                response = await self._send_query(payload, auth_required)
+                error_class, error = classify_response(response, mutation), None
+            except httpx.HTTPError as e:
+                response, error_class, error = None, classify_exception(e, mutation), e
+
+            delay = self._retry_delay(error_class, attempt, started, response)
+            if delay is None:
+                if error is not None:
+                    raise error
+                return response
+
+            if self.on_retry:
+                self.on_retry(error_class, attempt + 1, delay)
+            # Task cancellation interrupts the sleep, cancel_event is checked per attempt
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def _send_query(self, payload, auth_required):
+        if self.persisted_queries:
+            response = await self._post(_persisted_payload(payload), auth_required)
+            error = _persisted_query_error(response)
+            if error is None:
+                return response
+            if error == 'PersistedQueryNotSupported':
+                self.persisted_queries = False
+            else:
+                payload = _persisted_payload(payload, include_query=True)
+
+        return await self._post(payload, auth_required)
+
+    async def _post(self, payload, auth_required):
+        if self.rate_limiter:
+            await self.rate_limiter.acquire_async()
+
+        response = await self.client.post(
+            GRAPHQL_URL,
+            params=self._query_params(auth_required),
+            content=dumps(payload),
+            headers={'Content-Type': 'application/json'}
+        )
+
+        return response
+
+
+# Launches count pods from one pod_config dict (see create_on_demand_pod) with at
+# most max_in_flight creates in flight. Names get a -01, -02, ... suffix. Every
+# slot retries capacity errors on its own until `deadline` seconds have passed;
+# a request that was already sent is always allowed to finish, so no pod is
+# created behind our back. Returns one result per slot, in slot order:
+#     [{'name': 'sweep-01', 'pod': {...}, 'error': None, 'seconds': 3.2}, ...]
+# on_result(result) is called as each slot finishes.
+async def create_pods_async(pod_config, count, spot=False, max_in_flight=5, deadline=600, on_result=None, **api_options):
+    semaphore = asyncio.Semaphore(max_in_flight)
+    stop_at = time.monotonic() + deadline
+    width = max(2, len(str(count)))
+    key = 'podRentInterruptable' if spot else 'podFindAndDeployOnDemand'
+    results = [None] * count
+
+    async def launch(api, slot):
+        name = f"{pod_config.get('name') or 'pod'}-{slot + 1:0{width}d}"
+        result = {'name': name, 'pod': None, 'error': None, 'seconds': 0}
+        async with semaphore:
+            start = time.monotonic()
+            if start >= stop_at:
+                result['error'] = 'Deadline passed before the pod was requested'
+            else:
+                config = dict(pod_config, name=name)
+                try:
+                    response = await (api.create_spot_pod(config) if spot else api.create_on_demand_pod(config))
+                    resp_json = response_json(response)
+                    pod = (resp_json.get('data') or {}).get(key)
+                    if response.status_code == 200 and pod and not resp_json.get('errors'):
+                        result['pod'] = pod
+                    else:
+                        messages = [error.get('message', '') for error in resp_json.get('errors') or []]
+                        result['error'] = '\n'.join(messages) or f'HTTP {response.status_code}'
+                except (httpx.HTTPError, ValueError) as e:
+                    result['error'] = str(e) or type(e).__name__
+            result['seconds'] = time.monotonic() - start
+
+        results[slot] = result
+        if on_result is not None:
+            on_result(result)
+
+    api_options = dict({'retry_on': RETRY_ALL, 'max_connections': max_in_flight}, **api_options)
+    async with AsyncAPI(deadline=stop_at, **api_options) as api:
+        await asyncio.gather(*(launch(api, slot) for slot in range(count)))
+    return results
+
+
+# Blocking create_pods_async for scripts and worker threads
+def create_pods(pod_config, count, **options):
+    return asyncio.run(create_pods_async(pod_config, count, **options))
+
+
+class Endpoints(_PooledClient):
+    def __init__(self, **client_options):
         # env = dotenv_values('.env')
         self.API_KEY = os.environ['RUNPOD_API_KEY']
-        self.headers = {
+        super().__init__(headers={
             'Accept': 'application/json',
             'Content-Type': 'application/json',
             'Authorization': self.API_KEY
-        }
+        }, **client_options)
 
     def get_dreambooth_health(self):
-        url = 'https://api.runpod.ai/v2/dream-booth-v1/health'
+        url = f'{ENDPOINTS_URL}/dream-booth-v1/health'
 
-        return httpx.get(
-            url,
-            headers=self.headers
-        )
+        return self.client.get(url)
 
     # https://docs.runpod.io/reference/dreambooth-sd-v15
     def train_dreambooth(self, payload):
-        url = 'https://api.runpod.ai/v2/dream-booth-v1/run'
+        url = f'{ENDPOINTS_URL}/dream-booth-v1/run'
 
-        return httpx.post(
+        return self.client.post(
             url,
-            json=payload,
-            headers=self.headers
+            json=payload
         )
 
     def cancel_dreambooth_training(self, job_id):
-        url = f'https://api.runpod.ai/v2/dream-booth-v1/cancel/{job_id}'
+        url = f'{ENDPOINTS_URL}/dream-booth-v1/cancel/{job_id}'
 
-        return httpx.post(url, headers=self.headers)
+        return self.client.post(url)
 
     # https://docs.runpod.io/reference/status
     def get_status(self, job_id):
-        url = f'https://api.runpod.ai/v2/dream-booth-v1/status/{job_id}'
+        url = f'{ENDPOINTS_URL}/dream-booth-v1/status/{job_id}'
+
+        return self.client.get(url)
+
 
-        return httpx.get(url, headers=self.headers)
+# Endpoints calls go straight to self.client, which returns coroutines here
+class AsyncEndpoints(_AsyncPooledClient, Endpoints):
+    pass
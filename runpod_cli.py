@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# Single entry point for every command:
+#
+#     python -m runpod_cli get-pods --fields status
+#     python -m runpod_cli --timings stop-pod --pod_id dg31b9aqtupn2z
+#
+# Command modules are only imported once their command is picked and httpx only
+# once a request is made, so --help and argument errors return right away. The
+# old per-command scripts (get_pods.py, ...) are aliases for these commands.
+import time
+
+_START = time.perf_counter()
+
+import argparse
+import importlib
+import os
+import sys
+
+# command -> (module, description). Modules provide add_arguments(parser) and main(args).
+COMMANDS = {
+    'get-pods': ('get_pods', 'Get all RunPod pods'),
+    'get-pod': ('get_pod', 'Get information about a RunPod pod'),
+    'get-details': ('get_details', 'Get the details of your RunPod account'),
+    'get-gpu-types': ('get_gpu_types', 'List the RunPod GPU types and their prices'),
+    'get-bid-price': ('get_bid_price', 'Get bid price for a specific RunPod GPU pod type'),
+    'select-gpu': ('gpu_selector', 'Rank the RunPod GPU types by throughput per dollar'),
+    'price-recorder': ('price_recorder', 'Record GPU prices over time and summarise their history'),
+    'get-image-tags': ('docker_tags', 'List the Docker Hub tags of an image repository'),
+    'create-pod': ('create_pod', 'Create an on-demand or spot RunPod pod'),
+    'create-on-demand-pod': ('create_on_demand_pod', 'Create the preset on-demand RunPod pod'),
+    'create-spot-pod': ('create_spot_pod', 'Create the preset spot RunPod pod'),
+    'place-pod': ('placement', 'Create a pod on the first of several placements with capacity'),
+    'start-on-demand-pod': ('start_on_demand_pod', 'Start an on-demand RunPod pod'),
+    'start-spot-pod': ('start_spot_pod', 'Start a spot RunPod pod'),
+    'stop-pod': ('stop_pod', 'Stop a RunPod pod'),
+    'terminate-pod': ('terminate_pod', 'Terminate a RunPod pod'),
+    'terminate-all-pods': ('terminate_all_pods', 'Terminate all RunPod pods'),
+    'fleet': ('fleet', 'Stop, terminate or resume the pods matching a selector, concurrently'),
+    'update-min-workers': ('update_min_workers', 'Update Min Workers for a Serverless Endpoint'),
+    'update-max-workers': ('update_max_workers', 'Update Max Workers for a Serverless Endpoint'),
+    'update-endpoint-template': ('update_endpoint_template', 'Update the Template for a Serverless Endpoint'),
+    'daemon': ('runpod_daemon', 'Serve the other commands and the GUI from one long-lived process'),
+}
+
+
+def get_parser():
+    parser = argparse.ArgumentParser(
+        prog='runpod_cli',
+        description='RunPod command line',
+        epilog='commands:\n' + '\n'.join(f'  {name:<26}{description}' for name, (_, description) in COMMANDS.items()),
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+
+    parser.add_argument(
+        '--timings', '-timings',
+        action='store_true',
+        help='print a startup time breakdown to stderr'
+    )
+
+    parser.add_argument(
+        'command',
+        metavar='command',
+        type=lambda name: name.replace('_', '-'),
+        choices=list(COMMANDS),
+        help='command to run, see below (get_pods and get-pods both work)'
+    )
+
+    parser.add_argument(
+        'args',
+        nargs=argparse.REMAINDER,
+        help='arguments of the command, see "runpod_cli <command> --help"'
+    )
+
+    return parser
+
+
+def run_command(command, argv, prog=None, timings=None):
+    module_name, description = COMMANDS[command]
+
+    start = time.perf_counter()
+    module = importlib.import_module(module_name)
+    if timings is not None:
+        timings.append((f'import {module_name}', time.perf_counter() - start))
+
+    parser = argparse.ArgumentParser(prog=prog or f'runpod_cli {command}', description=description)
+    module.add_arguments(parser)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    try:
+        return module.main(args)
+    finally:
+        if timings is not None:
+            timings.append(('run', time.perf_counter() - start))
+
+
+def print_timings(timings):
+    # stderr, the GUI parses stdout
+    runpod = sys.modules.get('runpod')
+    if runpod is not None:
+        for lazy in (runpod.httpx, runpod.asyncio):
+            if lazy.import_seconds is not None:
+                timings.append((f'  of which import {lazy.name}', lazy.import_seconds))
+    timings.append(('total', time.perf_counter() - _START))
+
+    for name, seconds in timings:
+        print(f'{name:<32} {seconds * 1000:8.1f} ms', file=sys.stderr)
+
+
+def main(argv=None):
+    timings = []
+    args = get_parser().parse_args(argv)
+    if args.timings:
+        timings.append(('cli startup', time.perf_counter() - _START))
+
+    try:
+        return run_command(args.command, args.args, timings=timings if args.timings else None)
+    finally:
+        if args.timings:
+            print_timings(timings)
+
+
+def alias(command):
+    # Entry point of the old per-command scripts, keeps their usage line
+    sys.exit(run_command(command, sys.argv[1:], prog=os.path.basename(sys.argv[0])))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,422 @@
+#!/usr/bin/env python3
+# Optional long-lived process serving API calls to the CLI and the GUI over a Unix
+# socket. They share its warm connection pool, GPU catalog and a short-lived pod
+# list cache, instead of each paying for interpreter start, imports and a cold TLS
+# handshake.
+#
+#     python -m runpod_cli daemon            # serve in the foreground
+#     python -m runpod_cli daemon --status
+#     python -m runpod_cli daemon --stop
+#
+# get_api() returns a DaemonClient when a daemon for the same API key is listening
+# and a plain runpod.API otherwise. The protocol is JSON-RPC 2.0, one object per line.
+import hashlib
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+
+import runpod
+from runpod import dumps, loads, pretty
+
+SOCKET_FILE = 'daemon.sock'
+# Seconds a get_pods result is reused, pod mutations drop it right away
+DEFAULT_POD_TTL = float(os.getenv('RUNPOD_DAEMON_POD_TTL', 2))
+CONNECT_TIMEOUT = 0.5
+
+# API methods served by the daemon
+READ_METHODS = {
+    'get_gpu_types', 'get_bid_price', 'get_bid_prices', 'get_pod', 'get_pods_by_id',
+    'get_pods', 'get_myself'
+}
+POD_MUTATIONS = {
+    'start_on_demand_pod', 'start_spot_pod', 'stop_pod', 'terminate_pod', 'stop_pods',
+    'terminate_pods', 'create_on_demand_pod', 'create_spot_pod'
+}
+OTHER_MUTATIONS = {'create_template', 'update_min_workers', 'update_max_workers', 'update_endpoint_template'}
+API_METHODS = READ_METHODS | POD_MUTATIONS | OTHER_MUTATIONS
+CONTROL_METHODS = {'ping', 'stats', 'shutdown'}
+
+# JSON-RPC error codes
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+SERVER_ERROR = -32000
+
+
+class DaemonError(Exception):
+    pass
+
+
+class DaemonUnavailable(DaemonError):
+    pass
+
+
+def socket_path():
+    return os.getenv('RUNPOD_DAEMON_SOCKET') or runpod.cache_path(SOCKET_FILE)
+
+
+def key_fingerprint(api_key):
+    # Lets a client check the daemon acts for the same account without sending the key
+    return hashlib.sha256((api_key or '').encode('utf-8')).hexdigest()[:16]
+
+
+class DaemonResponse(object):
+    # The parts of httpx.Response the scripts and runpod_models use
+    def __init__(self, status_code, content):
+        self.status_code = status_code
+        self.content = content
+
+    @property
+    def text(self):
+        return self.content.decode('utf-8')
+
+    def json(self):
+        return loads(self.content)
+
+
+def _encode_result(value):
+    if hasattr(value, 'status_code'):
+        return {'response': {'status_code': value.status_code, 'content': value.text}}
+    return {'value': value}
+
+
+def _decode_result(result):
+    if 'response' in result:
+        response = result['response']
+        return DaemonResponse(response['status_code'], response['content'].encode('utf-8'))
+    return result['value']
+
+
+class DaemonClient(object):
+    # Same methods as runpod.API, run by the daemon. Connection problems fall back
+    # to an in-process API unless a mutation may already have been sent.
+    def __init__(self, path=None):
+        self.path = path or socket_path()
+        self._sock = None
+        self._file = None
+        self._api = None
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    def connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(CONNECT_TIMEOUT)
+        try:
+            sock.connect(self.path)
+        except OSError as e:
+            sock.close()
+            raise DaemonUnavailable(f'No daemon listening on {self.path}: {e}')
+        # Calls can take as long as the daemon spends retrying
+        sock.settimeout(None)
+        self._sock = sock
+        self._file = sock.makefile('rb')
+
+    def call(self, method, *args, **kwargs):
+        with self._lock:
+            if self._sock is None:
+                self.connect()
+            self._next_id += 1
+            request = {
+                'jsonrpc': '2.0',
+                'id': self._next_id,
+                'method': method,
+                'params': {'args': list(args), 'kwargs': kwargs}
+            }
+            try:
+                self._sock.sendall(dumps(request) + b'\n')
+                line = self._file.readline()
+            except OSError as e:
+                self._disconnect()
+                raise DaemonError(f'Daemon connection failed: {e}')
+            if not line:
+                self._disconnect()
+                raise DaemonError('Daemon closed the connection')
+
+        reply = loads(line)
+        if 'error' in reply:
+            raise DaemonError(reply['error']['message'])
+        return reply['result']
+
+    def _call_api(self, method, *args, **kwargs):
+        try:
+            return _decode_result(self.call(method, *args, **kwargs))
+        except DaemonUnavailable:
+            pass
+        except DaemonError:
+            if method not in READ_METHODS:
+                raise
+        return getattr(self.fallback_api(), method)(*args, **kwargs)
+
+    def fallback_api(self):
+        if self._api is None:
+            self._api = runpod.API()
+        return self._api
+
+    def __getattr__(self, name):
+        if name not in API_METHODS:
+            raise AttributeError(name)
+        return lambda *args, **kwargs: self._call_api(name, *args, **kwargs)
+
+    def _disconnect(self):
+        if self._sock is not None:
+            self._file.close()
+            self._sock.close()
+            self._sock = None
+            self._file = None
+
+    def close(self):
+        self._disconnect()
+        if self._api is not None:
+            self._api.close()
+            self._api = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def get_api():
+    # DaemonClient when a daemon for this API key is listening, runpod.API otherwise.
+    # RUNPOD_DAEMON=0 always runs in-process.
+    if os.getenv('RUNPOD_DAEMON') == '0' or not hasattr(socket, 'AF_UNIX'):
+        return runpod.API()
+
+    path = socket_path()
+    if not os.path.exists(path):
+        return runpod.API()
+
+    client = DaemonClient(path)
+    try:
+        info = client.call('ping')
+    except DaemonError:
+        client.close()
+        return runpod.API()
+
+    if info['key'] != key_fingerprint(runpod.get_api_key()):
+        client.close()
+        return runpod.API()
+    return client
+
+
+class Daemon(object):
+    def __init__(self, api=None, pod_ttl=DEFAULT_POD_TTL):
+        import gpu_catalog
+
+        self.api = api or runpod.API()
+        # Its own catalog bound to the daemon's in-process API, never a client of itself
+        self.catalog = gpu_catalog.GpuCatalog(self.api)
+        self.pod_ttl = pod_ttl
+        self.server = None
+        self.started_at = time.time()
+        self.counters = {'requests': 0, 'errors': 0, 'pod_cache_hits': 0, 'pod_cache_misses': 0}
+        self.calls = {}
+        # dumps([args, kwargs]) of get_pods -> (fetched at, encoded result)
+        self._pods = {}
+        self._lock = threading.Lock()
+
+    def handle(self, line):
+        try:
+            request = loads(line)
+        except ValueError:
+            return _error(None, PARSE_ERROR, 'Parse error')
+        if not isinstance(request, dict):
+            return _error(None, INVALID_REQUEST, 'Invalid request')
+
+        request_id = request.get('id')
+        method = request.get('method')
+        params = request.get('params') or {}
+
+        with self._lock:
+            self.counters['requests'] += 1
+            if method not in API_METHODS and method not in CONTROL_METHODS:
+                self.counters['errors'] += 1
+                return _error(request_id, METHOD_NOT_FOUND, f'Method not found: {method}')
+            self.calls[method] = self.calls.get(method, 0) + 1
+
+        try:
+            result = self.call(method, params.get('args', []), params.get('kwargs', {}))
+        except Exception as e:
+            with self._lock:
+                self.counters['errors'] += 1
+            return _error(request_id, SERVER_ERROR, str(e) or type(e).__name__, {'type': type(e).__name__})
+        return {'jsonrpc': '2.0', 'id': request_id, 'result': result}
+
+    def call(self, method, args, kwargs):
+        if method == 'ping':
+            return {'pid': os.getpid(), 'key': key_fingerprint(self.api.API_KEY)}
+        if method == 'stats':
+            return self.stats()
+        if method == 'shutdown':
+            # shutdown() waits for serve_forever, which is waiting for this handler
+            threading.Thread(target=self.server.shutdown, daemon=True).start()
+            return True
+
+        if method == 'get_pods':
+            return self.get_pods(args, kwargs)
+        if method == 'get_gpu_types' and self._catalog_fields(args, kwargs):
+            return self.get_gpu_types()
+
+        result = _encode_result(getattr(self.api, method)(*args, **kwargs))
+        if method in POD_MUTATIONS:
+            with self._lock:
+                self._pods.clear()
+        return result
+
+    def get_pods(self, args, kwargs):
+        key = dumps([args, kwargs])
+        with self._lock:
+            cached = self._pods.get(key)
+            if cached is not None and time.time() - cached[0] < self.pod_ttl:
+                self.counters['pod_cache_hits'] += 1
+                return cached[1]
+            self.counters['pod_cache_misses'] += 1
+
+        # Concurrent misses share one request through the API's single-flight
+        fetched_at = time.time()
+        response = self.api.get_pods(*args, **kwargs)
+        result = _encode_result(response)
+        if response.status_code == 200 and b'"errors"' not in response.content:
+            with self._lock:
+                self._pods[key] = (fetched_at, result)
+        return result
+
+    def _catalog_fields(self, args, kwargs):
+        fields = args[0] if args else kwargs.get('fields', 'full')
+        return fields == 'full'
+
+    def get_gpu_types(self):
+        import gpu_catalog
+
+        try:
+            # Never a stale copy: clients cache it as fetched at fetchedAt
+            gpu_types = self.catalog.get_gpu_types(fresh=True)
+        except gpu_catalog.CatalogError:
+            # Pass the API's own error response on to the client
+            return _encode_result(self.api.get_gpu_types())
+        content = dumps({'data': {'gpuTypes': gpu_types}, 'fetchedAt': self.catalog.fetched_at}).decode('utf-8')
+        return {'response': {'status_code': 200, 'content': content}}
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counters, calls=dict(self.calls))
+        stats['pid'] = os.getpid()
+        stats['uptime'] = round(time.time() - self.started_at, 1)
+        if self.api.rate_limiter is not None:
+            stats['rate_limiter'] = self.api.rate_limiter.stats()
+        return stats
+
+
+def _error(request_id, code, message, data=None):
+    error = {'code': code, 'message': message}
+    if data is not None:
+        error['data'] = data
+    return {'jsonrpc': '2.0', 'id': request_id, 'error': error}
+
+
+def _make_server(path, daemon):
+    import socketserver
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            for line in self.rfile:
+                if line.strip():
+                    self.wfile.write(dumps(daemon.handle(line)) + b'\n')
+
+    class Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+
+    # Only this user may talk to the daemon, it acts with their API key
+    old_umask = os.umask(0o177)
+    try:
+        return Server(path, Handler)
+    finally:
+        os.umask(old_umask)
+
+
+def serve(path=None, pod_ttl=DEFAULT_POD_TTL, on_ready=None):
+    path = path or socket_path()
+
+    if os.path.exists(path):
+        try:
+            DaemonClient(path).call('ping')
+        except DaemonError:
+            os.remove(path)  # left behind by a daemon that was killed
+        else:
+            raise DaemonError(f'A daemon is already listening on {path}')
+
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    daemon = Daemon(pod_ttl=pod_ttl)
+    daemon.server = _make_server(path, daemon)
+    if on_ready is not None:
+        on_ready(daemon)
+
+    try:
+        daemon.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        daemon.server.server_close()
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        daemon.api.close()
+
+
+def add_arguments(parser):
+    parser.add_argument(
+        '--status', '-status',
+        action='store_true',
+        help='print the counters of the running daemon'
+    )
+
+    parser.add_argument(
+        '--stop', '-stop',
+        action='store_true',
+        help='stop the running daemon'
+    )
+
+    parser.add_argument(
+        '--socket', '-socket',
+        type=str,
+        default=None,
+        help='socket path (default: RUNPOD_DAEMON_SOCKET or daemon.sock in the cache dir)'
+    )
+
+    parser.add_argument(
+        '--pod_ttl', '-pod_ttl',
+        type=float,
+        default=DEFAULT_POD_TTL,
+        help=f'seconds a pod list is reused (default: {DEFAULT_POD_TTL:g})'
+    )
+
+
+def main(args):
+    if not hasattr(socket, 'AF_UNIX'):
+        print('ERROR: The daemon needs Unix domain sockets')
+        return 1
+
+    path = args.socket or socket_path()
+
+    if args.status or args.stop:
+        try:
+            with DaemonClient(path) as client:
+                result = client.call('stats' if args.status else 'shutdown')
+        except DaemonError as e:
+            print(f'ERROR: {e}')
+            return 1
+        print(pretty(result) if args.status else f'Daemon on {path} stopped')
+        return
+
+    # Let "kill" remove the socket on the way out as well
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        serve(path, args.pod_ttl, on_ready=lambda daemon: print(f'Serving on {path} (pid {os.getpid()})', flush=True))
+    except DaemonError as e:
+        print(f'ERROR: {e}')
+        return 1
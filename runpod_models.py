@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+# Compact typed models for GraphQL results. Every model uses __slots__ and is
+# decoded straight from the response dicts; pass keep_raw=True to keep the
+# original dict on .raw as well.
+#
+#     pods = runpod_models.pods_from_response(api.get_pods('status'))
+#     pods[0].runtime.ports[0].public_port
+#
+# When msgspec is installed the *_from_response helpers decode the response
+# bytes straight into msgspec Structs generated from the same field specs, with
+# the same attributes and properties, skipping the intermediate dicts.
+import functools
+from typing import Any, List, Optional
+
+from runpod import msgspec, response_json
+
+
+class ResponseError(Exception):
+    def __init__(self, messages, status_code=200):
+        super().__init__('\n'.join(messages) or f'HTTP {status_code}')
+        self.messages = messages
+        self.status_code = status_code
+
+
+class Model(object):
+    __slots__ = ('raw',)
+    # (attribute, GraphQL key or key path, nested decoder or None)
+    _fields = ()
+
+    @classmethod
+    def from_dict(cls, data, keep_raw=False):
+        if data is None:
+            return None
+
+        obj = cls.__new__(cls)
+        for attr, key, decode in cls._fields:
+            if isinstance(key, tuple):
+                value = data
+                for part in key:
+                    value = value.get(part) if value is not None else None
+            else:
+                value = data.get(key)
+            if decode is not None and value is not None:
+                value = decode(value, keep_raw)
+            setattr(obj, attr, value)
+        obj.raw = data if keep_raw else None
+        return obj
+
+    @classmethod
+    def from_list(cls, items, keep_raw=False):
+        return [cls.from_dict(item, keep_raw) for item in items or []]
+
+    def to_dict(self):
+        data = {}
+        for attr, key, decode in self._fields:
+            value = getattr(self, attr)
+            if isinstance(value, Model):
+                value = value.to_dict()
+            elif isinstance(value, list):
+                value = [item.to_dict() if isinstance(item, Model) else item for item in value]
+            if isinstance(key, tuple):
+                data.setdefault(key[0], {})[key[1]] = value
+            else:
+                data[key] = value
+        return data
+
+    def __eq__(self, other):
+        return type(self) is type(other) and all(
+            getattr(self, attr) == getattr(other, attr) for attr, _, _ in self._fields
+        )
+
+    def __repr__(self):
+        fields = ', '.join(f'{attr}={getattr(self, attr)!r}' for attr, _, _ in self._fields[:3])
+        return f'{type(self).__name__}({fields})'
+
+
+def _many(model):
+    decode = lambda items, keep_raw: model.from_list(items, keep_raw)
+    decode.model, decode.many = model, True
+    return decode
+
+
+def _one(model):
+    decode = lambda item, keep_raw: model.from_dict(item, keep_raw)
+    decode.model, decode.many = model, False
+    return decode
+
+
+class Port(Model):
+    __slots__ = ('ip', 'is_ip_public', 'private_port', 'public_port', 'type')
+    _fields = (
+        ('ip', 'ip', None),
+        ('is_ip_public', 'isIpPublic', None),
+        ('private_port', 'privatePort', None),
+        ('public_port', 'publicPort', None),
+        ('type', 'type', None),
+    )
+
+
+class PodGpu(Model):
+    __slots__ = ('id', 'gpu_util_percent', 'memory_util_percent')
+    _fields = (
+        ('id', 'id', None),
+        ('gpu_util_percent', 'gpuUtilPercent', None),
+        ('memory_util_percent', 'memoryUtilPercent', None),
+    )
+
+
+class PodRuntime(Model):
+    __slots__ = ('uptime_in_seconds', 'ports', 'gpus', 'cpu_percent', 'memory_percent')
+    _fields = (
+        ('uptime_in_seconds', 'uptimeInSeconds', None),
+        ('ports', 'ports', _many(Port)),
+        ('gpus', 'gpus', _many(PodGpu)),
+        ('cpu_percent', ('container', 'cpuPercent'), None),
+        ('memory_percent', ('container', 'memoryPercent'), None),
+    )
+
+
+class Pod(Model):
+    __slots__ = (
+        'id', 'name', 'image_name', 'template_id', 'machine_id', 'desired_status', 'pod_type',
+        'cost_per_hr', 'lowest_bid_price_to_resume', 'gpu_count', 'container_disk_in_gb',
+        'volume_in_gb', 'memory_in_gb', 'vcpu_count', 'ports', 'volume_mount_path',
+        'runtime', 'pod_host_id'
+    )
+    _fields = (
+        ('id', 'id', None),
+        ('name', 'name', None),
+        ('image_name', 'imageName', None),
+        ('template_id', 'templateId', None),
+        ('machine_id', 'machineId', None),
+        ('desired_status', 'desiredStatus', None),
+        ('pod_type', 'podType', None),
+        ('cost_per_hr', 'costPerHr', None),
+        ('lowest_bid_price_to_resume', 'lowestBidPriceToResume', None),
+        ('gpu_count', 'gpuCount', None),
+        ('container_disk_in_gb', 'containerDiskInGb', None),
+        ('volume_in_gb', 'volumeInGb', None),
+        ('memory_in_gb', 'memoryInGb', None),
+        ('vcpu_count', 'vcpuCount', None),
+        ('ports', 'ports', None),
+        ('volume_mount_path', 'volumeMountPath', None),
+        ('runtime', 'runtime', _one(PodRuntime)),
+        ('pod_host_id', ('machine', 'podHostId'), None),
+    )
+
+    @property
+    def is_spot(self):
+        return self.pod_type == 'INTERRUPTABLE'
+
+
+class GpuType(Model):
+    __slots__ = (
+        'id', 'display_name', 'manufacturer', 'memory_in_gb', 'max_gpu_count', 'cuda_cores',
+        'secure_cloud', 'community_cloud', 'secure_price', 'community_price',
+        'minimum_bid_price', 'uninterruptable_price'
+    )
+    _fields = (
+        ('id', 'id', None),
+        ('display_name', 'displayName', None),
+        ('manufacturer', 'manufacturer', None),
+        ('memory_in_gb', 'memoryInGb', None),
+        ('max_gpu_count', 'maxGpuCount', None),
+        ('cuda_cores', 'cudaCores', None),
+        ('secure_cloud', 'secureCloud', None),
+        ('community_cloud', 'communityCloud', None),
+        ('secure_price', 'securePrice', None),
+        ('community_price', 'communityPrice', None),
+        ('minimum_bid_price', ('lowestPrice', 'minimumBidPrice'), None),
+        ('uninterruptable_price', ('lowestPrice', 'uninterruptablePrice'), None),
+    )
+
+    # Prices are None when the GPU isn't offered on that cloud
+    @property
+    def available_secure_price(self):
+        return self.secure_price if self.secure_cloud else None
+
+    @property
+    def available_community_price(self):
+        return self.community_price if self.community_cloud else None
+
+
+class EnvVar(Model):
+    __slots__ = ('key', 'value')
+    _fields = (
+        ('key', 'key', None),
+        ('value', 'value', None),
+    )
+
+
+class Template(Model):
+    __slots__ = (
+        'id', 'name', 'image_name', 'is_public', 'is_serverless', 'ports', 'container_disk_in_gb',
+        'volume_in_gb', 'volume_mount_path', 'docker_args', 'start_jupyter', 'start_ssh', 'env'
+    )
+    _fields = (
+        ('id', 'id', None),
+        ('name', 'name', None),
+        ('image_name', 'imageName', None),
+        ('is_public', 'isPublic', None),
+        ('is_serverless', 'isServerless', None),
+        ('ports', 'ports', None),
+        ('container_disk_in_gb', 'containerDiskInGb', None),
+        ('volume_in_gb', 'volumeInGb', None),
+        ('volume_mount_path', 'volumeMountPath', None),
+        ('docker_args', 'dockerArgs', None),
+        ('start_jupyter', 'startJupyter', None),
+        ('start_ssh', 'startSsh', None),
+        ('env', 'env', _many(EnvVar)),
+    )
+
+
+class Endpoint(Model):
+    __slots__ = (
+        'id', 'name', 'template_id', 'gpu_ids', 'idle_timeout', 'locations', 'network_volume_id',
+        'scaler_type', 'scaler_value', 'workers_min', 'workers_max', 'workers_standby'
+    )
+    _fields = (
+        ('id', 'id', None),
+        ('name', 'name', None),
+        ('template_id', 'templateId', None),
+        ('gpu_ids', 'gpuIds', None),
+        ('idle_timeout', 'idleTimeout', None),
+        ('locations', 'locations', None),
+        ('network_volume_id', 'networkVolumeId', None),
+        ('scaler_type', 'scalerType', None),
+        ('scaler_value', 'scalerValue', None),
+        ('workers_min', 'workersMin', None),
+        ('workers_max', 'workersMax', None),
+        ('workers_standby', 'workersStandby', None),
+    )
+
+
+def response_data(response):
+    # The 'data' dict of a GraphQL response, ResponseError for HTTP or GraphQL errors
+    try:
+        resp_json = response_json(response)
+    except ValueError:
+        raise ResponseError([], response.status_code)
+
+    _check(response.status_code, resp_json.get('errors'), resp_json.get('data'))
+    return resp_json['data']
+
+
+def _check(status_code, errors, data):
+    if status_code != 200 or errors or data is None:
+        messages = [error.get('message', '') for error in errors or []]
+        raise ResponseError(messages, status_code)
+
+
+def _flattened(key):
+    # Property exposing data['machine']['podHostId'] style fields as one attribute
+    outer, attr = key
+    return property(lambda self: getattr(getattr(self, outer), attr, None))
+
+
+@functools.lru_cache(maxsize=None)
+def struct_type(model):
+    # msgspec Struct mirroring `model`: same attribute names, properties and to_dict
+    fields, rename, namespace, nested = [], {}, {}, {}
+
+    for attr, key, decode in model._fields:
+        if isinstance(key, tuple):
+            nested.setdefault(key[0], []).append((attr, key[1]))
+            namespace[attr] = _flattened((key[0], attr))
+            continue
+        field_type = Any
+        if decode is not None:
+            field_type = struct_type(decode.model)
+            field_type = List[field_type] if decode.many else field_type
+        fields.append((attr, Optional[field_type], None))
+        rename[attr] = key
+
+    for outer, inner in nested.items():
+        inner_type = msgspec.defstruct(
+            f'{model.__name__}_{outer}',
+            [(attr, Any, None) for attr, _ in inner],
+            rename={attr: key for attr, key in inner},
+            gc=False
+        )
+        fields.append((outer, Optional[inner_type], None))
+        rename[outer] = outer
+
+    for name, value in vars(model).items():
+        if isinstance(value, property):
+            namespace[name] = value
+    namespace['to_dict'] = lambda self: msgspec.to_builtins(self)
+    namespace['raw'] = None
+
+    return msgspec.defstruct(model.__name__, fields, rename=rename, namespace=namespace, gc=False)
+
+
+@functools.lru_cache(maxsize=None)
+def _envelope_type(path, model, many):
+    # {"data": {path[0]: {path[1]: [Model]}}, "errors": [...]}
+    value_type = struct_type(model)
+    value_type = Optional[List[value_type] if many else value_type]
+    for i, key in enumerate(reversed(path)):
+        value_type = Optional[msgspec.defstruct(f'{model.__name__}Envelope{i}', [(key, value_type, None)])]
+    return msgspec.defstruct(f'{model.__name__}Response', [
+        ('data', value_type, None),
+        ('errors', Optional[List[Any]], None),
+    ])
+
+
+def _from_response(response, path, model, many, keep_raw):
+    if msgspec is not None and not keep_raw:
+        try:
+            envelope = msgspec.json.decode(response.content, type=_envelope_type(path, model, many))
+        except msgspec.DecodeError:
+            raise ResponseError([], response.status_code)
+        _check(response.status_code, envelope.errors, envelope.data)
+        value = envelope.data
+        for key in path:
+            value = getattr(value, key) if value is not None else None
+        return (value or []) if many else value
+
+    value = response_data(response)
+    for key in path:
+        value = (value or {}).get(key)
+    return model.from_list(value, keep_raw) if many else model.from_dict(value, keep_raw)
+
+
+def pods_from_response(response, keep_raw=False):
+    return _from_response(response, ('myself', 'pods'), Pod, True, keep_raw)
+
+
+def pod_from_response(response, keep_raw=False):
+    return _from_response(response, ('pod',), Pod, False, keep_raw)
+
+
+def gpu_types_from_response(response, keep_raw=False):
+    return _from_response(response, ('gpuTypes',), GpuType, True, keep_raw)
+
+
+def endpoints_from_response(response, keep_raw=False):
+    return _from_response(response, ('myself', 'endpoints'), Endpoint, True, keep_raw)
+
+
+def templates_from_response(response, keep_raw=False):
+    return _from_response(response, ('myself', 'podTemplates'), Template, True, keep_raw)
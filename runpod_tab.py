@@ -1,35 +1,202 @@
 import sys
 import os
 import json
-import subprocess
+import argparse
+import threading
 import time
-import datetime
-from PyQt5.QtWidgets import QApplication, QWidget, QComboBox, QCheckBox, QLabel, QLineEdit, QVBoxLayout, QPushButton, QGridLayout, QRadioButton, QButtonGroup, QScrollArea, QHBoxLayout, QGroupBox, QInputDialog, QStyle, QSpacerItem, QSizePolicy
-from PyQt5.QtCore import Qt
+from PyQt5.QtWidgets import QApplication, QWidget, QComboBox, QCheckBox, QLabel, QLineEdit, QVBoxLayout, QPushButton, QGridLayout, QRadioButton, QButtonGroup, QHBoxLayout, QGroupBox, QInputDialog, QStyle, QSpacerItem, QSizePolicy, QTableView, QAbstractItemView
+from PyQt5.QtCore import Qt, QEvent
 from PyQt5.QtGui import QFont
-from PyQt5.QtCore import QThread, pyqtSignal
+from PyQt5.QtCore import QThread, QObject, QRunnable, QThreadPool, pyqtSignal
 
 # Add runpod-api to the path
 current_path = os.path.dirname(os.path.abspath(__file__))
 preset_json = os.path.join(current_path, 'runpod_presets.json')
 api_key_file = os.path.join(current_path, 'api_key.json')
 
-from get_gpu_types import get_gpu_types
+import create_pod
+import gpu_catalog
+import runpod
+import runpod_daemon
 from get_templates import get_latest_tags, get_all_tags
+from pod_table import ACTION_COLUMN, POD_TABLE_FIELDS, PodActionDelegate, PodFilterProxyModel, PodTableModel
+from runpod_models import GpuType, Pod, pods_from_response, response_data
+
+# Image repos listed in the image combo box, (repo, only the latest tag of each variant)
+IMAGE_REPOS = [('runpod/pytorch', False), ('runpod/stable-diffusion', True)]
+IMAGE_TAGS_CACHE = 'image_tags.json'
+
+
+def load_cached_tags():
+    # repo -> tags from the last run, shown until the fetch finishes
+    try:
+        with open(runpod.cache_path(IMAGE_TAGS_CACHE), 'rb') as f:
+            return runpod.loads(f.read())
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def save_cached_tags(image_tags):
+    runpod.write_atomic(runpod.cache_path(IMAGE_TAGS_CACHE), runpod.dumps(image_tags))
+
+
+def pod_state(pod):
+    # What counts as a change for the polling interval, uptime and utilisation tick on every poll
+    return (pod.id, pod.name, pod.desired_status, pod.pod_type, pod.cost_per_hr, pod.image_name, pod.runtime is None)
+
+
+def pod_transitioning(pod):
+    # Starting up (no runtime yet) or in a state other than running/exited
+    if pod.desired_status == 'RUNNING':
+        return pod.runtime is None
+    return pod.desired_status not in ('EXITED', 'TERMINATED')
 
 
 class PodRefresher(QThread):
+    # Polls the pod list on its own thread. While pods are changing or starting, and
+    # for fast_window seconds after poll_soon() (called after create/start/stop), it
+    # polls every min_interval seconds; once the list is stable the interval doubles
+    # up to max_interval. It pauses while the window is hidden and stop() ends it
+    # between two polls. get_pods(api) is passed the refresher's own API (its own
+    # daemon connection), so a poll never waits behind an action.
     podsRefreshed = pyqtSignal(list)
 
-    def __init__(self, get_pods):
+    def __init__(self, get_pods, interval=5, min_interval=1, max_interval=60, fast_window=30):
         super().__init__()
         self.get_pods = get_pods
+        self.interval = interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.fast_window = fast_window
+        self.fast_until = 0
+        self.state = None
+        self.paused = False
+        self.polls = 0
+        self.changes = 0
+        self.errors = 0
+        self.wake_event = threading.Event()
+        self.stop_event = threading.Event()
+        self.api = None
+
+    def stats(self):
+        return {
+            'interval': self.interval,
+            'polls': self.polls,
+            'changes': self.changes,
+            'errors': self.errors,
+            'paused': self.paused,
+        }
+
+    def poll_soon(self):
+        self.fast_until = time.monotonic() + self.fast_window
+        self.interval = self.min_interval
+        self.wake_event.set()
+
+    def set_paused(self, paused):
+        if paused == self.paused:
+            return
+        self.paused = paused
+        if not paused:
+            # The list may be minutes old, catch up right away
+            self.wake_event.set()
+
+    def stop(self):
+        self.stop_event.set()
+        self.wake_event.set()
 
     def run(self):
-        while True:
-            pod_infos = self.get_pods()
+        # The window fetches the first list itself, so wait before the first poll
+        try:
+            while True:
+                self.wake_event.wait(None if self.paused else self.interval)
+                self.wake_event.clear()
+                if self.stop_event.is_set():
+                    return
+                if not self.paused:
+                    self.poll()
+        finally:
+            if self.api is not None:
+                self.api.close()
+                self.api = None
+
+    def poll(self):
+        try:
+            # Created on this thread and only used here
+            if self.api is None:
+                self.api = runpod_daemon.get_api()
+            pod_infos = self.get_pods(self.api)
+        except Exception as e:
+            print(f"Error getting pods: {e}")
+            self.errors += 1
+            self.interval = min(self.interval * 2, self.max_interval)
+            return
+        self.polls += 1
+
+        state = hash(tuple(pod_state(pod) for pod in pod_infos))
+        changed = state != self.state
+        if changed:
+            self.changes += 1
+        self.state = state
+
+        if changed or time.monotonic() < self.fast_until or any(pod_transitioning(pod) for pod in pod_infos):
+            self.interval = self.min_interval
+        else:
+            self.interval = min(self.interval * 2, self.max_interval)
+        # A poll that ends after stop() does not signal the closing window
+        if not self.stop_event.is_set():
             self.podsRefreshed.emit(pod_infos)
-            self.sleep(5)  # Sleep for 5 seconds
+
+class WorkerSignals(QObject):
+    result = pyqtSignal(object)
+    error = pyqtSignal(str)
+    progress = pyqtSignal(str)
+    finished = pyqtSignal()
+
+
+class Worker(QRunnable):
+    # Runs fn(worker, *args) on a QThreadPool. Results, errors and progress come
+    # back through signals, which Qt delivers on the GUI thread.
+    def __init__(self, fn, *args):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.fn = fn
+        self.args = args
+        self.signals = WorkerSignals()
+        # Passed to runpod.API as cancel_event, stops pending retries
+        self.cancel_event = threading.Event()
+        # Set when the window closes, nothing is emitted after that
+        self.detached = False
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def detach(self):
+        self.detached = True
+        self.cancel()
+
+    def emit(self, signal, *args):
+        if not self.detached:
+            signal.emit(*args)
+
+    def progress(self, message):
+        self.emit(self.signals.progress, message)
+
+    def report_retry(self, error_class, attempt, delay):
+        reason = '暂无可用 GPU' if error_class == runpod.CAPACITY else f'请求失败 ({error_class})'
+        self.progress(f'{reason}，{delay:.0f} 秒后重试 (第 {attempt} 次)')
+
+    def run(self):
+        try:
+            if self.cancel_event.is_set():
+                raise RuntimeError('已取消')
+            result = self.fn(self, *self.args)
+        except Exception as e:
+            self.emit(self.signals.error, str(e) or type(e).__name__)
+        else:
+            self.emit(self.signals.result, result)
+        finally:
+            self.emit(self.signals.finished)
+
 
 class CustomComboBox(QComboBox):
     def __init__(self, parent=None):
@@ -37,22 +204,31 @@ class CustomComboBox(QComboBox):
         self.last_update = 0
 
     def showPopup(self):
-        current_time = time.time()
-        if current_time - self.last_update > 60:
-            self.parent().update_gpu_types()
-            self.last_update = current_time
+        # Opens with the current list right away, a refresh updates the items in place when it lands
         super().showPopup()
+        if time.time() - self.last_update > 60:
+            self.parent().update_gpu_types()
 
 class GPUSelector(QWidget):
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Runpod Deployment Tool")
+        # Button actions run here so the window never waits on the network
+        self.thread_pool = QThreadPool()
+        self.thread_pool.setMaxThreadCount(4)
+        self.workers = set()
+        self.gpu_types_worker = None
+        # Startup fetches still running and how long each one took
+        self.startup_start = time.perf_counter()
+        self.startup_pending = set()
+        self.startup_timings = []
         
         # Check for API key
         self.api_key = self.get_api_key()
         if not self.api_key:
             self.initApiKeyUI()
         else:
+            self.use_api_key()
             self.initUI()
         
             # Create a PodRefresher object and move it to a new thread
@@ -70,6 +246,10 @@ class GPUSelector(QWidget):
             except FileNotFoundError:
                 pass
         return api_key
+
+    def use_api_key(self):
+        # Set here on the GUI thread, before any worker or the refresher creates an API
+        os.environ['RUNPOD_API_KEY'] = self.api_key
         
     def initApiKeyUI(self):
         main_layout = QVBoxLayout()
@@ -108,20 +288,44 @@ class GPUSelector(QWidget):
         self.setLayout(main_layout)
 
     def stop_pod_refresher(self):
+        # Lets a poll in flight finish instead of killing the thread mid-request
         if hasattr(self, 'pod_refresher'):
-            self.pod_refresher.terminate()
+            self.pod_refresher.stop()
             self.pod_refresher.wait()
 
+    def poll_pods_soon(self):
+        # After an action the pods change state for a while, poll fast until they settle
+        if hasattr(self, 'pod_refresher'):
+            self.pod_refresher.poll_soon()
+        else:
+            self.refresh_pods()
+
+    def update_pod_refresher(self):
+        if hasattr(self, 'pod_refresher'):
+            self.pod_refresher.set_paused(self.isMinimized() or not self.isVisible())
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.update_pod_refresher()
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self.update_pod_refresher()
+
+    def changeEvent(self, event):
+        super().changeEvent(event)
+        if event.type() == QEvent.WindowStateChange:
+            self.update_pod_refresher()
+
     def submit_api_key(self):
         try:
             self.api_key = self.api_key_edit.text()
             # Save the API key to a file
             with open(api_key_file, 'w') as f:
                 json.dump({'RUNPOD_API_KEY': self.api_key}, f)
+            self.use_api_key()
             # Clear the current layout
             self.clear_layout(self.layout())
-            # get gpu types
-            self.gpu_types = sorted(get_gpu_types(), key=lambda gpu: gpu['memoryInGb'])
             # Load the main UI
             self.initUI()
             # self.setMinimumSize(1200, 800)
@@ -166,11 +370,9 @@ class GPUSelector(QWidget):
         self.image_combo.setMaxVisibleItems(30)
         layout.addWidget(QLabel('镜像名:'), 1, 0)
         layout.addWidget(self.image_combo, 1, 1)
-        repo_sd_tags = get_latest_tags('runpod/stable-diffusion')
-        repo_torch_tags = get_all_tags('runpod/pytorch')
-        tags = repo_torch_tags + repo_sd_tags
-        for tag in tags:
-            self.image_combo.addItem(tag)
+        # Last known tags and GPU types first, load_startup_data fetches the current ones
+        self.image_tags = load_cached_tags()
+        self.show_image_tags()
 
         layout.addWidget(QLabel('GPU 信息:'), 2, 0)
         self.gpu_combo = QComboBox()
@@ -178,7 +380,7 @@ class GPUSelector(QWidget):
         self.gpu_combo.setMaxVisibleItems(30)
         self.gpu_combo.setFixedHeight(40)
         # self.gpu_combo.setFont(font)
-        self.update_gpu_types()
+        self.set_gpu_types(gpu_catalog.get_catalog().get_cached_gpu_types())
         layout.addWidget(self.gpu_combo, 2, 1, 1, 3)
 
         self.cloud_type_group = QButtonGroup(self)
@@ -236,26 +438,54 @@ class GPUSelector(QWidget):
         self.create_button.clicked.connect(self.create_pod)
         layout.addWidget(self.create_button, 7, 0, 1, 4)
 
-        self.pod_status_area = QScrollArea()
-        # self.pod_status_area.setFixedHeight(200)
-        self.pod_status_area.setWidgetResizable(True)
-        scroll_content = QWidget(self.pod_status_area)
-        self.pod_status_layout = QVBoxLayout(scroll_content)
-        self.pod_status_layout.setAlignment(Qt.AlignTop)
-        self.pod_status_area.setWidget(scroll_content)
-        layout.addWidget(self.pod_status_area, 8, 0, 1, 4)
-        
-        self.refresh_pods()
+        self.pod_filter_edit = QLineEdit()
+        self.pod_filter_edit.setPlaceholderText('名称, ID, 状态, 镜像...')
+        layout.addWidget(QLabel('筛选:'), 8, 0)
+        layout.addWidget(self.pod_filter_edit, 8, 1, 1, 3)
+
+        # Pod list: the model keeps the pods, the proxy sorts and filters them and
+        # the delegate draws the start/stop and terminate buttons of each row
+        self.pod_model = PodTableModel(self)
+        self.pod_proxy = PodFilterProxyModel(self)
+        self.pod_proxy.setSourceModel(self.pod_model)
+        self.pod_filter_edit.textChanged.connect(self.pod_proxy.setFilterFixedString)
+        self.pod_delegate = PodActionDelegate(self)
+        self.pod_delegate.actionTriggered.connect(self.run_pod_action)
+
+        self.pod_table = QTableView()
+        self.pod_table.setModel(self.pod_proxy)
+        self.pod_table.setItemDelegateForColumn(ACTION_COLUMN, self.pod_delegate)
+        self.pod_table.setSortingEnabled(True)
+        self.pod_table.sortByColumn(0, Qt.AscendingOrder)
+        self.pod_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.pod_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.pod_table.verticalHeader().hide()
+        self.pod_table.verticalHeader().setDefaultSectionSize(34)
+        self.pod_table.horizontalHeader().setStretchLastSection(True)
+        self.pod_table.horizontalHeader().setMinimumSectionSize(60)
+        self.pod_table.setColumnWidth(ACTION_COLUMN, 140)
+        self.pod_table.setMinimumHeight(200)
+        layout.addWidget(self.pod_table, 9, 0, 1, 4)
 
         self.delete_all_button = QPushButton('删除所有')
         self.delete_all_button.setFixedHeight(50)
         self.delete_all_button.clicked.connect(self.delete_all_pods)
-        layout.addWidget(self.delete_all_button, 9, 0, 1, 3)
+        layout.addWidget(self.delete_all_button, 10, 0, 1, 3)
 
         self.refresh_button = QPushButton('刷新')
         self.refresh_button.setFixedHeight(50)
         self.refresh_button.clicked.connect(self.refresh_pods)
-        layout.addWidget(self.refresh_button, 9, 3, 1, 1)
+        layout.addWidget(self.refresh_button, 10, 3, 1, 1)
+
+        self.status_label = QLabel('')
+        layout.addWidget(self.status_label, 11, 0, 1, 3)
+
+        self.cancel_button = QPushButton('取消')
+        self.cancel_button.setEnabled(False)
+        self.cancel_button.clicked.connect(self.cancel_actions)
+        layout.addWidget(self.cancel_button, 11, 3, 1, 1)
+
+        self.load_startup_data()
 
         # self.api_key_edit = QLineEdit()
         # self.api_key_edit.setEchoMode(QLineEdit.Password)  # 设置输入框的回显模式为密码模式
@@ -274,138 +504,284 @@ class GPUSelector(QWidget):
 # funnctions
 ###################################
 
-    def update_gpu_types(self):
+    def load_startup_data(self):
+        # Everything the window shows is fetched at once on the thread pool, the
+        # window is already up with the cached values and fills in as each one lands
+        self.startup_pending = set()
+        self.startup_timings = [('window', time.perf_counter() - self.startup_start)]
+        start = time.perf_counter()
+        self.refresh_pods(on_finished=self.track_startup('pods', start))
+        self.update_gpu_types(on_finished=self.track_startup('gpu types', start))
+        for repo, latest in IMAGE_REPOS:
+            self.update_image_tags(repo, latest, on_finished=self.track_startup(repo, start))
+
+    def track_startup(self, name, start):
+        # Returns the on_finished callback of the startup fetch called name
+        self.startup_pending.add(name)
+
+        def finished():
+            self.startup_timings.append((name, time.perf_counter() - start))
+            self.startup_pending.discard(name)
+            if not self.startup_pending:
+                self.print_startup_timings()
+
+        return finished
+
+    def print_startup_timings(self):
+        print(f"Startup: {(time.perf_counter() - self.startup_start) * 1000:.0f} ms")
+        for name, seconds in self.startup_timings:
+            print(f"  {name:<28} {seconds * 1000:8.0f} ms")
+
+    def update_image_tags(self, repo, latest, on_finished=None):
+        def fetch(worker):
+            return get_latest_tags(repo) if latest else get_all_tags(repo)
+
+        return self.run_action(
+            f'正在获取 {repo} 镜像标签', fetch,
+            on_result=lambda tags: self.set_image_tags(repo, tags),
+            on_finished=on_finished
+        )
+
+    def set_image_tags(self, repo, tags):
+        if tags == self.image_tags.get(repo):
+            return
+        self.image_tags[repo] = tags
+        self.show_image_tags()
+        try:
+            save_cached_tags(self.image_tags)
+        except OSError as e:
+            print(f"Error saving image tags: {e}")
+
+    def show_image_tags(self):
+        # Keeps the selected image when it is still listed
+        current = self.image_combo.currentText()
+        self.image_combo.clear()
+        for repo, _ in IMAGE_REPOS:
+            self.image_combo.addItems(self.image_tags.get(repo, []))
+        if current:
+            self.image_combo.setCurrentText(current)
+
+    def update_gpu_types(self, on_finished=None):
+        # At most one refresh at a time, reopening the popup does not queue another
+        if self.gpu_types_worker in self.workers:
+            if on_finished is not None:
+                self.gpu_types_worker.signals.finished.connect(on_finished)
+            return self.gpu_types_worker
         self.gpu_combo.last_update = time.time()
-        self.gpu_types = sorted(get_gpu_types(), key=lambda gpu: gpu['memoryInGb'])
-        self.gpu_combo.clear()
-
-        for gpu in self.gpu_types:
-                gpu['securePrice'] = ' -' if not gpu.get('secureCloud', False) else gpu.get('securePrice', ' -')
-                gpu['communityPrice'] = ' -' if not gpu.get('communityCloud', False) else gpu.get('communityPrice', ' -')
-                gpu['lowestPrice']['minimumBidPrice'] = ' -' if gpu['lowestPrice']['minimumBidPrice'] is None else gpu['lowestPrice']['minimumBidPrice']
-                gpu_info = (
-                    f"{gpu['id']:<34}  |  {gpu['memoryInGb']:<2} GB  |  Max: {gpu['maxGpuCount']:<2}  |  "
-                    f"Secure: {gpu['securePrice']:<4}  |  "
-                    f"Community: {gpu['communityPrice']:<4}  |  "
-                    f"bid: {gpu['lowestPrice']['minimumBidPrice']:<4}"
-                )
-                self.gpu_combo.addItem(gpu_info, gpu)
+        self.gpu_types_worker = self.run_action(
+            '正在获取 GPU 信息', self.get_gpu_types_task,
+            on_result=self.set_gpu_types,
+            on_finished=on_finished
+        )
+        return self.gpu_types_worker
+
+    def get_gpu_types_task(self, worker):
+        # A stale catalog would only be refreshed in the background, fetch it here instead
+        with self.get_action_api(worker) as api:
+            return gpu_catalog.get_catalog().get_gpu_types(api, fresh=True)
+
+    def set_gpu_types(self, gpu_types):
+        # Updates the items in place by GPU id instead of rebuilding the list, so an
+        # open popup stays put and the selected GPU stays selected
+        self.gpu_types = sorted(GpuType.from_list(gpu_types), key=lambda gpu: gpu.memory_in_gb)
+        combo = self.gpu_combo
+        current = combo.currentData()
+        ids = [combo.itemData(index).id for index in range(combo.count())]
+
+        combo.blockSignals(True)
+        for index, gpu in enumerate(self.gpu_types):
+            text = self.format_gpu_type(gpu)
+            if index < len(ids) and ids[index] == gpu.id:
+                if combo.itemText(index) != text:
+                    combo.setItemText(index, text)
+                combo.setItemData(index, gpu)
+                continue
+            if gpu.id in ids[index + 1:]:
+                moved = ids.index(gpu.id, index + 1)
+                combo.removeItem(moved)
+                del ids[moved]
+            combo.insertItem(index, text, gpu)
+            ids.insert(index, gpu.id)
+        # GPU types no longer listed
+        for index in range(len(ids) - 1, len(self.gpu_types) - 1, -1):
+            combo.removeItem(index)
+        del ids[len(self.gpu_types):]
+        combo.blockSignals(False)
+
+        if current is not None and current.id in ids:
+            combo.setCurrentIndex(ids.index(current.id))
+
+    def format_gpu_type(self, gpu):
+        def price(value):
+            return ' -' if value is None else value
+
+        return (
+            f"{gpu.id:<34}  |  {gpu.memory_in_gb:<2} GB  |  Max: {gpu.max_gpu_count:<2}  |  "
+            f"Secure: {price(gpu.available_secure_price):<4}  |  "
+            f"Community: {price(gpu.available_community_price):<4}  |  "
+            f"bid: {price(gpu.minimum_bid_price):<4}"
+        )
+
+    def run_action(self, description, fn, *args, on_result=None, on_error=None, on_finished=None):
+        # Every signal is connected before the worker starts, a fast one could emit before that
+        worker = Worker(fn, *args)
+        worker.signals.progress.connect(self.status_label.setText)
+        if on_result is not None:
+            worker.signals.result.connect(on_result)
+        worker.signals.error.connect(lambda message: self.action_failed(worker, description, message, on_error))
+        worker.signals.finished.connect(lambda: self.action_finished(worker))
+        if on_finished is not None:
+            worker.signals.finished.connect(on_finished)
+
+        self.workers.add(worker)
+        self.cancel_button.setEnabled(True)
+        self.status_label.setText(f'{description}...')
+        self.thread_pool.start(worker)
+        return worker
+
+    def action_failed(self, worker, description, message, on_error=None):
+        print(f"Error: {description}: {message}")
+        if worker.cancel_event.is_set():
+            self.status_label.setText(f'{description}已取消')
+        else:
+            self.status_label.setText(f'{description}失败: {message}')
+        if on_error is not None:
+            on_error(message)
+
+    def action_finished(self, worker):
+        self.workers.discard(worker)
+        if not self.workers:
+            self.cancel_button.setEnabled(False)
+            if self.status_label.text().endswith('...') or '重试' in self.status_label.text():
+                self.status_label.setText('')
+
+    def closeEvent(self, event):
+        # Queued actions never start, running ones stop retrying and never signal
+        # this window again. Requests already sent get a few seconds to finish.
+        for worker in self.workers:
+            worker.detach()
+        self.thread_pool.clear()
+        self.thread_pool.waitForDone(5000)
+        self.stop_pod_refresher()
+        super().closeEvent(event)
+
+    def cancel_actions(self):
+        # Requests already sent still finish, retries and queued actions stop
+        for worker in self.workers:
+            worker.cancel()
+        self.status_label.setText('正在取消...')
+
+    def get_action_api(self, worker, retry_timeout=None):
+        # Every action gets its own API so its retries can be reported and cancelled.
+        # With a retry_timeout, launches also retry while no GPU is free.
+        if retry_timeout is None:
+            return runpod.API(cancel_event=worker.cancel_event, on_retry=worker.report_retry)
+        return runpod.API(
+            retry_on=runpod.RETRY_ALL,
+            retry_policies={runpod.CAPACITY: runpod.RetryPolicy(base_delay=5, factor=1.5, max_delay=30, max_elapsed=retry_timeout)},
+            cancel_event=worker.cancel_event,
+            on_retry=worker.report_retry
+        )
 
     def create_pod(self):
-        pod_info = {}
+        # The window is up before the GPU types are, there may be none to pick yet
+        gpu = self.gpu_combo.currentData()
+        if gpu is None:
+            self.status_label.setText('GPU 信息尚未加载')
+            return
+
         http_ports = [port + '/http' for port in self.http_port_edit.text().split(',')]
         tcp_ports = [port + '/tcp' for port in self.tcp_port_edit.text().split(',')]
         ports = ','.join(http_ports + tcp_ports)
 
-        command = ['python', 'create_pod.py', 
-                '--name', self.gpu_combo.currentData()['id'], 
-                '--image_name', self.image_combo.currentText(), 
-                '--gpu_type_id', self.gpu_combo.currentData()['id'], 
-                '--cloud_type', self.cloud_type_group.checkedButton().text(), 
-                '--os_disk_size_gb', str(self.os_disk_size_edit.text()), 
-                '--persistent_disk_size_gb', str(self.persistent_disk_size_edit.text()), 
-                '--ports', ports, 
-                '--user_envs', self.env_var_edit.text()
+        argv = ['--name', gpu.id,
+                '--image_name', self.image_combo.currentText(),
+                '--gpu_type_id', gpu.id,
+                '--cloud_type', self.cloud_type_group.checkedButton().text(),
+                '--os_disk_size_gb', str(self.os_disk_size_edit.text()),
+                '--persistent_disk_size_gb', str(self.persistent_disk_size_edit.text()),
+                '--ports', ports,
+                '--user_envs', self.env_var_edit.text(),
+                '--retry_timeout', '600'
                 ]
 
         if self.spot_radio.isChecked():
-            command.append('--spot')
+            argv.append('--spot')
+
+        # Same arguments and defaults as create_pod.py
+        parser = argparse.ArgumentParser()
+        create_pod.add_arguments(parser)
         try:
-            result = subprocess.run(command, cwd=current_path, capture_output=True, text=True)
-        except Exception as e:
-            print(f"Error running create_pod.py: {e}")
-
-        if result.returncode == 0:
-            if result.stdout.strip():
-                try:
-                    data = json.loads(result.stdout)
-                    # Extract pod_info based on the pod type
-                    if 'podFindAndDeployOnDemand' in data['data']:
-                        pod_info = data['data']['podFindAndDeployOnDemand']
-                    elif 'podRentInterruptable' in data['data']:
-                        pod_info = data['data']['podRentInterruptable']
-                except json.JSONDecodeError:
-                    print(f"Error parsing JSON: {result.stdout}")
-            else:
-                print("No output from create_pod.py")
-            self.add_pod_to_status_area(pod_info)
-        else:
-            print(f"Error creating pod: {result.stderr}")
+            args = parser.parse_args(argv)
+        except SystemExit:
+            self.status_label.setText('参数错误')
+            return
+
+        self.run_action('正在创建 pod', self.create_pod_task, args, on_result=self.add_pod_to_status_area)
+
+    def create_pod_task(self, worker, args):
+        with self.get_action_api(worker, args.retry_timeout) as api:
+            error = create_pod.prepare(args, api)
+            if error is not None:
+                raise RuntimeError(error)
+
+            worker.progress(f'正在创建 pod ({args.gpu_type_id}, {args.cloud_type})...')
+            if args.spot:
+                data = response_data(api.create_spot_pod(create_pod.get_pod_config(args)))
+                return Pod.from_dict(data['podRentInterruptable'])
+            data = response_data(api.create_on_demand_pod(create_pod.get_pod_config(args)))
+            return Pod.from_dict(data['podFindAndDeployOnDemand'])
 
     def add_pod_to_status_area(self, pod_info):
-        if not pod_info:
-            return
-        
-        pod_group = QGroupBox()
-        pod_layout = QHBoxLayout(pod_group)
-
-        terminate_button = QPushButton('删除')
-        terminate_button.setFixedWidth(80)
-        terminate_button.setFixedHeight(60)
-        terminate_button.clicked.connect(lambda: self.terminate_pod(pod_info['id'], pod_layout))
-        pod_layout.addWidget(terminate_button)
-
-        if pod_info['desiredStatus'] == 'RUNNING':
-            stop_button = QPushButton('停止')
-            stop_button.setFixedWidth(80)
-            stop_button.setFixedHeight(60)
-            stop_button.clicked.connect(lambda: self.stop_pod(pod_info, stop_button))
-            pod_layout.addWidget(stop_button)
-        elif pod_info['desiredStatus'] == 'EXITED':
-            start_button = QPushButton('开始')
-            start_button.setFixedWidth(80)
-            start_button.setFixedHeight(60)
-            start_button.clicked.connect(lambda: self.start_pod(pod_info, start_button))
-            pod_layout.addWidget(start_button)
-
-        pod_info_label = QLabel(
-            f"{pod_info['name']} - {pod_info['id']}<br>"
-            f"{pod_info['podType']} - {pod_info['costPerHr']}<br>"
-            f"{pod_info['imageName']}"
+        if pod_info:
+            self.pod_model.add_pod(pod_info)
+            self.poll_pods_soon()
+
+    def get_pods(self, api):
+        # The status fields plus GPU utilisation, not runtime ports or other telemetry.
+        # Errors are raised, the callers run it on a worker or the refresher.
+        return pods_from_response(api.get_pods(POD_TABLE_FIELDS))
+
+    def pod_action_done(self, pod_id, status):
+        self.pod_model.set_status(pod_id, status)
+        self.poll_pods_soon()
+
+    def run_pod_action(self, action, pod_info):
+        if action == 'stop':
+            self.stop_pod(pod_info)
+        elif action == 'start':
+            self.start_pod(pod_info)
+        elif action == 'terminate':
+            self.terminate_pod(pod_info)
+
+    def stop_pod(self, pod_info):
+        self.pod_model.set_pending(pod_info.id, True)
+        self.run_action(
+            f'正在停止 pod {pod_info.id}', self.stop_pod_task, pod_info.id,
+            on_result=lambda _: self.pod_action_done(pod_info.id, 'EXITED'),
+            on_error=lambda _: self.pod_model.set_pending(pod_info.id, False)
         )
-        pod_info_label.setTextInteractionFlags(Qt.TextSelectableByMouse)
-        pod_info_label.setFixedWidth(500)
-        pod_layout.addWidget(pod_info_label)
-        pod_layout.setAlignment(Qt.AlignLeft)
-        self.update_groupbox_color(pod_group, pod_info['desiredStatus'])
-        self.pod_status_layout.addWidget(pod_group)
-
-    def get_pods(self):
-        result = subprocess.run(['python', 'get_pods.py'], cwd=current_path, capture_output=True, text=True)
-        try:
-            pod_info = json.loads(result.stdout) if result.stdout.strip() else []
-        except json.JSONDecodeError:
-            print(f"Error parsing JSON: {result.stdout}")
-            pod_info = []
-        return pod_info
-
-    def stop_pod(self, pod_info, stop_button):
-        pod_id = pod_info['id']
-        subprocess.run(['python', os.path.join(current_path, 'stop_pod.py'), '--pod_id', str(pod_id)])
-        # Update the stop button to a start button
-        stop_button.setText('开始')
-        stop_button.clicked.connect(lambda: self.start_pod(pod_info, stop_button))
-        self.update_groupbox_color(stop_button.parent(), 'EXITED')
-
-    def start_pod(self, pod_info, stop_button):
-        pod_id = pod_info['id']
-        spot = pod_info['podType'] == 'INTERRUPTABLE'
-        if spot:
-            bid_price = str(pod_info['costPerHr'])
-            # bid_price = str(pod_info['lowestBidPriceToResume'])
-            subprocess.run(['python', 'start_spot_pod.py', '--pod_id', str(pod_id), '--bid_price', bid_price], cwd=current_path)
-        else:
-            subprocess.run(['python', os.path.join(current_path, 'start_on_demand_pod.py'), '--pod_id', str(pod_id)])
-        # Update the start button to a stop button
-        stop_button.setText('停止')
-        self.update_groupbox_color(stop_button.parent(), 'RUNNING')
-        stop_button.clicked.connect(lambda: self.stop_pod(pod_info, stop_button))
-
-    def update_groupbox_color(self, groupbox, status):
-        if status == 'RUNNING':
-            groupbox.setStyleSheet("QGroupBox { background-color: #8fe4bd; }")
-        elif status == 'EXITED':
-            groupbox.setStyleSheet("QGroupBox { background-color: #c9d0ed; }")
+
+    def stop_pod_task(self, worker, pod_id):
+        with self.get_action_api(worker) as api:
+            return response_data(api.stop_pod(pod_id))
+
+    def start_pod(self, pod_info):
+        self.pod_model.set_pending(pod_info.id, True)
+        self.run_action(
+            f'正在启动 pod {pod_info.id}', self.start_pod_task, pod_info,
+            on_result=lambda _: self.pod_action_done(pod_info.id, 'RUNNING'),
+            on_error=lambda _: self.pod_model.set_pending(pod_info.id, False)
+        )
+
+    def start_pod_task(self, worker, pod_info):
+        # Keeps retrying for up to 10 minutes while no GPU is free, like start_*_pod.py
+        with self.get_action_api(worker, 600) as api:
+            if pod_info.is_spot:
+                bid_price = pod_info.cost_per_hr
+                # bid_price = pod_info.lowest_bid_price_to_resume
+                return response_data(api.start_spot_pod(pod_info.id, bid_price))
+            return response_data(api.start_on_demand_pod(pod_info.id))
 
     def clear_layout(self, layout):
         while layout.count():
@@ -416,29 +792,46 @@ class GPUSelector(QWidget):
                 self.clear_layout(child.layout())
 
     def update_pods_in_ui(self, pod_infos):
-        def sort_key(pod):
-            try:
-                return datetime.datetime.strptime(" ".join(pod['name'].rsplit(" ", 2)[-2:]), "%Y-%m-%d %H:%M:%S")
-            except ValueError:
-                return pod['name']
-
-        pod_infos = sorted(pod_infos, key=sort_key)
-
-        self.clear_layout(self.pod_status_layout)
-        for pod_info in pod_infos:
-            self.add_pod_to_status_area(pod_info)
-
-    def refresh_pods(self):
-        pod_infos = self.get_pods()
-        self.update_pods_in_ui(pod_infos)
+        # The model only signals the cells that changed and the table only paints
+        # the visible rows, nothing at all happens when the list is unchanged
+        self.pod_model.set_pods(pod_infos)
+
+    def refresh_pods(self, on_finished=None):
+        return self.run_action('正在刷新', self.refresh_pods_task, on_result=self.update_pods_in_ui, on_finished=on_finished)
+
+    def refresh_pods_task(self, worker):
+        with self.get_action_api(worker) as api:
+            return self.get_pods(api)
+
+    def terminate_pod(self, pod_info):
+        self.pod_model.set_pending(pod_info.id, True)
+        self.run_action(
+            f'正在删除 pod {pod_info.id}', self.terminate_pod_task, pod_info.id,
+            on_result=lambda _: self.poll_pods_soon(),
+            on_error=lambda _: self.pod_model.set_pending(pod_info.id, False)
+        )
 
-    def terminate_pod(self, pod_id, pod_layout):
-        subprocess.run(['python', os.path.join(current_path, 'terminate_pod.py'), '--pod_id', str(pod_id)])
-        self.refresh_pods()
+    def terminate_pod_task(self, worker, pod_id):
+        with self.get_action_api(worker) as api:
+            return response_data(api.terminate_pod(pod_id))
 
     def delete_all_pods(self):
-        subprocess.run(['python', os.path.join(current_path, 'terminate_all_pods.py')])
-        self.refresh_pods()
+        self.run_action('正在删除所有 pod', self.delete_all_pods_task, on_result=lambda _: self.poll_pods_soon())
+
+    def delete_all_pods_task(self, worker):
+        with self.get_action_api(worker) as api:
+            pod_ids = [pod.id for pod in self.get_pods(api)]
+            worker.progress(f'正在删除 {len(pod_ids)} 个 pod...')
+            results = api.terminate_pods(pod_ids)
+
+        failed = []
+        for pod_id, result in results.items():
+            if result['errors']:
+                print(f"Error terminating pod {pod_id}: {' '.join(result['errors'])}")
+                failed.append(pod_id)
+        if failed:
+            raise RuntimeError(f"{len(failed)} 个 pod 删除失败: {', '.join(failed)}")
+        return results
 
     # def toggle_api_key_visibility(self):
     #     if self.api_key_edit.echoMode() == QLineEdit.Password:
@@ -447,10 +840,14 @@ class GPUSelector(QWidget):
     #         self.api_key_edit.setEchoMode(QLineEdit.Password)
 
     def save_preset(self):
+        gpu = self.gpu_combo.currentData()
+        if gpu is None:
+            self.status_label.setText('GPU 信息尚未加载')
+            return
         preset_name, ok = QInputDialog.getText(self, '预设名称', '请输入预设名称:')
         if ok:
             preset = {
-                'gpu_type_id': self.gpu_combo.currentData()['id'],
+                'gpu_type_id': gpu.id,
                 'image_name': self.image_combo.currentText(),
                 'secure_radio': self.secure_radio.isChecked(),
                 'community_radio': self.community_radio.isChecked(),
@@ -492,7 +889,7 @@ class GPUSelector(QWidget):
             if preset_name in presets and preset_name != 'api_key':
                 preset = presets[preset_name]
                 for i in range(self.gpu_combo.count()):
-                    if self.gpu_combo.itemData(i)['id'] == preset['gpu_type_id']:
+                    if self.gpu_combo.itemData(i).id == preset['gpu_type_id']:
                         self.gpu_combo.setCurrentIndex(i)
                         break
                 self.image_combo.setCurrentText(preset['image_name'])
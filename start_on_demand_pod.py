@@ -1,15 +1,11 @@
 #!/usr/bin/env python3
-import argparse
 import sys
 import runpod
-import time
+import runpod_cli
+from runpod import CAPACITY, response_json
 
 
-def get_args():
-    parser = argparse.ArgumentParser(
-        description='Start an on-demand RunPod pod',
-    )
-
+def add_arguments(parser):
     parser.add_argument(
         '--pod_id', '-pod_id', '--pod', '-pod', '--p', '-p',
         type=str,
@@ -17,22 +13,22 @@ def get_args():
         help='pod id (eg. dg31b9aqtupn2z)'
     )
 
-    return parser.parse_args()
+    parser.add_argument(
+        '--retry_timeout', '-retry_timeout',
+        type=float,
+        default=600,
+        help='seconds to keep retrying while no GPU is available (default: 600)'
+    )
 
 
-def start_pod(pod_id):
-    response = runpod.start_on_demand_pod(pod_id)
-    resp_json = response.json()
+def start_pod(api, pod_id):
+    response = api.start_on_demand_pod(pod_id)
+    resp_json = response_json(response)
 
     if response.status_code == 200:
         if 'errors' in resp_json:
             for error in resp_json['errors']:
-                if error['message'] == 'There are not enough free GPUs on the host machine to start this pod.':
-                    print('No available GPU, sleeping for 10 seconds....')
-                    time.sleep(10)
-                    start_pod(pod_id)
-                else:
-                    print(f"ERROR: {error['message']}")
+                print(f"ERROR: {error['message']}")
         else:
             pod = resp_json['data']['podResume']
 
@@ -44,7 +40,20 @@ def start_pod(pod_id):
             sys.exit()
 
 
+def print_retry(error_class, attempt, delay):
+    reason = 'No available GPU' if error_class == CAPACITY else f'Request failed ({error_class})'
+    print(f'{reason}, retrying in {delay:.0f} seconds....')
+
+
+def main(args):
+    # Capacity errors are retried with backoff inside the API instead of recursing here
+    with runpod.API(
+        retry_on=runpod.RETRY_ALL,
+        retry_policies={runpod.CAPACITY: runpod.RetryPolicy(base_delay=5, factor=1.5, max_delay=10, max_elapsed=args.retry_timeout)},
+        on_retry=print_retry
+    ) as api:
+        start_pod(api, args.pod_id)
+
+
 if __name__ == '__main__':
-    runpod = runpod.API()
-    args = get_args()
-    start_pod(args.pod_id)
+    runpod_cli.alias('start-on-demand-pod')
@@ -1,15 +1,11 @@
 #!/usr/bin/env python3
-import argparse
 import sys
 import runpod
-import time
+import runpod_cli
+from runpod import CAPACITY, response_json
 
 
-def get_args():
-    parser = argparse.ArgumentParser(
-        description='Start a spot RunPod pod',
-    )
-
+def add_arguments(parser):
     parser.add_argument(
         '--pod_id', '-pod_id', '--pod', '-pod', '--p', '-p',
         type=str,
@@ -24,23 +20,22 @@ def get_args():
         help='bid price (eg. 0.133)'
     )
 
-    return parser.parse_args()
+    parser.add_argument(
+        '--retry_timeout', '-retry_timeout',
+        type=float,
+        default=600,
+        help='seconds to keep retrying while no GPU is available (default: 600)'
+    )
 
 
-def start_pod(pod_id, bid_price):
-    response = runpod.start_spot_pod(pod_id, bid_price)
-    resp_json = response.json()
+def start_pod(api, pod_id, bid_price):
+    response = api.start_spot_pod(pod_id, bid_price)
+    resp_json = response_json(response)
 
     if response.status_code == 200:
         if 'errors' in resp_json:
             for error in resp_json['errors']:
-                if error['message'] == 'There are not enough free GPUs on the host machine to start this pod.'\
-                        or error['message'] == 'The server your pods are hosted on does not have enough GPUs for you to resume your spot pod. Please try again later.':
-                    print('No available GPU, sleeping for 30 seconds....')
-                    time.sleep(30)
-                    start_pod(pod_id, bid_price)
-                else:
-                    print(f"ERROR: {error['message']}")
+                print(f"ERROR: {error['message']}")
         else:
             pod = resp_json['data']['podBidResume']
 
@@ -52,7 +47,20 @@ def start_pod(pod_id, bid_price):
             sys.exit()
 
 
+def print_retry(error_class, attempt, delay):
+    reason = 'No available GPU' if error_class == CAPACITY else f'Request failed ({error_class})'
+    print(f'{reason}, retrying in {delay:.0f} seconds....')
+
+
+def main(args):
+    # Capacity errors are retried with backoff inside the API instead of recursing here
+    with runpod.API(
+        retry_on=runpod.RETRY_ALL,
+        retry_policies={runpod.CAPACITY: runpod.RetryPolicy(base_delay=10, factor=1.5, max_delay=30, max_elapsed=args.retry_timeout)},
+        on_retry=print_retry
+    ) as api:
+        start_pod(api, args.pod_id, args.bid_price)
+
+
 if __name__ == '__main__':
-    runpod = runpod.API()
-    args = get_args()
-    start_pod(args.pod_id, args.bid_price)
+    runpod_cli.alias('start-spot-pod')
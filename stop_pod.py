@@ -1,15 +1,10 @@
 #!/usr/bin/env python3
-import argparse
-import json
+import runpod_cli
+import runpod_daemon
+from runpod import response_json
 
-import runpod
-
-
-def get_args():
-    parser = argparse.ArgumentParser(
-        description='Stop a RunPod pod',
-    )
 
+def add_arguments(parser):
     parser.add_argument(
         '--pod_id', '-pod_id', '--pod', '-pod', '--p', '-p',
         type=str,
@@ -17,22 +12,23 @@ def get_args():
         help='pod id (eg. dg31b9aqtupn2z)'
     )
 
-    return parser.parse_args()
-
 
-if __name__ == '__main__':
-    args = get_args()
+def main(args):
     pod_id = args.pod_id
-    runpod = runpod.API()
-    response = runpod.stop_pod(pod_id)
-    resp_json = response.json()
+    with runpod_daemon.get_api() as api:
+        response = api.stop_pod(pod_id)
+        resp_json = response_json(response)
+
+        if response.status_code == 200:
+            if 'errors' in resp_json:
+                print('ERROR:')
+                for error in resp_json['errors']:
+                    print(error['message'])
+            else:
+                pod = resp_json['data']['podStop']
+                print(f"id:     {pod['id']}")
+                print(f"status: {pod['desiredStatus']}")
 
-    if response.status_code == 200:
-        if 'errors' in resp_json:
-            print('ERROR:')
-            for error in resp_json['errors']:
-                print(error['message'])
-        else:
-            pod = resp_json['data']['podStop']
-            print(f"id:     {pod['id']}")
-            print(f"status: {pod['desiredStatus']}")
+
+if __name__ == '__main__':
+    runpod_cli.alias('stop-pod')
@@ -1,6 +1,5 @@
 #!/usr/bin/env python3
 import runpod
-import json
 
 VERSION = '1.0.0'
 TEMPLATE_NAME = f'Audiocraft Audio Generation'
@@ -44,16 +43,16 @@ if __name__ == '__main__':
     """
 
     response = runpod.create_template(template)
-    resp_json = response.json()
+    resp_json = runpod.response_json(response)
 
     if response.status_code == 200:
         if 'errors' in resp_json:
-            print(json.dumps(resp_json, indent=4, default=str))
+            print(runpod.pretty(resp_json))
             print('ERROR:')
             for error in resp_json['errors']:
                 print(error['message'])
         else:
-            print(json.dumps(resp_json, indent=4, default=str))
+            print(runpod.pretty(resp_json))
     else:
         print(response.status_code)
-        print(json.dumps(resp_json, indent=4, default=str))
+        print(runpod.pretty(resp_json))
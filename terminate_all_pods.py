@@ -1,35 +1,40 @@
 #!/usr/bin/env python3
-import runpod
-import json
+import runpod_cli
+import runpod_daemon
+from runpod import pretty, response_json
 
-def terminate_pod(pod_id):
-    response = runpod.API().terminate_pod(pod_id)
-    resp_json = response.json()
 
-    if response.status_code == 200:
-        if 'errors' in resp_json:
-            print('ERROR:')
-            for error in resp_json['errors']:
-                print(error['message'])
-        else:
-            print(f'Pod {pod_id} has been terminated')
+def add_arguments(parser):
+    pass
 
-if __name__ == '__main__':
-    response = runpod.API().get_pods()
-    resp_json = response.json()
 
-    if response.status_code == 200:
-        if 'errors' in resp_json:
-            print('ERROR:')
-            for error in resp_json['errors']:
-                print(error['message'])
-        elif 'data' in resp_json and 'myself' in resp_json['data'] and resp_json['data']['myself'] is not None:
-            pod_ids = [pod['id'] for pod in resp_json['data']['myself']['pods']]
-            for pod_id in pod_ids:
-                terminate_pod(pod_id)
+def main(args):
+    with runpod_daemon.get_api() as api:
+        response = api.get_pods()
+        resp_json = response_json(response)
+
+        if response.status_code == 200:
+            if 'errors' in resp_json:
+                print('ERROR:')
+                for error in resp_json['errors']:
+                    print(error['message'])
+            elif 'data' in resp_json and 'myself' in resp_json['data'] and resp_json['data']['myself'] is not None:
+                pod_ids = [pod['id'] for pod in resp_json['data']['myself']['pods']]
+                # Terminate in batches of aliased mutations instead of one request per pod
+                for pod_id, result in api.terminate_pods(pod_ids).items():
+                    if result['errors']:
+                        print('ERROR:')
+                        for message in result['errors']:
+                            print(message)
+                    else:
+                        print(f'Pod {pod_id} has been terminated')
+            else:
+                print('ERROR: Unable to get a list of pods')
+                print(pretty(resp_json))
         else:
-            print('ERROR: Unable to get a list of pods')
-            print(json.dumps(resp_json, indent=4, default=str))
-    else:
-        print(response.status_code)
-        print(json.dumps(resp_json, indent=4, default=str))
+            print(response.status_code)
+            print(pretty(resp_json))
+
+
+if __name__ == '__main__':
+    runpod_cli.alias('terminate-all-pods')
@@ -1,14 +1,10 @@
 #!/usr/bin/env python3
-import argparse
-import json
-import runpod
+import runpod_cli
+import runpod_daemon
+from runpod import response_json
 
 
-def get_args():
-    parser = argparse.ArgumentParser(
-        description='Update Min Workers for a Serverless Endpoint',
-    )
-
+def add_arguments(parser):
     parser.add_argument(
         '--endpoint_id', '-endpoint_id', '--endpoint', '-endpoint', '--e', '-e',
         type=str,
@@ -23,24 +19,25 @@ def get_args():
         help='min workers (eg. 1)'
     )
 
-    return parser.parse_args()
+
+def main(args):
+    with runpod_daemon.get_api() as api:
+        response = api.update_min_workers(args.endpoint_id, args.min_workers)
+        resp_json = response_json(response)
+
+        if response.status_code == 200:
+            if 'errors' in resp_json:
+                print('ERROR:')
+                for error in resp_json['errors']:
+                    print(error['message'])
+            else:
+                endpoint = resp_json['data']['updateEndpointWorkersMin']
+                print('Min workers updated successfully.')
+                print(f"endpoint id: {endpoint['id']}")
+                print(f"template id: {endpoint['templateId']}")
+                print(f"min workers: {endpoint['workersMin']}")
+                print(f"max workers: {endpoint['workersMax']}")
 
 
 if __name__ == '__main__':
-    args = get_args()
-    runpod = runpod.API()
-    response = runpod.update_min_workers(args.endpoint_id, args.min_workers)
-    resp_json = response.json()
-
-    if response.status_code == 200:
-        if 'errors' in resp_json:
-            print('ERROR:')
-            for error in resp_json['errors']:
-                print(error['message'])
-        else:
-            endpoint = resp_json['data']['updateEndpointWorkersMin']
-            print('Min workers updated successfully.')
-            print(f"endpoint id: {endpoint['id']}")
-            print(f"template id: {endpoint['templateId']}")
-            print(f"min workers: {endpoint['workersMin']}")
-            print(f"max workers: {endpoint['workersMax']}")
+    runpod_cli.alias('update-min-workers')